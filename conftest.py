@@ -44,6 +44,19 @@ def pytest_addoption(parser):
         action='store_true',
         dest='include_ruby',
     )
+    parser.addoption(
+        '--compile-expressions',
+        help='run file tests with compiled expressions',
+        action='store_true',
+        dest='compile_expressions',
+    )
+    parser.addoption(
+        '--expression-parser',
+        help='run file tests with the given expression parser',
+        choices=('yapps', 'pratt'),
+        default='yapps',
+        dest='expression_parser',
+    )
 
 
 def pytest_ignore_collect(path, config):
@@ -134,6 +147,9 @@ class SassItem(pytest.Item):
                     FontsExtension,
                     CompassExtension,
                 ],
+                compile_expressions=self.config.getoption(
+                    'compile_expressions'),
+                expression_parser=self.config.getoption('expression_parser'),
             )
         except SassEvaluationError as e:
             # Treat any missing dependencies (PIL not installed, fontforge not
@@ -10,6 +10,7 @@ from __future__ import unicode_literals
 from functools import partial
 import logging
 import operator
+import weakref
 
 try:
     from collections import OrderedDict
@@ -21,6 +22,7 @@ import six
 
 from scss.cssdefs import COLOR_NAMES
 from scss.cssdefs import is_builtin_css_function
+from scss.namespace import FunctionScope
 from scss.types import Boolean
 from scss.types import Color
 from scss.types import Function
@@ -37,10 +39,41 @@ from scss.util import normalize_var
 log = logging.getLogger(__name__)
 
 
+def _weak_ref(obj):
+    """Return a weak reference to `obj`, or something that acts like one for
+    objects that can't be weakly referenced (like None and builtins, which
+    are never worth freeing anyway).
+    """
+    try:
+        return weakref.ref(obj)
+    except TypeError:
+        return lambda: obj
+
+
+def _constant_function(value):
+    """Return a compiled expression (see `Expression.compile`) that always
+    evaluates to `value`.
+    """
+    def evaluate(calculator, divide=False):
+        return value
+    return evaluate
+
+
 class Expression(object):
+    # The value this node always evaluates to, if `fold` found one
+    _constant = None
+    # What `compiled` returned, once it's been called
+    _compiled = None
+
     def __repr__(self):
         return '<%s()>' % (self.__class__.__name__)
 
+    def __getstate__(self):
+        # Compiled expressions are closures, which can't be pickled
+        state = self.__dict__.copy()
+        state.pop('_compiled', None)
+        return state
+
     def evaluate(self, calculator, divide=False):
         """Evaluate this AST node, and return a Sass value.
 
@@ -50,6 +83,56 @@ class Expression(object):
         """
         raise NotImplementedError
 
+    def fold(self, divide=None):
+        """Find the parts of this tree that don't depend on any variables or
+        function calls, and evaluate them now, so later evaluations can skip
+        them.  Returns the value this node always evaluates to, or None.
+
+        `divide` is what will be passed to `evaluate`, or None if that isn't
+        known.
+
+        Nodes aren't replaced, only told their value, because some nodes
+        behave differently depending on what kind of children they have.
+        """
+        return None
+
+    def _fold_constant(self, divide):
+        """Evaluate this node, all of whose children are constant, and
+        remember the result.
+        """
+        try:
+            value = self.evaluate(None, divide=bool(divide))
+        except Exception:
+            # Leave it to fail at runtime, with a proper error
+            return None
+
+        self._constant = value
+        return value
+
+    def compile(self):
+        """Return a function that takes the same arguments as `evaluate` and
+        returns the same value, but is quicker to call over and over: anything
+        that only depends on the shape of the tree is worked out once, here,
+        and children are called directly instead of through their nodes.
+
+        Folding first (see `fold`) lets constant parts compile down to
+        nothing.
+        """
+        if self._constant is not None:
+            return _constant_function(self._constant)
+        return self._compile()
+
+    def _compile(self):
+        # Nodes without anything better just evaluate themselves
+        return self.evaluate
+
+    def compiled(self):
+        """Return the result of `compile`, compiling this node on first use."""
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self._compiled = self.compile()
+        return compiled
+
 
 class Parentheses(Expression):
     """An expression of the form `(foo)`.
@@ -64,8 +147,22 @@ class Parentheses(Expression):
         self.contents = contents
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
         return self.contents.evaluate(calculator, divide=True)
 
+    def fold(self, divide=None):
+        if self.contents.fold(True) is None:
+            return None
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        contents = self.contents.compile()
+
+        def evaluate(calculator, divide=False):
+            return contents(calculator, True)
+        return evaluate
+
 
 class UnaryOp(Expression):
     def __repr__(self):
@@ -76,8 +173,23 @@ class UnaryOp(Expression):
         self.operand = operand
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
         return self.op(self.operand.evaluate(calculator, divide=True))
 
+    def fold(self, divide=None):
+        if self.operand.fold(True) is None:
+            return None
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        op = self.op
+        operand = self.operand.compile()
+
+        def evaluate(calculator, divide=False):
+            return op(operand(calculator, True))
+        return evaluate
+
 
 class BinaryOp(Expression):
     OPERATORS = {
@@ -103,6 +215,9 @@ class BinaryOp(Expression):
         self.right = right
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
+
         left = self.left.evaluate(calculator, divide=True)
         right = self.right.evaluate(calculator, divide=True)
 
@@ -112,8 +227,7 @@ class BinaryOp(Expression):
 
         # If either operand starts with an interpolation, treat the whole
         # shebang as literal.
-        if any(isinstance(operand, Interpolation) and operand.parts[0] == ''
-                for operand in (self.left, self.right)):
+        if self._is_interpolated():
             literal = True
 
         # Special handling of division: treat it as a literal slash if both
@@ -122,22 +236,66 @@ class BinaryOp(Expression):
         # The first condition is covered by the type check.  The other two are
         # covered by the `divide` argument: other nodes that perform arithmetic
         # will pass in True, indicating that this should always be a division.
-        elif (
-            self.op is operator.truediv
-            and not divide
-            and isinstance(self.left, Literal)
-            and isinstance(self.right, Literal)
-        ):
+        elif not divide and self._is_literal_slash():
             literal = True
 
         if literal:
-            # TODO we don't currently preserve the spacing, whereas Sass
-            # remembers whether there was space on either side
-            op = " {0} ".format(self.OPERATORS[self.op])
-            return String.unquoted(left.render() + op + right.render())
+            return self._render_literally(left, right)
 
         return self.op(left, right)
 
+    def _is_interpolated(self):
+        return any(
+            isinstance(operand, Interpolation) and operand.parts[0] == ''
+            for operand in (self.left, self.right))
+
+    def _is_literal_slash(self):
+        return (
+            self.op is operator.truediv
+            and isinstance(self.left, Literal)
+            and isinstance(self.right, Literal)
+        )
+
+    def _render_literally(self, left, right):
+        # TODO we don't currently preserve the spacing, whereas Sass
+        # remembers whether there was space on either side
+        op = " {0} ".format(self.OPERATORS[self.op])
+        return String.unquoted(left.render() + op + right.render())
+
+    def fold(self, divide=None):
+        left = self.left.fold(True)
+        right = self.right.fold(True)
+        if left is None or right is None:
+            return None
+
+        # A slash between two literals depends on where it appears
+        if divide is None and self._is_literal_slash():
+            return None
+
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        op = self.op
+        left = self.left.compile()
+        right = self.right.compile()
+        render_literally = self._render_literally
+
+        if self._is_interpolated():
+            def evaluate(calculator, divide=False):
+                return render_literally(
+                    left(calculator, True), right(calculator, True))
+        elif self._is_literal_slash():
+            def evaluate(calculator, divide=False):
+                left_value = left(calculator, True)
+                right_value = right(calculator, True)
+                if divide:
+                    return op(left_value, right_value)
+                return render_literally(left_value, right_value)
+        else:
+            def evaluate(calculator, divide=False):
+                return op(left(calculator, True), right(calculator, True))
+        return evaluate
+
 
 class AnyOp(Expression):
     def __repr__(self):
@@ -147,12 +305,31 @@ class AnyOp(Expression):
         self.operands = operands
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
         for operand in self.operands:
             value = operand.evaluate(calculator, divide=True)
             if value:
                 return value
         return value
 
+    def fold(self, divide=None):
+        values = [operand.fold(True) for operand in self.operands]
+        if any(value is None for value in values):
+            return None
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        operands = [operand.compile() for operand in self.operands]
+
+        def evaluate(calculator, divide=False):
+            for operand in operands:
+                value = operand(calculator, True)
+                if value:
+                    return value
+            return value
+        return evaluate
+
 
 class AllOp(Expression):
     def __repr__(self):
@@ -162,12 +339,31 @@ class AllOp(Expression):
         self.operands = operands
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
         for operand in self.operands:
             value = operand.evaluate(calculator, divide=True)
             if not value:
                 return value
         return value
 
+    def fold(self, divide=None):
+        values = [operand.fold(True) for operand in self.operands]
+        if any(value is None for value in values):
+            return None
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        operands = [operand.compile() for operand in self.operands]
+
+        def evaluate(calculator, divide=False):
+            for operand in operands:
+                value = operand(calculator, True)
+                if not value:
+                    return value
+            return value
+        return evaluate
+
 
 class NotOp(Expression):
     def __repr__(self):
@@ -177,9 +373,23 @@ class NotOp(Expression):
         self.operand = operand
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
         operand = self.operand.evaluate(calculator, divide=True)
         return Boolean(not(operand))
 
+    def fold(self, divide=None):
+        if self.operand.fold(True) is None:
+            return None
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        operand = self.operand.compile()
+
+        def evaluate(calculator, divide=False):
+            return Boolean(not(operand(calculator, True)))
+        return evaluate
+
 
 class CallOp(Expression):
     def __repr__(self):
@@ -188,17 +398,68 @@ class CallOp(Expression):
     def __init__(self, func_name, argspec):
         self.func_name = func_name
         self.argspec = argspec
+        # The last function this call resolved to: weak references to the
+        # function scope and the function, the scope's generation, the number
+        # of arguments, and whether they're wrapped in a list.  Parsed
+        # expressions are shared between compilations, so nothing here may
+        # keep one alive.
+        self._resolved = None
+        # When the arguments are constant and the function is pure, the
+        # result of the last call: the number of arguments, a weak reference
+        # to the function, whether the arguments were wrapped in a list, and
+        # the value it returned
+        self._folded = None
+
+    def __getstate__(self):
+        # Weak references can't be pickled
+        state = super(CallOp, self).__getstate__()
+        state['_resolved'] = None
+        state['_folded'] = None
+        return state
+
+    def _resolve(self, namespace, func_name, arity):
+        scope = namespace._functions
+        generation = FunctionScope.generation
+        resolved = self._resolved
+        if (resolved is not None and resolved[0]() is scope and
+                resolved[2] == generation and resolved[3] == arity):
+            return resolved[1](), resolved[4]
+
+        funct, wrap_args = namespace.resolve_function(func_name, arity)
+        self._resolved = (
+            weakref.ref(scope), _weak_ref(funct), generation, arity,
+            wrap_args)
+        return funct, wrap_args
+
+    def fold(self, divide=None):
+        # Which function this calls isn't known until runtime, so the most
+        # that can be done now is to fold the arguments
+        self.argspec.fold(True)
+        return None
+
+    def _folded_result(self, namespace, func_name):
+        """Return what this call returned last time, if that can't have
+        changed since, or None.
+        """
+        folded = self._folded
+        if folded is not None:
+            funct, wrap_args = self._resolve(namespace, func_name, folded[0])
+            if folded[1]() is funct and folded[2] == wrap_args:
+                return folded[3]
+        return None
 
     def evaluate(self, calculator, divide=False):
         # TODO bake this into the context and options "dicts", plus library
         func_name = normalize_var(self.func_name)
 
-        argspec_node = self.argspec
+        ret = self._folded_result(calculator.namespace, func_name)
+        if ret is not None:
+            return ret
 
         # Turn the pairs of arg tuples into *args and **kwargs
         # TODO unclear whether this is correct -- how does arg, kwarg, arg
         # work?
-        args, kwargs = argspec_node.evaluate_call_args(calculator)
+        args, kwargs = self.argspec.evaluate_call_args(calculator)
         argspec_len = len(args) + len(kwargs)
 
         # Translate variable names to Python identifiers
@@ -208,18 +469,20 @@ class CallOp(Expression):
             (key.lstrip('$').replace('-', '_'), value)
             for key, value in kwargs.items())
 
+        return self._call(calculator, func_name, args, kwargs, argspec_len)
+
+    def _call(self, calculator, func_name, args, kwargs, argspec_len):
+        """Call the function this resolves to with already-evaluated
+        arguments, or render the call as CSS if there isn't one.
+        """
         # TODO merge this with the library
-        funct = None
-        try:
-            funct = calculator.namespace.function(func_name, argspec_len)
-        except KeyError:
-            try:
-                # DEVIATION: Fall back to single parameter
-                funct = calculator.namespace.function(func_name, 1)
-                args = [List(args, use_comma=True)]
-            except KeyError:
-                if not is_builtin_css_function(func_name):
-                    log.error("Function not found: %s:%s", func_name, argspec_len, extra={'stack': True})
+        funct, wrap_args = self._resolve(
+            calculator.namespace, func_name, argspec_len)
+        if wrap_args:
+            # DEVIATION: Fall back to single parameter
+            args = [List(args, use_comma=True)]
+        elif funct is None and not is_builtin_css_function(func_name):
+            log.error("Function not found: %s:%s", func_name, argspec_len, extra={'stack': True})
 
         if funct:
             if getattr(funct, '_pyscss_needs_namespace', False):
@@ -230,20 +493,76 @@ class CallOp(Expression):
                 ret = funct(*args, **kwargs)
             if not isinstance(ret, Value):
                 raise TypeError("Expected Sass type as return value, got %r" % (ret,))
-            return ret
-
-        # No matching function found, so render the computed values as a CSS
-        # function call.  Slurpy arguments are expanded and named arguments are
-        # unsupported.
-        if kwargs:
-            raise TypeError("The CSS function %s doesn't support keyword arguments." % (func_name,))
-
-        # TODO another candidate for a "function call" sass type
-        rendered_args = [arg.render() for arg in args]
+            pure = getattr(funct, '_pyscss_pure', False)
+        else:
+            # No matching function found, so render the computed values as a
+            # CSS function call.  Slurpy arguments are expanded and named
+            # arguments are unsupported.
+            if kwargs:
+                raise TypeError("The CSS function %s doesn't support keyword arguments." % (func_name,))
+
+            # TODO another candidate for a "function call" sass type
+            rendered_args = [arg.render() for arg in args]
+
+            ret = String(
+                "%s(%s)" % (func_name, ", ".join(rendered_args)),
+                quotes=None)
+            # Unless it logged an error above
+            pure = is_builtin_css_function(func_name)
+
+        if pure and self.argspec.constant:
+            self._folded = argspec_len, _weak_ref(funct), wrap_args, ret
+        return ret
+
+    def _compile(self):
+        argspec = self.argspec
+        names = []
+        for var_node, value_node in argspec.argpairs:
+            if var_node is None:
+                names.append(None)
+            elif isinstance(var_node, Variable):
+                names.append(var_node.name)
+            else:
+                # Let evaluating it complain
+                return self.evaluate
+        py_names = [
+            None if name is None else name.lstrip('$').replace('-', '_')
+            for name in names]
+        named = set(names) - set([None])
+        if len(named) != len(set(py_names) - set([None])):
+            # Distinct names that are the same Python identifier; the order
+            # they win in is easier left to `evaluate`
+            return self.evaluate
 
-        return String(
-            "%s(%s)" % (func_name, ", ".join(rendered_args)),
-            quotes=None)
+        func_name = normalize_var(self.func_name)
+        arguments = [
+            (py_name, value_node.compile())
+            for py_name, (var_node, value_node)
+            in zip(py_names, argspec.argpairs)]
+        slurp = None if argspec.slurp is None else argspec.slurp.compile()
+        num_named = len(named)
+        folded_result = self._folded_result
+        call = self._call
+
+        def evaluate(calculator, divide=False):
+            ret = folded_result(calculator.namespace, func_name)
+            if ret is not None:
+                return ret
+
+            args = []
+            kwargs = {}
+            for py_name, argument in arguments:
+                value = argument(calculator, True)
+                if py_name is None:
+                    args.append(value)
+                else:
+                    kwargs[py_name] = value
+            if slurp is not None:
+                args.extend(slurp(calculator, True))
+
+            return call(
+                calculator, func_name, args, kwargs, len(args) + num_named)
+        return evaluate
 
 
 # TODO this class should delegate the unescaping to the type, rather than
@@ -285,6 +604,9 @@ class Interpolation(Expression):
         return Literal(type(parts[0], quotes=quotes, **kwargs))
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
+
         result = []
         for i, part in enumerate(self.parts):
             if i % 2 == 0:
@@ -298,6 +620,32 @@ class Interpolation(Expression):
 
         return self.type(''.join(result), quotes=self.quotes, **self.kwargs)
 
+    def fold(self, divide=None):
+        values = [part.fold(divide) for part in self.parts[1::2]]
+        if any(value is None for value in values):
+            return None
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        nodes = [part.compile() for part in self.parts[1::2]]
+        # The string after each node; there's one before the first, too
+        strings = list(self.parts[0::2])
+        strings.extend([''] * (len(nodes) + 1 - len(strings)))
+        first = strings[0]
+        pieces = list(zip(nodes, strings[1:]))
+        type_ = self.type
+        quotes = self.quotes
+        kwargs = self.kwargs
+
+        def evaluate(calculator, divide=False):
+            result = [first]
+            for node, string in pieces:
+                # TODO need to know whether to pass `compress` here
+                result.append(node(calculator, divide).render_interpolated())
+                result.append(string)
+            return type_(''.join(result), quotes=quotes, **kwargs)
+        return evaluate
+
 
 
 class Literal(Expression):
@@ -331,6 +679,17 @@ class Literal(Expression):
 
         return self.value
 
+    def fold(self, divide=None):
+        # Whether undefined is an error depends on the calculator
+        if isinstance(self.value, Undefined):
+            return None
+        return self.value
+
+    def _compile(self):
+        if isinstance(self.value, Undefined):
+            return self.evaluate
+        return _constant_function(self.value)
+
 
 class Variable(Expression):
     def __repr__(self):
@@ -343,22 +702,44 @@ class Variable(Expression):
         try:
             value = calculator.namespace.variable(self.name)
         except KeyError:
-            if calculator.undefined_variables_fatal:
-                raise SyntaxError("Undefined variable: '%s'." % self.name)
-            else:
-                log.error("Undefined variable '%s'", self.name, extra={'stack': True})
-                return Undefined()
+            return self._undefined(calculator)
+        else:
+            if isinstance(value, six.string_types):
+                return self._evaluate_string(calculator, value)
+            return value
+
+    def _undefined(self, calculator):
+        if calculator.undefined_variables_fatal:
+            raise SyntaxError("Undefined variable: '%s'." % self.name)
         else:
+            log.error("Undefined variable '%s'", self.name, extra={'stack': True})
+            return Undefined()
+
+    def _evaluate_string(self, calculator, value):
+        log.warn(
+            "Expected a Sass type for the value of {0}, "
+            "but found a string expression: {1!r}"
+            .format(self.name, value)
+        )
+        evald = calculator.evaluate_expression(value)
+        if evald is not None:
+            return evald
+        return value
+
+    def _compile(self):
+        name = normalize_var(self.name)
+        undefined = self._undefined
+        evaluate_string = self._evaluate_string
+
+        def evaluate(calculator, divide=False):
+            try:
+                value = calculator.namespace._variables[name]
+            except KeyError:
+                return undefined(calculator)
             if isinstance(value, six.string_types):
-                log.warn(
-                    "Expected a Sass type for the value of {0}, "
-                    "but found a string expression: {1!r}"
-                    .format(self.name, value)
-                )
-                evald = calculator.evaluate_expression(value)
-                if evald is not None:
-                    return evald
+                return evaluate_string(calculator, value)
             return value
+        return evaluate
 
 
 class ListLiteral(Expression):
@@ -370,6 +751,9 @@ class ListLiteral(Expression):
         self.comma = comma
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
+
         items = [item.evaluate(calculator, divide=divide) for item in self.items]
 
         # Whether this is a "plain" literal matters for null removal: nulls are
@@ -383,6 +767,29 @@ class ListLiteral(Expression):
 
         return List(items, use_comma=self.comma, literal=literal)
 
+    def fold(self, divide=None):
+        values = [item.fold(divide) for item in self.items]
+        if any(value is None for value in values):
+            return None
+
+        # Whether a list of literals is "plain" depends on where it appears
+        if divide is None and all(isinstance(item, Literal) for item in self.items):
+            return None
+
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        items = [item.compile() for item in self.items]
+        all_literal = all(isinstance(item, Literal) for item in self.items)
+        use_comma = self.comma
+
+        def evaluate(calculator, divide=False):
+            return List(
+                [item(calculator, divide) for item in items],
+                use_comma=use_comma,
+                literal=all_literal and not divide)
+        return evaluate
+
 
 class MapLiteral(Expression):
     def __repr__(self):
@@ -392,6 +799,9 @@ class MapLiteral(Expression):
         self.pairs = tuple((var, value) for var, value in pairs if value is not None)
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
+
         scss_pairs = []
         for key, value in self.pairs:
             scss_pairs.append((
@@ -401,6 +811,21 @@ class MapLiteral(Expression):
 
         return Map(scss_pairs)
 
+    def fold(self, divide=None):
+        values = [node.fold(False) for pair in self.pairs for node in pair]
+        if any(value is None for value in values):
+            return None
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        pairs = [(key.compile(), value.compile()) for key, value in self.pairs]
+
+        def evaluate(calculator, divide=False):
+            return Map([
+                (key(calculator, False), value(calculator, False))
+                for key, value in pairs])
+        return evaluate
+
 
 class ArgspecLiteral(Expression):
     """Contains pairs of argument names and values, as parsed from a function
@@ -435,6 +860,19 @@ class ArgspecLiteral(Expression):
             self.inject = False
             self.slurp = None
 
+        # Whether every argument is constant, as found by `fold`
+        self.constant = False
+
+    def fold(self, divide=None):
+        # Arguments are always evaluated as though they were in parentheses
+        constant = self.slurp is None
+        for var_node, value_node in self.argpairs:
+            if value_node.fold(True) is None:
+                constant = False
+
+        self.constant = constant
+        return None
+
     def iter_list_argspec(self):
         yield None, ListLiteral(zip(*self.argpairs)[1])
 
@@ -499,8 +937,18 @@ class FunctionLiteral(Expression):
         self.child = child
         self.function_name = function_name
 
+    def fold(self, divide=None):
+        if self.child.fold(divide) is None:
+            return None
+        return self._fold_constant(divide)
+
     def evaluate(self, calculator, divide=False):
-        child = self.child.evaluate(calculator, divide)
+        if self._constant is not None:
+            return self._constant
+
+        return self._wrap(self.child.evaluate(calculator, divide))
+
+    def _wrap(self, child):
         if isinstance(child, String):
             contents = child.value
             quotes = child.quotes
@@ -517,6 +965,14 @@ class FunctionLiteral(Expression):
         else:
             return Function(contents, self.function_name, quotes=quotes)
 
+    def _compile(self):
+        child = self.child.compile()
+        wrap = self._wrap
+
+        def evaluate(calculator, divide=False):
+            return wrap(child(calculator, divide))
+        return evaluate
+
 
 class AlphaFunctionLiteral(Expression):
     """Wraps an existing AST node in a literal (unevaluated) function call,
@@ -525,8 +981,18 @@ class AlphaFunctionLiteral(Expression):
     def __init__(self, child):
         self.child = child
 
+    def fold(self, divide=None):
+        if self.child.fold(divide) is None:
+            return None
+        return self._fold_constant(divide)
+
     def evaluate(self, calculator, divide=False):
-        child = self.child.evaluate(calculator, divide)
+        if self._constant is not None:
+            return self._constant
+
+        return self._wrap(self.child.evaluate(calculator, divide))
+
+    def _wrap(self, child):
         if isinstance(child, String):
             contents = child.value
         else:
@@ -534,6 +1000,14 @@ class AlphaFunctionLiteral(Expression):
             contents = child.render()
         return Function('opacity=' + contents, 'alpha', quotes=None)
 
+    def _compile(self):
+        child = self.child.compile()
+        wrap = self._wrap
+
+        def evaluate(calculator, divide=False):
+            return wrap(child(calculator, divide))
+        return evaluate
+
 
 class TernaryOp(Expression):
     """Sass implements this with a function:
@@ -559,7 +1033,32 @@ class TernaryOp(Expression):
         self.condition, self.true_expression, self.false_expression = args
 
     def evaluate(self, calculator, divide=False):
+        if self._constant is not None:
+            return self._constant
+
         if self.condition.evaluate(calculator, divide=True):
             return self.true_expression.evaluate(calculator, divide=True)
         else:
             return self.false_expression.evaluate(calculator, divide=True)
+
+    def fold(self, divide=None):
+        condition = self.condition.fold(True)
+        true_value = self.true_expression.fold(True)
+        false_value = self.false_expression.fold(True)
+        if condition is None:
+            return None
+        if (true_value if condition else false_value) is None:
+            return None
+        return self._fold_constant(divide)
+
+    def _compile(self):
+        condition = self.condition.compile()
+        true_expression = self.true_expression.compile()
+        false_expression = self.false_expression.compile()
+
+        def evaluate(calculator, divide=False):
+            if condition(calculator, True):
+                return true_expression(calculator, True)
+            else:
+                return false_expression(calculator, True)
+        return evaluate
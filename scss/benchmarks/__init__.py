@@ -0,0 +1,365 @@
+"""Benchmarks for the compiler, timing each phase of a compilation separately.
+
+Run with ``python -m scss.benchmarks``; see ``--help`` for options.  Results
+are written as JSON, and a previous run can be passed as ``--baseline`` to
+report any benchmarks that have gotten slower since.
+
+The phases are:
+
+``parse``
+    Preparing the source and parsing it into blocks.
+``evaluate``
+    Running the parsed source, producing a flat list of rules.
+``extend``
+    Applying ``@extend``.
+``css``
+    Rendering the rules as CSS.
+
+With ``--expressions``, nothing is compiled; instead every expression the
+inputs contain is parsed from scratch, once with each expression parser.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import logging
+from optparse import OptionParser
+import platform
+import sys
+import time
+import warnings
+
+import six
+
+from scss import config
+from scss.blockast import parse_nested
+from scss.calculator import Calculator
+from scss.calculator import _expression_parsers
+from scss.compiler import Compiler
+from scss.errors import SassBaseError
+from scss.errors import SassError
+from scss.extension.compass import CompassExtension
+from scss.extension.core import CoreExtension
+from scss.extension.extra import ExtraExtension
+from scss.scss_meta import VERSION
+from scss.util import LRUCache
+from scss.benchmarks.inputs import corpus_inputs
+from scss.benchmarks.inputs import generated_inputs
+from scss.benchmarks.inputs import ruby_extend_inputs
+
+
+PHASES = ('parse', 'evaluate', 'extend', 'css')
+
+# perf_counter is only on Python 3.3+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+def time_phases(benchmark_input, compiler_options=None):
+    """Compile the given input once, from scratch, and return a dict of how
+    long each phase took, in seconds.
+
+    `compiler_options` are passed along to the `Compiler`, and override the
+    defaults used here.
+    """
+    options = dict(
+        search_path=benchmark_input.search_path,
+        extensions=[CoreExtension, ExtraExtension, CompassExtension],
+        output_style='expanded',
+        # A fresh expression cache each time, so every run does the same work
+        expression_cache=config.EXPRESSION_CACHE_SIZE,
+    )
+    options.update(compiler_options or {})
+    compiler = Compiler(**options)
+    timings = {}
+
+    start = _timer()
+    source = benchmark_input.load()
+    parse_nested(source.blocks)
+    timings['parse'] = _timer() - start
+
+    compilation = compiler.make_compilation()
+    compilation.add_source(source)
+
+    start = _timer()
+    compilation.evaluate()
+    timings['evaluate'] = _timer() - start
+
+    start = _timer()
+    rules = compilation.apply_extends(compilation.rules)
+    timings['extend'] = _timer() - start
+
+    start = _timer()
+    compilation.create_css(rules)
+    timings['css'] = _timer() - start
+
+    return timings
+
+
+def run_benchmark(benchmark_input, repeat=5, compiler_options=None):
+    """Time the given input `repeat` times, and return the best time for each
+    phase, plus the best total.  If compiling fails, return a dict with only
+    an ``error`` key.
+    """
+    best = dict((phase, None) for phase in PHASES)
+    best_total = None
+    for _ in range(repeat):
+        try:
+            timings = time_phases(benchmark_input, compiler_options)
+        except SassError as e:
+            return {'error': e.format_original_error().strip()}
+        except (SassBaseError, IOError, OSError, SyntaxError, ValueError) as e:
+            # SyntaxError comes from parsing the blocks, which is timed before
+            # the compiler gets to wrap it; ValueError from selectors @extend
+            # can't handle yet
+            return {'error': six.text_type(e).strip().split('\n')[0]}
+
+        for phase in PHASES:
+            if best[phase] is None or timings[phase] < best[phase]:
+                best[phase] = timings[phase]
+        total = sum(timings.values())
+        if best_total is None or total < best_total:
+            best_total = total
+
+    best['total'] = best_total
+    return best
+
+
+def run_benchmarks(inputs, repeat=5, progress=None, compiler_options=None):
+    """Benchmark every input, and return the results as a dict suitable for
+    writing out as JSON.
+
+    `progress` may be a function, called with each input's name and results
+    as they finish.
+    """
+    # Parsed sources shouldn't come from the disk cache
+    old_cache_root = config.CACHE_ROOT
+    config.CACHE_ROOT = None
+    try:
+        results = {}
+        for benchmark_input in inputs:
+            results[benchmark_input.name] = result = run_benchmark(
+                benchmark_input, repeat, compiler_options)
+            if progress is not None:
+                progress(benchmark_input.name, result)
+    finally:
+        config.CACHE_ROOT = old_cache_root
+
+    return {
+        'version': VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'repeat': repeat,
+        'compiler_options': compiler_options or {},
+        'timestamp': int(time.time()),
+        'results': results,
+    }
+
+
+class _RecordingCache(LRUCache):
+    """Expression cache that remembers every key it's given, in order."""
+    def __init__(self):
+        super(_RecordingCache, self).__init__()
+        self.keys = []
+
+    def set(self, key, value):
+        if key not in self:
+            self.keys.append(key)
+        super(_RecordingCache, self).set(key, value)
+
+
+def collect_expressions(inputs, compiler_options=None):
+    """Compile each input once, and return a list of every distinct
+    ``(target, expression)`` parsed along the way, as passed to
+    `Calculator.parse_expression`.  Inputs that fail to compile contribute
+    whatever was parsed before the error.
+    """
+    cache = _RecordingCache()
+    old_cache_root = config.CACHE_ROOT
+    config.CACHE_ROOT = None
+    try:
+        for benchmark_input in inputs:
+            options = dict(compiler_options or {}, expression_cache=cache)
+            try:
+                time_phases(benchmark_input, options)
+            except (SassBaseError, IOError, OSError, SyntaxError, ValueError):
+                pass
+    finally:
+        config.CACHE_ROOT = old_cache_root
+    return cache.keys
+
+
+def time_expression_parsing(expressions, expression_parser, repeat=5):
+    """Parse every expression from `collect_expressions` with an empty cache,
+    `repeat` times, and return the best time in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        calculator = Calculator(
+            ast_cache=LRUCache(), expression_parser=expression_parser)
+        start = _timer()
+        for target, expr in expressions:
+            try:
+                calculator.parse_expression(expr, target)
+            except SassBaseError:
+                pass
+        elapsed = _timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run_expression_benchmarks(inputs, repeat=5, progress=None):
+    """Time parsing the expressions from `inputs` with each expression
+    parser, and return the results in the same form as `run_benchmarks`, as
+    ``expressions/<parser>``.
+    """
+    expressions = collect_expressions(inputs)
+    expression_parsers = sorted(_expression_parsers)
+    best = dict.fromkeys(expression_parsers)
+    # Take turns, so anything else slowing the machine down affects every
+    # parser alike
+    for _ in range(repeat):
+        for expression_parser in expression_parsers:
+            elapsed = time_expression_parsing(
+                expressions, expression_parser, repeat=1)
+            previous = best[expression_parser]
+            if previous is None or elapsed < previous:
+                best[expression_parser] = elapsed
+
+    results = {}
+    for expression_parser in expression_parsers:
+        name = 'expressions/' + expression_parser
+        results[name] = result = {
+            'parse': best[expression_parser],
+            'total': best[expression_parser],
+            'count': len(expressions),
+        }
+        if progress is not None:
+            progress(name, result)
+
+    return {
+        'version': VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'repeat': repeat,
+        'compiler_options': {},
+        'timestamp': int(time.time()),
+        'results': results,
+    }
+
+
+def compare_results(baseline, current, threshold=0.1):
+    """Compare two sets of results from `run_benchmarks`.
+
+    Returns a list of ``(name, baseline_time, current_time)`` for every
+    benchmark whose total time grew by more than `threshold` (as a fraction),
+    in name order.
+    """
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        old_result = baseline['results'].get(name)
+        if old_result is None or 'error' in old_result or 'error' in result:
+            continue
+        old_time = old_result['total']
+        new_time = result['total']
+        if old_time and new_time > old_time * (1 + threshold):
+            regressions.append((name, old_time, new_time))
+    return regressions
+
+
+def _format_result(name, result):
+    if 'error' in result:
+        return "{0}: error: {1}".format(name, result['error'])
+    return "{0}: {1}".format(name, "  ".join(
+        "{0} {1:.2f}ms".format(phase, result[phase] * 1000)
+        for phase in PHASES + ('total',) if phase in result))
+
+
+def main():
+    parser = OptionParser(
+        usage="Usage: %prog [options]",
+        description="Time each phase of compiling the test corpus and some "
+        "generated stylesheets, and write the results as JSON.",
+        add_help_option=True,
+    )
+    parser.add_option("-o", "--output", metavar="PATH",
+                      help="Write JSON results to PATH, instead of stdout")
+    parser.add_option("-n", "--repeat", metavar="N", type="int", default=5,
+                      help="Compile each input N times and keep the best time (default 5)")
+    parser.add_option("-k", "--filter", metavar="TEXT",
+                      help="Only run benchmarks whose names contain TEXT")
+    parser.add_option("--scale", metavar="N", type="int", default=1000,
+                      help="Size of the generated inputs (default 1000)")
+    parser.add_option("--no-corpus", action="store_false", dest="corpus", default=True,
+                      help="Skip the files and @extend cases from the test suite")
+    parser.add_option("--no-generated", action="store_false", dest="generated", default=True,
+                      help="Skip the generated inputs")
+    parser.add_option("-b", "--baseline", metavar="PATH",
+                      help="Compare against the JSON results in PATH, and exit with an error if anything got slower")
+    parser.add_option("--threshold", metavar="FRACTION", type="float", default=0.1,
+                      help="How much slower a benchmark may get before it counts as a regression (default 0.1)")
+    parser.add_option("--compile-expressions", action="store_true", default=False,
+                      help="Compile with compiled expressions (see the Compiler option of the same name)")
+    parser.add_option("--expression-parser", metavar="NAME", choices=("yapps", "pratt"), default="yapps",
+                      help="Parse expressions with NAME, 'yapps' or 'pratt' (see the Compiler option of the same name)")
+    parser.add_option("--expressions", action="store_true", default=False,
+                      help="Instead of compiling, time parsing every expression in the inputs from scratch, with each expression parser")
+    parser.add_option("-q", "--quiet", action="store_true",
+                      help="Don't print each result as it finishes")
+
+    options, args = parser.parse_args()
+
+    # Warnings from the corpus aren't interesting here
+    logging.getLogger('scss').setLevel(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+
+    inputs = []
+    if options.corpus:
+        inputs.extend(corpus_inputs())
+        inputs.extend(ruby_extend_inputs())
+    if options.generated:
+        inputs.extend(generated_inputs(options.scale))
+    if options.filter:
+        inputs = [i for i in inputs if options.filter in i.name]
+
+    def progress(name, result):
+        sys.stderr.write(_format_result(name, result) + "\n")
+
+    if options.expressions:
+        results = run_expression_benchmarks(
+            inputs, options.repeat,
+            progress=None if options.quiet else progress)
+    else:
+        results = run_benchmarks(
+            inputs, options.repeat,
+            progress=None if options.quiet else progress,
+            compiler_options=dict(
+                compile_expressions=options.compile_expressions,
+                expression_parser=options.expression_parser))
+
+    serialized = json.dumps(results, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(serialized + "\n")
+    else:
+        print(serialized)
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, options.threshold)
+        for name, old_time, new_time in regressions:
+            sys.stderr.write(
+                "REGRESSION: {0}: {1:.2f}ms -> {2:.2f}ms ({3:+.0%})\n".format(
+                    name, old_time * 1000, new_time * 1000,
+                    new_time / old_time - 1))
+        if regressions:
+            sys.exit(1)
+
+
+__all__ = (
+    'collect_expressions', 'compare_results', 'run_benchmark',
+    'run_benchmarks', 'run_expression_benchmarks', 'time_expression_parsing',
+    'time_phases')
@@ -0,0 +1,3 @@
+import scss.benchmarks
+
+scss.benchmarks.main()
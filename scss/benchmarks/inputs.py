@@ -0,0 +1,296 @@
+"""Inputs for the benchmarks: the test suite's corpus of .scss files, plus a
+few large generated stylesheets that stress particular parts of the compiler.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ast
+import os
+from pathlib import Path
+import warnings
+
+import six
+
+from scss.cssdefs import determine_encoding
+from scss.source import SourceFile
+
+
+CORPUS_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'tests', 'files')
+
+# Directories under the corpus that are skipped: the Ruby and sassc imports
+# mostly fail, and the rest need optional dependencies to do anything useful
+SKIPPED_CORPUS_DIRECTORIES = frozenset((
+    'from_ruby', 'from-sassc', 'fonts', 'images', 'cursors',
+))
+
+# The Ruby test suite's @extend cases, which are inline in Python
+RUBY_EXTEND_TESTS = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    'tests', 'from_ruby', 'test_extend.py')
+
+
+class BenchmarkInput(object):
+    """A single stylesheet to benchmark.
+
+    `load` produces a fresh :class:`scss.source.SourceFile` each time it's
+    called, without touching the disk, so that reading files isn't counted as
+    part of parsing.
+    """
+    def __init__(self, name, contents, origin=None, relpath=None):
+        self.name = name
+        self.contents = contents
+        self.origin = origin
+        self.relpath = relpath
+
+    def __repr__(self):
+        return "<{0} {1!r}>".format(type(self).__name__, self.name)
+
+    @classmethod
+    def from_path(cls, name, path):
+        with path.open('rb') as f:
+            contents = f.read()
+        contents = contents.decode(determine_encoding(contents))
+        return cls(name, contents, path.parent.resolve(), Path(path.name))
+
+    @property
+    def search_path(self):
+        """Directories to search for ``@import``s, as the test suite does."""
+        if self.origin is None:
+            return []
+
+        search_path = []
+        include = self.origin / 'include'
+        if include.exists():
+            search_path.append(include)
+        search_path.append(self.origin)
+        return search_path
+
+    def load(self):
+        if self.origin is None:
+            return SourceFile.from_string(self.contents, relpath=self.name)
+        return SourceFile(self.origin, self.relpath, self.contents)
+
+
+def corpus_inputs(root=CORPUS_ROOT):
+    """Yield a :class:`BenchmarkInput` for every .scss file in the test
+    corpus, in a stable order.  Yields nothing if the corpus isn't installed.
+    """
+    if not os.path.isdir(root):
+        return
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            name for name in dirnames
+            if name not in SKIPPED_CORPUS_DIRECTORIES and name != 'include')
+        for filename in sorted(filenames):
+            if not filename.endswith('.scss') or filename.startswith('_'):
+                continue
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            yield BenchmarkInput.from_path(name, Path(path))
+
+
+# How each helper in the Ruby @extend tests builds its input, from the
+# helper's (literal) arguments; these mirror the helpers themselves
+RUBY_EXTEND_HELPERS = {
+    'assert_rendering': lambda source, expected: source,
+    'assert_extends': lambda selector, extension, result: (
+        "{0} {{a: b}}\n{1}\n".format(selector, extension)),
+    'assert_unification': lambda selector, extension, unified: (
+        "%-a {0} {{a: b}}\n{1} -a {{@extend %-a}}\n".format(
+            selector, extension)),
+}
+
+
+def ruby_extend_inputs(path=RUBY_EXTEND_TESTS):
+    """Yield a :class:`BenchmarkInput` for every case in the Ruby ``@extend``
+    tests, named after the test function.  Yields nothing if the tests aren't
+    installed.
+    """
+    if not os.path.isfile(path):
+        return
+
+    with open(path, 'rb') as f:
+        with warnings.catch_warnings():
+            # The tests' CSS escapes look like bad string escapes to Python
+            warnings.simplefilter('ignore')
+            tree = ast.parse(f.read(), path)
+
+    for function in tree.body:
+        if not isinstance(function, ast.FunctionDef):
+            continue
+        if not function.name.startswith('test_'):
+            continue
+
+        count = 0
+        for node in ast.walk(function):
+            if not (
+                    isinstance(node, ast.Call) and
+                    isinstance(node.func, ast.Name) and
+                    node.func.id in RUBY_EXTEND_HELPERS):
+                continue
+            try:
+                args = [ast.literal_eval(arg) for arg in node.args]
+                source = RUBY_EXTEND_HELPERS[node.func.id](*args)
+            except (ValueError, TypeError):
+                # Not built from literals
+                continue
+
+            count += 1
+            yield BenchmarkInput(
+                "from_ruby/test_extend/{0}-{1}".format(function.name, count),
+                six.text_type(source))
+
+
+def nested_rules(scale):
+    """Deeply nested rulesets with plain properties."""
+    lines = []
+    for i in range(scale):
+        lines.append(".block-{0} {{".format(i))
+        lines.append("    color: #{0:06x};".format(i * 997 % 0xffffff))
+        lines.append("    .element, .other-element {")
+        lines.append("        margin: {0}px auto;".format(i % 40))
+        lines.append("        &:hover > a { text-decoration: underline; }")
+        lines.append("        .modifier {{ padding: 0 {0}em; }}".format(i % 7))
+        lines.append("    }")
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def deep_nesting(scale):
+    """BEM-style components, each nested ten levels deep."""
+    lines = []
+    for i in range(scale // 10 or 1):
+        lines.append(".block-{0} {{".format(i))
+        for depth in range(1, 10):
+            indent = "    " * depth
+            lines.append("{0}color: #{1:06x};".format(indent, (i + depth) * 997 % 0xffffff))
+            lines.append("{0}&__element-{1} {{".format(indent, depth))
+        lines.append("    " * 10 + "margin: {0}px;".format(i % 40))
+        for depth in range(9, -1, -1):
+            lines.append("    " * depth + "}")
+    return "\n".join(lines) + "\n"
+
+
+def mixins(scale):
+    """Many ``@include``s of mixins with arguments and arithmetic."""
+    lines = [
+        "@mixin box($width, $pad: 4px) {",
+        "    width: $width - $pad * 2;",
+        "    padding: $pad;",
+        "    border: 1px solid darken(#808080, $pad / 1px);",
+        "}",
+        "@mixin button($size) {",
+        "    @include box($size * 10, $size);",
+        "    font-size: $size * 1.5;",
+        "}",
+    ]
+    for i in range(scale):
+        lines.append(".button-{0} {{ @include button({1}px); }}".format(
+            i, i % 12 + 1))
+    return "\n".join(lines) + "\n"
+
+
+def components(scale):
+    """The same mixins, full of nested selectors, included under the same
+    parents over and over.
+    """
+    lines = [
+        "@mixin card($pad) {",
+        "    padding: $pad;",
+        "    .card-header, .card-footer { margin: 0 $pad; }",
+        "    .card-body > p + p { margin-top: $pad / 2; }",
+        "    &:hover .card-title { text-decoration: underline; }",
+        "}",
+        "@mixin list {",
+        "    ul, ol { list-style: none; li { display: inline; } }",
+        "}",
+    ]
+    for i in range(scale):
+        lines.append(".panel .content {{ @include card({0}px); @include list; }}".format(
+            i % 5 + 1))
+    return "\n".join(lines) + "\n"
+
+
+def extends(scale):
+    """Lots of selectors extending a handful of placeholders."""
+    lines = []
+    for i in range(10):
+        lines.append("%base-{0} {{ color: red; .inner {{ margin: {0}px; }} }}".format(i))
+    for i in range(scale):
+        lines.append(".widget-{0} .part {{ @extend %base-{1}; width: {0}px; }}".format(
+            i, i % 10))
+    return "\n".join(lines) + "\n"
+
+
+def arithmetic(scale):
+    """Control flow and number-heavy expressions."""
+    return """\
+$columns: {0};
+$gutter: 20px;
+@for $i from 1 through $columns {{
+    .col-#{{$i}} {{
+        width: percentage($i / $columns);
+        margin-left: $gutter * ($i % 3) + 1px;
+        line-height: (1.5 * $i) / 2;
+    }}
+}}
+@each $name, $value in (small: 0.5, medium: 1, large: 2) {{
+    @for $i from 1 through {1} {{
+        .#{{$name}}-#{{$i}} {{ font-size: $value * $i * 1em; }}
+    }}
+}}
+""".format(scale, max(1, scale // 10))
+
+
+def constants(scale):
+    """Loops whose bodies are mostly constant expressions and calls to
+    built-in functions with literal arguments.
+    """
+    return """\
+@for $i from 1 through {0} {{
+    .item-#{{$i}} {{
+        color: lighten(#336699, 10%);
+        background: rgba(0, 0, 0, 0.5) mix(red, blue, 25%);
+        margin: 10px * 3 + 2px (1em + 2em) / 2;
+        width: percentage(1 / 3) + $i;
+    }}
+}}
+""".format(scale)
+
+
+def maps(scale):
+    """A map of design tokens built up one ``map-merge`` at a time, then read
+    back with ``map-get``.
+    """
+    return """\
+$tokens: ();
+@for $i from 1 through {0} {{
+    $tokens: map-merge($tokens, (token-#{{$i}}: $i * 1px));
+}}
+@for $i from 1 through {0} {{
+    .token-#{{$i}} {{ margin: map-get($tokens, token-#{{$i}}); }}
+}}
+""".format(scale)
+
+
+GENERATORS = (
+    ('generated/nested-rules', nested_rules),
+    ('generated/deep-nesting', deep_nesting),
+    ('generated/mixins', mixins),
+    ('generated/components', components),
+    ('generated/extends', extends),
+    ('generated/arithmetic', arithmetic),
+    ('generated/constants', constants),
+    ('generated/maps', maps),
+)
+
+
+def generated_inputs(scale=1000):
+    """Yield a :class:`BenchmarkInput` for each generated stylesheet, at the
+    given size.
+    """
+    for name, generator in GENERATORS:
+        yield BenchmarkInput(name, six.text_type(generator(scale)))
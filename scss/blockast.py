@@ -0,0 +1,218 @@
+"""Syntax tree for the block structure of a Sass file.
+
+Expressions have their own AST; see :mod:`scss.ast`.  This module covers the
+level above that: the sequence of rulesets, at-rules, and property
+declarations that make up the body of a file or block.
+
+A whole file is scanned by :func:`scss.grammar.locate_block_tree` in a single
+pass, however deeply its blocks are nested.  The resulting :class:`Block`
+nodes are immutable and may be shared freely, so a mixin or function body
+that's evaluated thousands of times is only ever parsed the first time.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from scss.cssdefs import COLOR_NAMES
+from scss.cssdefs import _interpolated_word_re
+from scss.cssdefs import _literal_value_re
+from scss.cssdefs import _prop_split_re
+from scss.cssdefs import _value_word_re
+from scss.grammar import locate_block_tree
+from scss.rule import BlockHeader
+from scss.types import Color
+from scss.util import LRUCache
+
+
+# Kinds of property declaration; see `classify_declaration`
+LITERAL = 'literal'
+INTERPOLATED = 'interpolated'
+EXPRESSION = 'expression'
+
+# Words that mean something other than themselves in a Sass expression
+_special_words = frozenset(('null', 'undefined', 'and', 'or', 'not'))
+
+# Whether each hex color seen is rendered as written; see `_is_literal_value`
+_literal_colors = LRUCache(10000)
+
+
+def _is_literal_value(value):
+    if not _literal_value_re.match(value):
+        return False
+
+    for token in value.split(' '):
+        if token.startswith('#'):
+            # Colors may be rendered differently when compressed
+            is_literal = _literal_colors.get(token)
+            if is_literal is None:
+                is_literal = (
+                    Color.from_hex(token).render(compress=True) == token)
+                _literal_colors.set(token, is_literal)
+            if not is_literal:
+                return False
+        elif token.lower() in COLOR_NAMES or token in _special_words:
+            return False
+    return True
+
+
+def _is_interpolated_value(value):
+    words = _value_word_re.findall(value)
+    if ' '.join(words) != value or value.count('#{') > 1:
+        return False
+
+    for word in words:
+        if '#{' in word:
+            match = _interpolated_word_re.match(word)
+            if not match or not _special_words.isdisjoint(
+                    match.group('prefix', 'suffix')):
+                return False
+        elif not _is_literal_value(word):
+            return False
+    return True
+
+
+def classify_declaration(prop):
+    """Work out how much evaluation the property declaration `prop` needs.
+
+    Returns a 3-tuple of the kind of declaration, the property name, and its
+    value.  The kind is one of:
+
+    - ``LITERAL``, if the value is plain CSS that Sass would output exactly as
+      written, like ``display: block``.
+    - ``INTERPOLATED``, if the value would be plain CSS but for a single
+      simple ``#{}`` interpolation, like ``width: #{$width}px``.
+    - ``EXPRESSION``, for anything else, including variable assignments.  Only
+      the kind is given; the name and value are None.
+    """
+    expression = EXPRESSION, None, None
+    name, _, value = prop.partition(':')
+    if not value or _prop_split_re.search(name):
+        return expression
+
+    name = name.strip()
+    value = value.strip()
+    if not name or '$' in name or '#{' in name:
+        return expression
+
+    if _is_literal_value(value):
+        return LITERAL, name, value
+
+    if '#{' in value and _is_interpolated_value(value):
+        return INTERPOLATED, name, value
+
+    return expression
+
+
+class Block(object):
+    """A single statement within the body of a file or block: a ruleset, an
+    at-rule, or a property declaration.
+
+    ``lineno`` is relative to the start of the enclosing body, since the same
+    node may be evaluated from several places (e.g., a mixin body, evaluated
+    at every ``@include``).  See :class:`scss.rule.UnparsedBlock` for the
+    per-evaluation view that knows its real position.
+
+    ``contents`` is a tuple of child nodes, or None if this statement has no
+    block at all (i.e., is a plain property).  Nodes from :func:`parse_blocks`
+    come with all their children; a node made directly from a string parses
+    its children on first access and then keeps them.
+
+    ``unparsed_contents`` is the text of the block, or None.  Nodes from
+    :func:`parse_blocks` only remember where it is in the source, and copy it
+    out the first time it's asked for.
+
+    ``declaration`` is what :func:`classify_declaration` made of a statement
+    with no block, or None if there is a block.
+    """
+    __slots__ = (
+        'lineno', 'prop', 'header', 'declaration', '_unparsed_contents',
+        '_source', '_span', '_contents')
+
+    def __init__(self, lineno, prop, unparsed_contents):
+        self.lineno = lineno
+        self.prop = prop
+        self.header = BlockHeader.parse(
+            prop, has_contents=bool(unparsed_contents))
+        if unparsed_contents is None:
+            self.declaration = classify_declaration(prop)
+        else:
+            self.declaration = None
+        self._unparsed_contents = unparsed_contents
+        self._source = None
+        self._span = None
+        self._contents = None
+
+    @classmethod
+    def _from_tree(cls, source, lineno, prop, body):
+        """Make a node from one of the items returned by
+        :func:`scss.grammar.locate_block_tree` for `source`.
+        """
+        self = cls.__new__(cls)
+        self.lineno = lineno
+        self.prop = prop
+        self._unparsed_contents = None
+        if body is None:
+            self.header = BlockHeader.parse(prop, has_contents=False)
+            self.declaration = classify_declaration(prop)
+            self._source = None
+            self._span = None
+            self._contents = None
+        else:
+            start, end, children = body
+            self.header = BlockHeader.parse(prop, has_contents=end > start)
+            self.declaration = None
+            self._source = source
+            self._span = start, end
+            self._contents = _blocks_from_tree(source, children)
+        return self
+
+    def __repr__(self):
+        return "<%s %r>" % (type(self).__name__, self.header)
+
+    @property
+    def unparsed_contents(self):
+        if self._unparsed_contents is None and self._span is not None:
+            start, end = self._span
+            self._unparsed_contents = self._source[start:end]
+        return self._unparsed_contents
+
+    @property
+    def contents(self):
+        if self._contents is None and self._unparsed_contents is not None:
+            self._contents = parse_blocks(self._unparsed_contents)
+        return self._contents
+
+
+def _blocks_from_tree(source, items):
+    return tuple(
+        Block._from_tree(source, lineno, prop, body)
+        for lineno, prop, body in items
+    )
+
+
+def parse_blocks(codestr):
+    """Parse the body of a file or block into a tuple of :class:`Block`
+    nodes, along with everything nested within them.
+    """
+    return _blocks_from_tree(codestr, locate_block_tree(codestr))
+
+
+def parse_nested(blocks):
+    """Force every nested body within the given nodes to be parsed, so the
+    whole tree can be stored at once.  Only nodes made directly from strings
+    have anything left to parse.  Bodies that fail to parse are left alone;
+    the compiler will report the error if it ever gets to them.
+    """
+    for block in blocks:
+        try:
+            contents = block.contents
+        except SyntaxError:
+            continue
+        if contents:
+            parse_nested(contents)
+
+
+__all__ = (
+    'Block', 'classify_declaration', 'parse_blocks', 'parse_nested',
+    'LITERAL', 'INTERPOLATED', 'EXPRESSION',
+)
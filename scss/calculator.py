@@ -4,40 +4,85 @@ from __future__ import unicode_literals
 
 import sys
 import logging
+import threading
 from warnings import warn
 
 import six
 
+from scss import config
 from scss.ast import Literal
 from scss.cssdefs import _expr_glob_re, _interpolate_re
 from scss.errors import SassError, SassEvaluationError, SassParseError
 from scss.grammar.expression import SassExpression, SassExpressionScanner
+from scss.grammar.pratt import PrattSassExpression
 from scss.rule import Namespace
 from scss.types import String
 from scss.types import Value
+from scss.util import LRUCache
 from scss.util import dequote
 
 
 log = logging.getLogger(__name__)
 
 
+# Parsers for Calculator's `expression_parser` option.  They produce the same
+# trees, so parsed expressions may be cached and shared between them.
+_expression_parsers = {
+    'yapps': SassExpression,
+    'pratt': PrattSassExpression,
+}
+
+
+class _SharedCache(object):
+    """The cache of parsed expressions shared by every calculator that isn't
+    given its own.  It's only made when first used, so that
+    ``config.EXPRESSION_CACHE_SIZE`` may be set after importing pyScss.
+    """
+    def __init__(self):
+        self.cache = None
+        self._lock = threading.Lock()
+
+    def __get__(self, calculator, cls):
+        cache = self.cache
+        if cache is None:
+            with self._lock:
+                if self.cache is None:
+                    self.cache = LRUCache(config.EXPRESSION_CACHE_SIZE)
+                cache = self.cache
+        return cache
+
+
 class Calculator(object):
     """Expression evaluator."""
 
-    ast_cache = {}
+    # Parsed expressions, shared by every calculator that isn't given its own
+    ast_cache = _SharedCache()
 
     def __init__(
             self, namespace=None,
             ignore_parse_errors=False,
             undefined_variables_fatal=True,
+            ast_cache=None,
+            compile_expressions=False,
+            expression_parser='yapps',
             ):
         if namespace is None:
             self.namespace = Namespace()
         else:
             self.namespace = namespace
 
+        if ast_cache is not None:
+            self.ast_cache = ast_cache
+
         self.ignore_parse_errors = ignore_parse_errors
         self.undefined_variables_fatal = undefined_variables_fatal
+        # Whether to evaluate with compiled expressions; see
+        # `Expression.compile`
+        self.compile_expressions = compile_expressions
+        if expression_parser not in _expression_parsers:
+            raise ValueError(
+                "Unknown expression parser: {0!r}".format(expression_parser))
+        self.expression_parser = expression_parser
 
     def _pound_substitute(self, result):
         expr = result.group(1)
@@ -138,6 +183,8 @@ class Calculator(object):
             raise
 
         try:
+            if self.compile_expressions:
+                return ast.compiled()(self, divide)
             return ast.evaluate(self, divide=divide)
         except Exception as e:
             six.reraise(SassEvaluationError, SassEvaluationError(e, expression=expr), sys.exc_info()[2])
@@ -159,16 +206,21 @@ class Calculator(object):
             raise TypeError("Expected string, got %r" % (expr,))
 
         key = (target, expr)
-        if key in self.ast_cache:
-            return self.ast_cache[key]
+        ast = self.ast_cache.get(key)
+        if ast is not None:
+            return ast
 
         try:
-            parser = SassExpression(SassExpressionScanner(expr))
+            parser_class = _expression_parsers[self.expression_parser]
+            parser = parser_class(SassExpressionScanner(expr))
             ast = getattr(parser, target)()
         except SyntaxError as e:
             raise SassParseError(e, expression=expr, expression_pos=parser._char_pos)
 
-        self.ast_cache[key] = ast
+        # Cached trees are evaluated over and over, so work out anything
+        # constant in them once now
+        ast.fold()
+        self.ast_cache.set(key, ast)
         return ast
 
     def parse_interpolations(self, string):
@@ -181,6 +233,24 @@ class Calculator(object):
             return Literal(String.unquoted(string))
         return self.parse_expression(string, 'goal_interpolated_literal')
 
+    def evaluate_interpolations(self, string):
+        """Evaluate the interpolations in a string, treating everything else
+        as literal text.  Errors are reported as with `evaluate_expression`.
+        """
+        try:
+            ast = self.parse_interpolations(string)
+        except SassError as e:
+            if self.ignore_parse_errors:
+                return None
+            raise
+
+        try:
+            if self.compile_expressions:
+                return ast.compiled()(self, False)
+            return ast.evaluate(self)
+        except Exception as e:
+            six.reraise(SassEvaluationError, SassEvaluationError(e, expression=string), sys.exc_info()[2])
+
     def parse_vars_and_interpolations(self, string):
         """Parse a string for variables and interpolations, but don't treat
         anything else as Sass syntax.  Returns an AST node.
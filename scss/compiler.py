@@ -19,6 +19,10 @@ except ImportError:
 
 import six
 
+from scss import config
+from scss.blockast import EXPRESSION
+from scss.blockast import INTERPOLATED
+from scss.blockast import LITERAL
 from scss.calculator import Calculator
 from scss.cssdefs import _spaces_re
 from scss.cssdefs import _escape_chars_re
@@ -26,10 +30,11 @@ from scss.cssdefs import _prop_split_re
 from scss.errors import SassError
 from scss.errors import SassBaseError
 from scss.errors import SassImportError
+from scss.extend import ExtendLimitExceeded
+from scss.extend import Extender
 from scss.extension import Extension
 from scss.extension.core import CoreExtension
 from scss.extension import NamespaceAdapterExtension
-from scss.grammar import locate_blocks
 from scss.rule import BlockAtRuleHeader
 from scss.rule import Namespace
 from scss.rule import RuleAncestry
@@ -37,6 +42,8 @@ from scss.rule import SassRule
 from scss.rule import UnparsedBlock
 from scss.selector import Selector
 from scss.source import SourceFile
+from scss.sourcemap import SourceMap
+from scss.stats import CompilationStats
 from scss.types import Arglist
 from scss.types import List
 from scss.types import Null
@@ -44,6 +51,7 @@ from scss.types import Number
 from scss.types import String
 from scss.types import Undefined
 from scss.types import Url
+from scss.util import LRUCache
 from scss.util import normalize_var  # TODO put in...  namespace maybe?
 
 
@@ -93,6 +101,10 @@ class Compiler(object):
             loops_have_own_scopes=True,
             undefined_variables_fatal=True,
             super_selector='',
+            expression_cache=None,
+            collect_stats=False,
+            compile_expressions=False,
+            expression_parser='yapps',
             ):
         """Configure a compiler.
 
@@ -107,6 +119,29 @@ class Compiler(object):
         :type search_path: list of strings, :class:`pathlib.Path` objects, or
             something that implements a similar interface (useful for custom
             pseudo filesystems)
+        :param generate_source_map: How to record where each rule in the
+            output came from.  ``'map'`` collects a Source Map v3, available
+            afterwards as the compilation's ``source_map``.  ``'comments'``
+            writes a comment before each rule, and any other true value writes
+            the ``@media -sass-debug-info`` blocks understood by FireSass.
+        :param expression_cache: Cache of parsed expressions to use for this
+            compiler's compilations, or the maximum number of expressions to
+            keep in a new one.  Defaults to a cache shared by the whole
+            process, sized by ``scss.config.EXPRESSION_CACHE_SIZE`` as it
+            is when the shared cache is first used.
+        :type expression_cache: :class:`scss.util.LRUCache` or int
+        :param collect_stats: Record timings and counts for each phase,
+            directive, and mixin, available afterwards as the compilation's
+            ``stats``.  Off by default, since it slows compilation down.
+        :param compile_expressions: Turn each parsed expression into a tree of
+            Python closures the first time it's evaluated, and call those
+            instead of walking the expression tree.  Gives the same results,
+            and is faster for stylesheets that evaluate the same expressions
+            many times, like loops and mixins; off by default.
+        :param expression_parser: Which parser to use for expressions:
+            ``'yapps'``, the default, generated from the grammar; or
+            ``'pratt'``, a hand-written parser that builds the same trees with
+            fewer calls, and so parses faster.
         """
         # TODO perhaps polite to automatically cast any string paths to Path?
         # but have to be careful since the api explicitly allows dummy objects.
@@ -153,6 +188,12 @@ class Compiler(object):
         self.loops_have_own_scopes = loops_have_own_scopes
         self.undefined_variables_fatal = undefined_variables_fatal
         self.super_selector = super_selector
+        if isinstance(expression_cache, six.integer_types):
+            expression_cache = LRUCache(expression_cache)
+        self.expression_cache = expression_cache
+        self.collect_stats = collect_stats
+        self.compile_expressions = compile_expressions
+        self.expression_parser = expression_parser
 
     def normalize_path(self, path):
         if isinstance(path, six.string_types):
@@ -182,9 +223,13 @@ class Compiler(object):
                 raise
 
     def compile(self, *filenames):
-        # TODO this doesn't spit out the compilation itself, so if you want to
-        # get something out besides just the output, you have to copy this
-        # method.  that sucks.
+        return self.run_compilation(*filenames).output
+
+    def run_compilation(self, *filenames):
+        """Like `compile`, but return the finished :class:`Compilation` rather
+        than only its output (which is available as ``.output``).  The result
+        knows which files it depends on, and can be passed to `recompile`.
+        """
         # TODO i think the right thing is to get all the constructors out of
         # SourceFile, since it's really the compiler that knows the import
         # paths and should be consulted about this.  reconsider all this (but
@@ -200,7 +245,109 @@ class Compiler(object):
             # an extension?
             source = SourceFile.from_filename(self.normalize_path(filename))
             compilation.add_source(source)
-        return self.call_and_catch_errors(compilation.run)
+        compilation.output = self.call_and_catch_errors(compilation.run)
+        return compilation
+
+    def compile_to(self, stream, *filenames):
+        """Like `compile`, but write the CSS to the given file-like object as
+        it's generated, rather than building and returning one big string.
+
+        Returns the finished :class:`Compilation`, which has no ``output``.
+        """
+        compilation = self.make_compilation()
+        for filename in filenames:
+            source = SourceFile.from_filename(self.normalize_path(filename))
+            compilation.add_source(source)
+
+        try:
+            compilation.run_to(stream.write)
+        except SassError as e:
+            if self.live_errors:
+                stream.write(e.to_css())
+            else:
+                raise
+        return compilation
+
+    def recompile(self, previous, changed_paths=None):
+        """Bring a :class:`Compilation` from `run_compilation` (or an earlier
+        `recompile`) up to date.
+
+        `changed_paths` is an iterable of paths known to have changed, e.g.
+        from a file watcher.  If it's None, every file the previous
+        compilation depended on is checked against its recorded modification
+        time and content hash instead.
+
+        If none of the entry points or anything they (transitively) imported
+        has changed, `previous` itself is returned.  Otherwise, a new
+        compilation is run; only the changed files are read again, and every
+        other file is reused along with its parsed contents.
+
+        The entry points of one compilation share a namespace and any
+        ``@extend`` rules, and produce a single output, so they can't be rerun
+        separately: if any of them is affected, all of them are.  To rerun
+        only the entry points that are affected, compile each one on its own
+        and use `recompile_each`.
+
+        Note that a new file that would now shadow an existing import isn't
+        noticed.
+        """
+        return self.recompile_each([previous], changed_paths)[0]
+
+    def recompile_each(self, previous, changed_paths=None):
+        """Like `recompile`, for a list of compilations, e.g. one for each of
+        the entry points a watcher is building.  Returns a list of
+        compilations in the same order.
+
+        Only the compilations whose entry points (transitively) import a
+        changed file are run again; the rest are returned as they are.  Each
+        file is only checked, and if it changed read again, once for all of
+        them.
+        """
+        previous = list(previous)
+        sources = {}
+        for compilation in previous:
+            for source in compilation.sources:
+                sources.setdefault(source.key, source)
+
+        if changed_paths is None:
+            stale = set(
+                key for key, source in sources.items()
+                if source.is_stale())
+        else:
+            changed_paths = set(
+                six.text_type(self.normalize_path(path).resolve())
+                for path in changed_paths)
+            stale = set(
+                key for key, source in sources.items()
+                if source.path in changed_paths)
+
+        if not stale:
+            return previous
+
+        # Unchanged files, plus changed ones once some compilation here has
+        # read them again
+        reusable = dict(
+            (key, source) for key, source in sources.items()
+            if key not in stale)
+        results = []
+        for compilation in previous:
+            if not compilation.affected_by(stale):
+                results.append(compilation)
+                continue
+
+            new_compilation = self.make_compilation()
+            new_compilation.reusable_sources.update(reusable)
+            for source in compilation.entry_sources:
+                if source.key in stale and source.origin:
+                    source = reusable.get(source.key) or SourceFile.read(
+                        source.origin, source.relpath, is_sass=source.is_sass)
+                new_compilation.add_source(source)
+            new_compilation.output = self.call_and_catch_errors(
+                new_compilation.run)
+            for source in new_compilation.sources:
+                reusable.setdefault(source.key, source)
+            results.append(new_compilation)
+        return results
 
     def compile_sources(self, *sources):
         # TODO this api is not the best please don't use it.  this all needs to
@@ -263,8 +410,26 @@ class Compilation(object):
 
         self.sources = []
         self.source_index = {}
+        # Sources that were loaded by a previous compilation and haven't
+        # changed since, so @import can use them as-is; see
+        # `Compiler.recompile`
+        self.reusable_sources = {}
+        self.entry_sources = []
+        # Maps a source's key to the keys of the sources it imports directly
         self.dependency_map = defaultdict(frozenset)
         self.rules = []
+        # Maps (parent ancestry, selector string) to what `_nested_ancestry`
+        # returns, so a mixin included under the same parent over and over
+        # doesn't parse and combine the same selectors every time
+        self.nested_ancestry_cache = {}
+        self.output = None
+        # A SourceMap, if the compiler is set to produce one; filled in as the
+        # output is written
+        self.source_map = None
+        if compiler.collect_stats:
+            self.stats = CompilationStats()
+        else:
+            self.stats = None
 
     def should_scope_loop_in_rule(self, rule):
         """Return True iff a looping construct (@each, @for, @while, @if)
@@ -280,30 +445,120 @@ class Compilation(object):
         self.source_index[source.key] = source
         return source
 
+    def get_loaded_source(self, key):
+        """Return the source with the given key if this compilation has
+        already loaded it (or may reuse it from a previous compilation), or
+        None.
+        """
+        source = self.source_index.get(key)
+        if source is None:
+            source = self.reusable_sources.get(key)
+        return source
+
+    def dependencies_of(self, source):
+        """Return the keys of every source that `source` imports, directly or
+        indirectly.
+        """
+        seen = set()
+        pending = [source.key]
+        while pending:
+            for key in self.dependency_map[pending.pop()]:
+                if key not in seen:
+                    seen.add(key)
+                    pending.append(key)
+        return frozenset(seen)
+
+    def affected_by(self, keys):
+        """Return True if any entry point is one of the sources with the
+        given keys, or imports one of them.
+        """
+        keys = frozenset(keys)
+        for source in self.entry_sources:
+            if source.key in keys or self.dependencies_of(source) & keys:
+                return True
+        return False
+
     def run(self):
+        self._evaluate_and_extend()
+
+        output, total_selectors = self._timed('css', self.create_css, self.rules)
+        self._finish(total_selectors)
+        return output
+
+    def run_to(self, write):
+        """Like `run`, but pass the CSS to the `write` callable in chunks
+        rather than returning it.
+        """
+        self._evaluate_and_extend()
+
+        total_selectors = self._timed('css', self.write_css, self.rules, write)
+        self._finish(total_selectors)
+
+    def evaluate(self):
+        """Evaluate every source added so far into a flat list of rules, in
+        ``self.rules``.  ``@extend``s are recorded but not yet applied.
+        """
         # Any @import will add the source file to self.sources and infect this
         # list, so make a quick copy to insulate against that
         # TODO maybe @import should just not do that?
-        for source_file in list(self.sources):
+        self.entry_sources = list(self.sources)
+        for source_file in self.entry_sources:
             rule = SassRule(
                 source_file=source_file,
                 lineno=1,
 
                 unparsed_contents=source_file.contents,
+                contents=(),
                 namespace=self.root_namespace,
             )
+            rule.contents = self._parse_source(source_file, rule)
             self.rules.append(rule)
             self.manage_children(rule, scope=None)
             self._warn_unused_imports(rule)
 
+    def _parse_source(self, source, rule):
+        """Return the blocks of `source`, which `rule` is about to evaluate.
+        A source that can't be parsed is reported as an error in `rule`, as
+        with any other error in its contents.
+        """
+        try:
+            return source.blocks
+        except SyntaxError as e:
+            raise SassError(e, rule=rule)
+
+    def _timed(self, name, func, *args):
+        if self.stats is None:
+            return func(*args)
+        return self.stats.timed(name, func, *args)
+
+    def _expression_cache(self):
+        if self.compiler.expression_cache is None:
+            return Calculator.ast_cache
+        return self.compiler.expression_cache
+
+    def _evaluate_and_extend(self):
+        if self.stats is not None:
+            cache = self._expression_cache()
+            self._cache_counts = cache.hits, cache.misses
+
+        self._timed('evaluate', self.evaluate)
         # Run through all the rules and apply @extends in a separate pass
-        self.rules = self.apply_extends(self.rules)
+        self.rules = self._timed('extend', self.apply_extends, self.rules)
 
-        output, total_selectors = self.create_css(self.rules)
+    def _finish(self, total_selectors):
         if total_selectors > 65534:
             log.warning("Maximum number of supported selectors in Internet Explorer (65534) exceeded!")
 
-        return output
+        if self.stats is not None:
+            self.stats.count('selectors', total_selectors)
+            self.stats.count('rules', len(self.rules))
+            self.stats.count('sources', len(self.sources))
+            # The cache may be shared with other compilations running at the
+            # same time, so these are only approximate
+            cache = self._expression_cache()
+            hits, misses = self._cache_counts
+            self.stats.count('expression cache hits', cache.hits - hits)
+            self.stats.count('expression cache misses', cache.misses - misses)
 
     def parse_selectors(self, raw_selectors):
         """
@@ -328,6 +583,29 @@ class Compilation(object):
 
         return selectors, parents
 
+    def _nested_ancestry(self, ancestry, raw_selectors):
+        """Parse the selectors of a block nested within the given ancestry.
+
+        Returns a 3-tuple: the block's own selectors, the selectors it extends
+        with the old xCSS syntax (as a tuple), and the block's ancestry.
+        Results are cached for the rest of the compilation, so the returned
+        ancestry may be shared with other rules, and must not be modified.
+        """
+        key = ancestry, raw_selectors
+        try:
+            return self.nested_ancestry_cache[key]
+        except KeyError:
+            pass
+
+        c_selectors, c_parents = self.parse_selectors(raw_selectors)
+        result = (
+            c_selectors,
+            tuple(c_parents),
+            ancestry.with_nested_selectors(c_selectors),
+        )
+        self.nested_ancestry_cache[key] = result
+        return result
+
     def _warn_unused_imports(self, rule):
         if not rule.legacy_compiler_options.get(
                 'warn_unused', self.compiler.warn_unused_imports):
@@ -341,9 +619,11 @@ class Compilation(object):
             namespace,
             ignore_parse_errors=self.ignore_parse_errors,
             undefined_variables_fatal=self.compiler.undefined_variables_fatal,
+            ast_cache=self.compiler.expression_cache,
+            compile_expressions=self.compiler.compile_expressions,
+            expression_parser=self.compiler.expression_parser,
         )
 
-    # @print_timing(4)
     def manage_children(self, rule, scope):
         try:
             self._manage_children_impl(rule, scope)
@@ -355,9 +635,10 @@ class Compilation(object):
 
     def _manage_children_impl(self, rule, scope):
         calculator = self._make_calculator(rule.namespace)
+        stats = self.stats
 
-        for c_lineno, c_property, c_codestr in locate_blocks(rule.unparsed_contents):
-            block = UnparsedBlock(rule, c_lineno, c_property, c_codestr)
+        for node in rule.contents:
+            block = UnparsedBlock(rule, node.lineno, node.prop, None, node=node)
 
             ####################################################################
             # At (@) blocks
@@ -370,17 +651,26 @@ class Compilation(object):
                 try:
                     method = getattr(self, code)
                 except AttributeError:
-                    if block.unparsed_contents is None:
+                    if block.contents is None:
                         rule.properties.append((block.prop, None))
                     elif scope is None:  # needs to have no scope to crawl down the nested rules
-                        self._nest_at_rules(rule, scope, block)
+                        if stats is None:
+                            self._nest_at_rules(rule, scope, block)
+                        else:
+                            stats.timed('_nest_at_rules', self._nest_at_rules, rule, scope, block)
                 else:
-                    method(calculator, rule, scope, block)
+                    if stats is None:
+                        method(calculator, rule, scope, block)
+                    else:
+                        stats.timed(block.directive, method, calculator, rule, scope, block)
 
             ####################################################################
             # Properties
-            elif block.unparsed_contents is None:
-                self._get_properties(rule, scope, block)
+            elif block.contents is None:
+                if stats is None:
+                    self._get_properties(rule, scope, block)
+                else:
+                    stats.timed('_get_properties', self._get_properties, rule, scope, block)
 
             # Nested properties
             elif block.is_scope:
@@ -389,13 +679,17 @@ class Compilation(object):
                     self._get_properties(rule, scope, block)
 
                 rule.unparsed_contents = block.unparsed_contents
+                rule.contents = block.contents
                 subscope = (scope or '') + block.header.scope + '-'
                 self.manage_children(rule, subscope)
 
             ####################################################################
             # Nested rules
             elif scope is None:  # needs to have no scope to crawl down the nested rules
-                self._nest_rules(rule, scope, block)
+                if stats is None:
+                    self._nest_rules(rule, scope, block)
+                else:
+                    stats.timed('_nest_rules', self._nest_rules, rule, scope, block)
 
     def _at_warn(self, calculator, rule, scope, block):
         """
@@ -486,7 +780,6 @@ class Compilation(object):
         ret = calculator.calculate(block.argument)
         raise SassReturn(ret)
 
-    # @print_timing(10)
     def _at_option(self, calculator, rule, scope, block):
         """
         Implements @option
@@ -566,7 +859,7 @@ class Compilation(object):
 
         #m_params = mixin[0]
         #m_defaults = mixin[1]
-        #m_codestr = mixin[2]
+        #m_block = mixin[2]
         pristine_callee_namespace = mixin[3]
         callee_argspec = mixin[4]
         import_key = mixin[5]
@@ -620,7 +913,6 @@ class Compilation(object):
         pristine_callee_namespace.use_import(import_key)
         return callee_namespace
 
-    # @print_timing(10)
     def _at_function(self, calculator, rule, scope, block):
         """
         Implements @mixin and @function
@@ -638,15 +930,15 @@ class Compilation(object):
             if default is not None:
                 defaults[var_name] = default
 
-        # TODO a function or mixin is re-parsed every time it's called; there's
-        # no AST for anything but expressions  :(
-        mixin = [rule.source_file, block.lineno, block.unparsed_contents, rule.namespace, argspec_node, rule.source_file]
+        # The body is kept as its parsed block node, so it's only ever parsed
+        # once no matter how many times it's called
+        mixin = [rule.source_file, block.lineno, block.node, rule.namespace, argspec_node, rule.source_file]
         if block.directive == '@function':
             def _call(mixin):
                 def __call(namespace, *args, **kwargs):
                     source_file = mixin[0]
                     lineno = mixin[1]
-                    m_codestr = mixin[2]
+                    m_block = mixin[2]
                     pristine_callee_namespace = mixin[3]
                     callee_namespace = pristine_callee_namespace.derive()
 
@@ -664,7 +956,8 @@ class Compilation(object):
                     _rule = SassRule(
                         source_file=source_file,
                         lineno=lineno,
-                        unparsed_contents=m_codestr,
+                        unparsed_contents=m_block.unparsed_contents,
+                        contents=m_block.contents,
                         namespace=callee_namespace,
 
                         # rule
@@ -708,7 +1001,6 @@ class Compilation(object):
                 add(funct, 0, mixin)
     _at_mixin = _at_function
 
-    # @print_timing(10)
     def _at_include(self, calculator, rule, scope, block):
         """
         Implements @include, for @mixins
@@ -737,7 +1029,7 @@ class Compilation(object):
 
         source_file = mixin[0]
         lineno = mixin[1]
-        m_codestr = mixin[2]
+        m_block = mixin[2]
         pristine_callee_namespace = mixin[3]
         callee_argspec = mixin[4]
         if caller_argspec.inject and callee_argspec.inject:
@@ -761,7 +1053,8 @@ class Compilation(object):
             from_source_file=source_file,
             from_lineno=lineno,
 
-            unparsed_contents=m_codestr,
+            unparsed_contents=m_block.unparsed_contents,
+            contents=m_block.contents,
             namespace=callee_namespace,
 
             # rule
@@ -774,20 +1067,27 @@ class Compilation(object):
             nested=rule.nested,
         )
 
-        _rule.options['@content'] = block.unparsed_contents
-        self.manage_children(_rule, scope)
+        _rule.options['@content'] = block.node
+        if self.stats is None:
+            self.manage_children(_rule, scope)
+        else:
+            self.stats.timed('mixin ' + funct, self.manage_children, _rule, scope)
 
-    # @print_timing(10)
     def _at_content(self, calculator, rule, scope, block):
         """
         Implements @content
         """
         if '@content' not in rule.options:
             log.error("Content string not found for @content (%s)", rule.file_and_line)
-        rule.unparsed_contents = rule.options.pop('@content', '')
+        content = rule.options.pop('@content', None)
+        if content is None or content.contents is None:
+            rule.unparsed_contents = ''
+            rule.contents = ()
+        else:
+            rule.unparsed_contents = content.unparsed_contents
+            rule.contents = content.contents
         self.manage_children(rule, scope)
 
-    # @print_timing(10)
     def _at_import(self, calculator, rule, scope, block):
         """
         Implements @import
@@ -837,6 +1137,8 @@ class Compilation(object):
                 raise SassImportError(name, self.compiler, rule=rule)
 
             source = self.add_source(source)
+            self.dependency_map[rule.source_file.key] |= frozenset(
+                (source.key,))
 
             if rule.namespace.has_import(source):
                 # If already imported in this scope, skip
@@ -848,6 +1150,7 @@ class Compilation(object):
                 source_file=source,
                 lineno=block.lineno,
                 unparsed_contents=source.contents,
+                contents=(),
 
                 # rule
                 legacy_compiler_options=rule.legacy_compiler_options,
@@ -857,6 +1160,7 @@ class Compilation(object):
                 ancestry=rule.ancestry,
                 namespace=rule.namespace,
             )
+            _rule.contents = self._parse_source(source, _rule)
             rule.namespace.add_import(source, rule)
             self.manage_children(_rule, scope)
 
@@ -869,7 +1173,6 @@ class Compilation(object):
             # this is still hoisted to the top
             rule.properties.append(('@import ' + import_, None))
 
-    # @print_timing(10)
     def _at_if(self, calculator, rule, scope, block):
         """
         Implements @if and @else if
@@ -887,6 +1190,7 @@ class Compilation(object):
         if condition:
             inner_rule = rule.copy()
             inner_rule.unparsed_contents = block.unparsed_contents
+            inner_rule.contents = block.contents
             if not self.should_scope_loop_in_rule(inner_rule):
                 # DEVIATION: Allow not creating a new namespace
                 inner_rule.namespace = rule.namespace
@@ -894,7 +1198,6 @@ class Compilation(object):
         rule.options['@if'] = condition
     _at_else_if = _at_if
 
-    # @print_timing(10)
     def _at_else(self, calculator, rule, scope, block):
         """
         Implements @else
@@ -905,11 +1208,10 @@ class Compilation(object):
         if not val:
             inner_rule = rule.copy()
             inner_rule.unparsed_contents = block.unparsed_contents
+            inner_rule.contents = block.contents
             inner_rule.namespace = rule.namespace  # DEVIATION: Commenting this line gives the Sass bahavior
-            inner_rule.unparsed_contents = block.unparsed_contents
             self.manage_children(inner_rule, scope)
 
-    # @print_timing(10)
     def _at_for(self, calculator, rule, scope, block):
         """
         Implements @for
@@ -941,6 +1243,7 @@ class Compilation(object):
 
         inner_rule = rule.copy()
         inner_rule.unparsed_contents = block.unparsed_contents
+        inner_rule.contents = block.contents
         if not self.should_scope_loop_in_rule(inner_rule):
             # DEVIATION: Allow not creating a new namespace
             inner_rule.namespace = rule.namespace
@@ -951,7 +1254,6 @@ class Compilation(object):
             inner_rule.namespace.set_variable(var, Number(i))
             self.manage_children(inner_rule, scope)
 
-    # @print_timing(10)
     def _at_each(self, calculator, rule, scope, block):
         """
         Implements @each
@@ -974,6 +1276,7 @@ class Compilation(object):
 
         inner_rule = rule.copy()
         inner_rule.unparsed_contents = block.unparsed_contents
+        inner_rule.contents = block.contents
         if not self.should_scope_loop_in_rule(inner_rule):
             # DEVIATION: Allow not creating a new namespace
             inner_rule.namespace = rule.namespace
@@ -991,7 +1294,6 @@ class Compilation(object):
                 inner_rule.namespace.set_variable(varlist[0], v)
             self.manage_children(inner_rule, scope)
 
-    # @print_timing(10)
     def _at_while(self, calculator, rule, scope, block):
         """
         Implements @while
@@ -1000,6 +1302,7 @@ class Compilation(object):
         while condition:
             inner_rule = rule.copy()
             inner_rule.unparsed_contents = block.unparsed_contents
+            inner_rule.contents = block.contents
             if not self.should_scope_loop_in_rule(inner_rule):
                 # DEVIATION: Allow not creating a new namespace
                 inner_rule.namespace = rule.namespace
@@ -1007,7 +1310,6 @@ class Compilation(object):
             condition = calculator.calculate(block.argument)
         rule.options['@if'] = first_condition
 
-    # @print_timing(10)
     def _at_variables(self, calculator, rule, scope, block):
         """
         Implements @variables and @vars
@@ -1018,16 +1320,32 @@ class Compilation(object):
             "Just assign variables at top-level.")
         _rule = rule.copy()
         _rule.unparsed_contents = block.unparsed_contents
+        _rule.contents = block.contents
         _rule.namespace = rule.namespace
         _rule.properties = []
         self.manage_children(_rule, scope)
     _at_vars = _at_variables
 
-    # @print_timing(10)
     def _get_properties(self, rule, scope, block):
         """
         Implements properties and variables extraction and assignment
         """
+        kind, name, value = block.node.declaration or (EXPRESSION, None, None)
+        if scope and '$' in scope:
+            # Variables in the scope are applied along with the name
+            kind = EXPRESSION
+
+        if kind == LITERAL:
+            # Plain CSS goes straight to the output
+            rule.properties.append(((scope or '') + name, value))
+            return
+        elif kind == INTERPOLATED and not self.ignore_parse_errors:
+            calculator = self._make_calculator(rule.namespace)
+            self._add_property(
+                rule, (scope or '') + name,
+                calculator.evaluate_interpolations(value))
+            return
+
         prop, raw_value = (_prop_split_re.split(block.prop, 1) + [None])[:2]
         if raw_value is not None:
             raw_value = raw_value.strip()
@@ -1089,22 +1407,27 @@ class Compilation(object):
             else:
                 value = calculator.calculate(raw_value)
 
-            if value is None:
-                pass
-            elif isinstance(value, six.string_types):
-                # TODO kill this branch
-                pass
-            else:
-                if value.is_null:
-                    return
-                style = rule.legacy_compiler_options.get(
-                    'style', self.compiler.output_style)
-                compress = style == 'compressed'
-                value = value.render(compress=compress)
+            self._add_property(rule, _prop, value)
+
+    def _add_property(self, rule, prop, value):
+        """Render `value` and add it to the properties of `rule`, unless it's
+        null.
+        """
+        if value is None:
+            pass
+        elif isinstance(value, six.string_types):
+            # TODO kill this branch
+            pass
+        else:
+            if value.is_null:
+                return
+            style = rule.legacy_compiler_options.get(
+                'style', self.compiler.output_style)
+            compress = style == 'compressed'
+            value = value.render(compress=compress)
 
-            rule.properties.append((_prop, value))
+        rule.properties.append((prop, value))
 
-    # @print_timing(10)
     def _nest_at_rules(self, rule, scope, block):
         """
         Implements @-blocks
@@ -1114,30 +1437,34 @@ class Compilation(object):
         # TODO this seems like it should be done in the block header.  and more
         # generally?
         calculator = self._make_calculator(rule.namespace)
-        if block.header.argument:
+        header = block.header
+        if header.argument:
             # TODO is this correct?  do ALL at-rules ALWAYS allow both vars and
             # interpolation?
-            node = calculator.parse_vars_and_interpolations(
-                block.header.argument)
-            block.header.argument = node.evaluate(calculator).render()
+            node = calculator.parse_vars_and_interpolations(header.argument)
+            # The parsed header is shared by every evaluation of this block,
+            # so build a new one rather than overwriting its argument
+            header = BlockAtRuleHeader(
+                header.directive, node.evaluate(calculator).render(),
+                header.num_lines)
 
         # TODO merge into RuleAncestry
         new_ancestry = list(rule.ancestry.headers)
         if block.directive == '@media' and new_ancestry:
-            for i, header in reversed(list(enumerate(new_ancestry))):
-                if header.is_selector:
+            for i, old_header in reversed(list(enumerate(new_ancestry))):
+                if old_header.is_selector:
                     continue
-                elif header.directive == '@media':
+                elif old_header.directive == '@media':
                     new_ancestry[i] = BlockAtRuleHeader(
                         '@media',
-                        "%s and %s" % (header.argument, block.argument))
+                        "%s and %s" % (old_header.argument, header.argument))
                     break
                 else:
-                    new_ancestry.insert(i, block.header)
+                    new_ancestry.insert(i, header)
             else:
-                new_ancestry.insert(0, block.header)
+                new_ancestry.insert(0, header)
         else:
-            new_ancestry.append(block.header)
+            new_ancestry.append(header)
 
         rule.descendants += 1
         new_rule = SassRule(
@@ -1146,6 +1473,7 @@ class Compilation(object):
             lineno=block.lineno,
             num_header_lines=block.header.num_lines,
             unparsed_contents=block.unparsed_contents,
+            contents=block.contents,
 
             legacy_compiler_options=rule.legacy_compiler_options,
             options=rule.options.copy(),
@@ -1162,16 +1490,18 @@ class Compilation(object):
 
         self._warn_unused_imports(new_rule)
 
-    # @print_timing(10)
     def _nest_rules(self, rule, scope, block):
         """
         Implements Nested CSS rules
         """
-        calculator = self._make_calculator(rule.namespace)
-        raw_selectors = calculator.do_glob_math(block.prop)
-        # DEVIATION: ruby sass doesn't support bare variables in selectors
-        raw_selectors = calculator.apply_vars(raw_selectors)
-        c_selectors, c_parents = self.parse_selectors(raw_selectors)
+        raw_selectors = block.prop
+        if '#{' in raw_selectors or '$' in raw_selectors:
+            calculator = self._make_calculator(rule.namespace)
+            raw_selectors = calculator.do_glob_math(raw_selectors)
+            # DEVIATION: ruby sass doesn't support bare variables in selectors
+            raw_selectors = calculator.apply_vars(raw_selectors)
+        c_selectors, c_parents, new_ancestry = self._nested_ancestry(
+            rule.ancestry, raw_selectors)
         if c_parents:
             warn_deprecated(
                 rule,
@@ -1179,8 +1509,6 @@ class Compilation(object):
                 "Use 'a { @extend b; }' instead."
             )
 
-        new_ancestry = rule.ancestry.with_nested_selectors(c_selectors)
-
         rule.descendants += 1
         new_rule = SassRule(
             source_file=rule.source_file,
@@ -1188,11 +1516,13 @@ class Compilation(object):
             lineno=block.lineno,
             num_header_lines=block.header.num_lines,
             unparsed_contents=block.unparsed_contents,
+            contents=block.contents,
 
             legacy_compiler_options=rule.legacy_compiler_options,
             options=rule.options.copy(),
             #properties
-            extends_selectors=c_parents,
+            # @extend adds to this, so it can't be shared
+            extends_selectors=list(c_parents),
             ancestry=new_ancestry,
 
             namespace=rule.namespace.derive(),
@@ -1204,101 +1534,50 @@ class Compilation(object):
 
         self._warn_unused_imports(new_rule)
 
-    # @print_timing(3)
     def apply_extends(self, rules):
         """Run through the given rules and translate all the pending @extends
         declarations into real selectors on parent rules.
 
-        The list is modified in-place and also sorted in dependency order.
-        """
-        # Game plan: for each rule that has an @extend, add its selectors to
-        # every rule that matches that @extend.
-        # First, rig a way to find arbitrary selectors quickly.  Most selectors
-        # revolve around elements, classes, and IDs, so parse those out and use
-        # them as a rough key.  Ignore order and duplication for now.
-        key_to_selectors = defaultdict(set)
-        selector_to_rules = defaultdict(set)
-        rule_selector_order = {}
-        order = 0
-        for rule in rules:
-            for selector in rule.selectors:
-                for key in selector.lookup_key():
-                    key_to_selectors[key].add(selector)
-                selector_to_rules[selector].add(rule)
-                rule_selector_order[rule, selector] = order
-                order += 1
-
-        # Now go through all the rules with an @extends and find their parent
-        # rules.
-        for rule in rules:
-            for selector in rule.extends_selectors:
-                # This is a little dirty.  intersection isn't a class method.
-                # Don't think about it too much.
-                candidates = set.intersection(*(
-                    key_to_selectors[key] for key in selector.lookup_key()))
-                extendable_selectors = [
-                    candidate for candidate in candidates
-                    if candidate.is_superset_of(selector)]
-
-                if not extendable_selectors:
-                    # TODO implement !optional
-                    warn_deprecated(
-                        rule,
-                        "Can't find any matching rules to extend {0!r} -- this "
-                        "will be fatal in 2.0, unless !optional is specified!"
-                        .format(selector.render()))
-                    continue
+        Returns the rules to be written out, which excludes rules containing
+        only placeholders.
+        """
+        def warn_unmatched(rule, selector):
+            # TODO implement !optional
+            warn_deprecated(
+                rule,
+                "Can't find any matching rules to extend {0!r} -- this "
+                "will be fatal in 2.0, unless !optional is specified!"
+                .format(selector.render()))
+
+        extender = Extender(rules, max_selectors=config.MAX_EXTEND_SELECTORS)
+        try:
+            rules = extender.apply(on_unmatched=warn_unmatched)
+        except ExtendLimitExceeded as e:
+            raise SassError(e, rule=e.rule)
+
+        if self.stats is not None:
+            self.stats.count('selectors added by @extend', extender.generated)
+        return rules
 
-                # Armed with a set of selectors that this rule can extend, do
-                # some substitution and modify the appropriate parent rules.
-                # One tricky bit: it's possible we're extending two selectors
-                # that both exist in the same parent rule, in which case we
-                # want to extend in the order the original selectors appear in
-                # that rule.
-                known_parents = []
-                for extendable_selector in extendable_selectors:
-                    parent_rules = selector_to_rules[extendable_selector]
-                    for parent_rule in parent_rules:
-                        if parent_rule is rule:
-                            # Don't extend oneself
-                            continue
-                        known_parents.append(
-                            (parent_rule, extendable_selector))
-                # This will put our parents back in their original order
-                known_parents.sort(key=rule_selector_order.__getitem__)
-
-                for parent_rule, extendable_selector in known_parents:
-                    more_parent_selectors = []
-
-                    for rule_selector in rule.selectors:
-                        more_parent_selectors.extend(
-                            extendable_selector.substitute(
-                                selector, rule_selector))
-
-                    for parent in more_parent_selectors:
-                        # Update indices, in case later rules try to extend
-                        # this one
-                        for key in parent.lookup_key():
-                            key_to_selectors[key].add(parent)
-                        selector_to_rules[parent].add(parent_rule)
-                        rule_selector_order[parent_rule, parent] = order
-                        order += 1
-
-                    parent_rule.ancestry = (
-                        parent_rule.ancestry.with_more_selectors(
-                            more_parent_selectors))
-
-        # Remove placeholder-only rules
-        return [rule for rule in rules if not rule.is_pure_placeholder]
-
-    # @print_timing(3)
     def create_css(self, rules):
         """
         Generate the final CSS string
         """
+        chunks = []
+        total_selectors = self.write_css(rules, chunks.append)
+        return ''.join(chunks), total_selectors
+
+    def write_css(self, rules, write):
+        """
+        Generate the final CSS, passing it to `write` one chunk at a time.
+        Returns the number of selectors written.
+        """
         style = rules[0].legacy_compiler_options.get(
             'style', self.compiler.output_style)
         debug_info = self.compiler.generate_source_map
+        if debug_info == 'map':
+            self.source_map = SourceMap()
+            debug_info = False
 
         if style == 'legacy':
             sc, sp, tb, nst, srnl, nl, rnl, lnl, dbg = True, ' ', '  ', False, '', '\n', '\n', '\n', debug_info
@@ -1311,13 +1590,17 @@ class Compilation(object):
         else:  # if style == 'nested':
             sc, sp, tb, nst, srnl, nl, rnl, lnl, dbg = True, ' ', '  ', True, '\n', '\n', '\n', ' ', debug_info
 
-        return self._create_css(rules, sc, sp, tb, nst, srnl, nl, rnl, lnl, dbg)
+        return self._write_css(write, rules, sc, sp, tb, nst, srnl, nl, rnl, lnl, dbg, self.source_map)
 
     def _textwrap(self, txt, width=70):
         if not hasattr(self, '_textwrap_wordsep_re'):
             self._textwrap_wordsep_re = re.compile(r'(?<=,)\s+')
             self._textwrap_strings_re = re.compile(r'''(["'])(?:(?!\1)[^\\]|\\.)*\1''')
 
+        # Lines are only ever broken after commas
+        if ',' not in txt:
+            return [txt]
+
         # First, remove commas from anything within strings (marking commas as \0):
         def _repl(m):
             ori = m.group(0)
@@ -1356,6 +1639,12 @@ class Compilation(object):
         return lines
 
     def _create_css(self, rules, sc=True, sp=' ', tb='  ', nst=True, srnl='\n', nl='\n', rnl='\n', lnl='', debug_info=False):
+        chunks = []
+        total_selectors = self._write_css(
+            chunks.append, rules, sc, sp, tb, nst, srnl, nl, rnl, lnl, debug_info)
+        return ''.join(chunks), total_selectors
+
+    def _write_css(self, write, rules, sc=True, sp=' ', tb='  ', nst=True, srnl='\n', nl='\n', rnl='\n', lnl='', debug_info=False, source_map=None):
         super_selector = self.compiler.super_selector
         if super_selector:
             super_selector += ' '
@@ -1366,7 +1655,17 @@ class Compilation(object):
 
         total_selectors = 0
 
-        result = ''
+        # Only the last chunk written matters, to tell whether anything has
+        # been written yet and whether it ended with a newline
+        last_chunk = ['']
+
+        def emit(chunk):
+            if chunk:
+                write(chunk)
+                last_chunk[0] = chunk
+                if source_map is not None:
+                    source_map.advance(chunk)
+
         dangling_property = False
         separate = False
         nesting = current_nesting = last_nesting = -1 if nst else 0
@@ -1407,19 +1706,19 @@ class Compilation(object):
             # that trailing semicolon needs adding in to separate the last
             # property from the next rule.
             if not sc and dangling_property and first_mismatch >= len(prev_ancestry_headers):
-                result += ';'
+                emit(';')
 
             # Close blocks and outdent as necessary
             for i in range(len(prev_ancestry_headers), first_mismatch, -1):
-                result += tb * (i - 1) + '}' + rnl
+                emit(tb * (i - 1) + '}' + rnl)
 
             # Open new blocks as necessary
             for i in range(first_mismatch, ancestry_len):
                 header = ancestry.headers[i]
 
                 if separate:
-                    if result:
-                        result += srnl
+                    if last_chunk[0]:
+                        emit(srnl)
                     separate = False
                 if debug_info:
                     def _print_debug_info(filename, lineno):
@@ -1431,10 +1730,10 @@ class Compilation(object):
                         return result
 
                     if rule.lineno and rule.source_file:
-                        result += _print_debug_info(rule.source_file.path, rule.lineno)
+                        emit(_print_debug_info(rule.source_file.path, rule.lineno))
 
                     if rule.from_lineno and rule.from_source_file:
-                        result += _print_debug_info(rule.from_source_file.path, rule.from_lineno)
+                        emit(_print_debug_info(rule.from_source_file.path, rule.from_lineno))
 
                 if header.is_selector:
                     header_string = header.render(sep=',' + sp, super_selector=super_selector)
@@ -1442,7 +1741,17 @@ class Compilation(object):
                         header_string = (nl + tb * (i + nesting)).join(self._textwrap(header_string))
                 else:
                     header_string = header.render()
-                result += tb * (i + nesting) + header_string + sp + '{' + nl
+
+                indent = tb * (i + nesting)
+                if source_map is not None:
+                    # Point at the header itself, not its indentation
+                    emit(indent)
+                    indent = ''
+                    if rule.lineno and rule.source_file:
+                        source_map.add_mapping(rule.source_file.path, rule.lineno - 1)
+                    elif rule.from_lineno and rule.from_source_file:
+                        source_map.add_mapping(rule.from_source_file.path, rule.from_lineno - 1)
+                emit(indent + header_string + sp + '{' + nl)
 
                 if header.is_selector:
                     total_selectors += 1
@@ -1451,21 +1760,25 @@ class Compilation(object):
             dangling_property = False
 
             if not skip_selectors:
-                result += self._print_properties(rule.properties, sc, sp, tb * (ancestry_len + nesting), nl, lnl)
+                self._write_properties(emit, rule.properties, sc, sp, tb * (ancestry_len + nesting), nl, lnl)
                 dangling_property = True
 
         # Close all remaining blocks
         for i in reversed(range(len(prev_ancestry_headers))):
-            result += tb * i + '}' + rnl
+            emit(tb * i + '}' + rnl)
 
         # Always end with a newline, even in compressed mode
-        if not result.endswith('\n'):
-            result += '\n'
+        if not last_chunk[0].endswith('\n'):
+            write('\n')
 
-        return (result, total_selectors)
+        return total_selectors
 
     def _print_properties(self, properties, sc=True, sp=' ', tb='', nl='\n', lnl=' '):
-        result = ''
+        chunks = []
+        self._write_properties(chunks.append, properties, sc, sp, tb, nl, lnl)
+        return ''.join(chunks)
+
+    def _write_properties(self, write, properties, sc=True, sp=' ', tb='', nl='\n', lnl=' '):
         last_prop_index = len(properties) - 1
         for i, (name, value) in enumerate(properties):
             if value is None:
@@ -1482,12 +1795,11 @@ class Compilation(object):
 
             if i == last_prop_index:
                 if sc:
-                    result += tb + prop + ';' + lnl
+                    write(tb + prop + ';' + lnl)
                 else:
-                    result += tb + prop + lnl
+                    write(tb + prop + lnl)
             else:
-                result += tb + prop + ';' + nl
-        return result
+                write(tb + prop + ';' + nl)
 
 
 class SassReturn(SassBaseError):
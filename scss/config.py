@@ -13,7 +13,8 @@ LOAD_PATHS = os.path.join(PROJECT_ROOT, 'sass/frameworks')
 
 # Assets path, where new sprite files are created (defaults to STATIC_ROOT + '/assets'):
 ASSETS_ROOT = None
-# Cache files path, where cache files are saved (defaults to ASSETS_ROOT):
+# Cache files path, where cache files are saved (defaults to ASSETS_ROOT).
+# Parsed source files are also cached here, but only if this is set:
 CACHE_ROOT = None
 # Assets path, where new sprite files are created:
 STATIC_ROOT = os.path.join(PROJECT_ROOT, 'static')
@@ -35,4 +36,12 @@ CONTROL_SCOPING = True
 # Throw fatal errors when finding undefined variables:
 FATAL_UNDEFINED = True
 
+# Maximum number of parsed expressions to keep in memory, shared by every
+# compilation in the process (None for no limit):
+EXPRESSION_CACHE_SIZE = 10000
+
+# Maximum number of selectors @extend may add to a single compilation, to stop
+# runaway extends early (None for no limit):
+MAX_EXTEND_SELECTORS = 100000
+
 SPRTE_MAP_DIRECTION = 'vertical'
@@ -478,9 +478,28 @@ _expr_glob_re = re.compile(r'''
     \#\{(.*?)\}                   # Global Interpolation only
 ''', re.VERBOSE)
 
+# Comments, which are removed, and the strings and urls they might appear
+# within, which are kept in the group "keep".  Strings and urls end on the
+# same line they start.
 # XXX these still need to be fixed; the //-in-functions thing is a chumpy hack
-_ml_comment_re = re.compile(r'\/\*(.*?)\*\/', re.DOTALL)
-_sl_comment_re = re.compile(r'(?<!\burl[(])(?<!\w{2}:)\/\/.*')
+# TODO i know, the url part is clumsy and won't always work; it's better than
+# nothing
+_comments_re = re.compile(r'''
+    (?=[\'"u/])                  # skip quickly to where anything could start
+    (?:
+        (?P<keep>
+            '[^'\n]*'              # string
+        |
+            "[^"\n]*"
+        |
+            url\([^)\n]*\)         # url
+        )
+    |
+        /\*[\s\S]*?\*/            # multi-line comment
+    |
+        (?<!\burl\()(?<!\w{2}:)//[^\n]*  # single-line comment, but not ://
+    )
+''', re.VERBOSE)
 
 _escape_chars_re = re.compile(r'([^-a-zA-Z0-9_])')
 _interpolate_re = re.compile(r'(#\{\s*)?(\$[-\w]+)(?(1)\s*\})')
@@ -488,12 +507,35 @@ _spaces_re = re.compile(r'\s+')
 _collapse_properties_space_re = re.compile(r'([:#])\s*{')
 _variable_re = re.compile('^\\$[-a-zA-Z0-9_]+$')
 
-_strings_re = re.compile(r'([\'"]).*?\1')
-# TODO i know, this is clumsy and won't always work; it's better than nothing
-_urls_re = re.compile(r'url[(].*?[)]')
 
 _has_placeholder_re = re.compile(r'(?<!\w)([a-z]\w*)?%')
 _prop_split_re = re.compile(r'[:=]')
+# A property value that Sass would render exactly as written, compressed or
+# not: single-space-separated words, numbers with nothing to normalize, and hex
+# colors.  Words and colors still need checking; see `scss.blockast`.
+_literal_value_re = re.compile(r'''
+    (?:
+        (?:
+            -?[a-zA-Z_][-a-zA-Z0-9_]*                       # word
+        |
+            0 | -?[1-9][0-9]{0,8}(?:\.[0-9]{0,4}[1-9])?(?:[a-z]+|%)?  # number
+        |
+            \#(?:[0-9a-fA-F]{3}){1,2}                       # color
+        |
+            !important
+        )
+        (?:\x20(?=\S)|$)
+    )+$
+''', re.VERBOSE)
+# A space-separated word, where interpolations with no nested braces or
+# strings may contain spaces; and a word made of one such interpolation with
+# only letters around it, like `icon-#{$name}` or `#{$width}px`
+_value_word_re = re.compile(r'''(?:\#\{[^{}'"]*\}|[^\x20])+''')
+_interpolated_word_re = re.compile(r'''
+    (?P<prefix> [a-zA-Z_][-a-zA-Z0-9_]* )?
+    \#\{[^{}'"]*\}
+    (?P<suffix> [a-zA-Z]* )$
+''', re.VERBOSE)
 _has_code_re = re.compile('''
     (?:^|(?<=[{;}]))            # the character just before it should be a '{', a ';' or a '}'
     \s*                         # ...followed by any number of spaces
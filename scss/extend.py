@@ -0,0 +1,174 @@
+"""Implementation of ``@extend``: finding the rules each ``@extend`` applies to,
+and adding the extending rule's selectors to them.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+
+class ExtendLimitExceeded(Exception):
+    """Raised when ``@extend`` generates more selectors than allowed.  `rule`
+    is the extending rule that went over the limit.
+    """
+    def __init__(self, message, rule):
+        super(ExtendLimitExceeded, self).__init__(message)
+        self.rule = rule
+
+
+class Extender(object):
+    """Applies every ``@extend`` found in a list of rules.
+
+    Selectors are found through an inverted index, from each token in a
+    selector's `lookup_key` to every selector containing it, so finding what an
+    ``@extend`` matches only looks at selectors sharing its rarest token.
+
+    New selectors for each rule are collected as they're generated, and only
+    turned into a new ancestry once, when everything has been extended; adding
+    them one ``@extend`` at a time copies the rule's selectors every time,
+    which gets slow when many rules extend the same placeholder.
+
+    :param max_selectors: The most selectors that ``@extend`` may add, across
+        every rule, before giving up with `ExtendLimitExceeded`.  ``None`` for
+        no limit.
+    """
+    def __init__(self, rules, max_selectors=None):
+        self.rules = rules
+        self.max_selectors = max_selectors
+        self.generated = 0
+
+        self.key_to_selectors = defaultdict(set)
+        self.selector_to_rules = defaultdict(set)
+        self.rule_selector_order = {}
+        self._order = 0
+
+        # Selectors each rule has now, original and added, plus a set of the
+        # same for fast duplicate checks; only rules that have been extended
+        # get an entry
+        self._rule_selectors = {}
+        self._rule_selector_sets = {}
+
+        for rule in rules:
+            for selector in rule.selectors:
+                self._index(rule, selector)
+
+    def _index(self, rule, selector):
+        for key in selector.lookup_key():
+            self.key_to_selectors[key].add(selector)
+        self.selector_to_rules[selector].add(rule)
+        # Later duplicates move the selector to the end, so that rules
+        # extended later are also extended later in turn
+        self.rule_selector_order[rule, selector] = self._order
+        self._order += 1
+
+    def selectors_of(self, rule):
+        """Return every selector the given rule has so far, including any
+        added by ``@extend``.
+        """
+        try:
+            return self._rule_selectors[rule]
+        except KeyError:
+            return rule.selectors
+
+    def find_extendable(self, selector):
+        """Return every known selector that the given selector can extend."""
+        # Intersect starting from the smallest set, so common tokens like a
+        # bare element name cost next to nothing
+        candidate_sets = sorted(
+            (self.key_to_selectors.get(key, ()) for key in selector.lookup_key()),
+            key=len)
+        if not candidate_sets[0]:
+            return []
+        candidates = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+        return [
+            candidate for candidate in candidates
+            if candidate.is_superset_of(selector)]
+
+    def extend(self, rule, selector, extendable_selectors):
+        """Add the selectors of `rule`, which extends `selector`, to every rule
+        containing one of `extendable_selectors`.
+        """
+        # One tricky bit: it's possible we're extending two selectors that
+        # both exist in the same parent rule, in which case we want to extend
+        # in the order the original selectors appear in that rule.
+        known_parents = []
+        for extendable_selector in extendable_selectors:
+            for parent_rule in self.selector_to_rules[extendable_selector]:
+                if parent_rule is rule:
+                    # Don't extend oneself
+                    continue
+                known_parents.append((parent_rule, extendable_selector))
+        # This will put our parents back in their original order
+        known_parents.sort(key=self.rule_selector_order.__getitem__)
+
+        # The same substitution happens for every rule containing a selector
+        rule_selectors = self.selectors_of(rule)
+        substitutions = {}
+        for parent_rule, extendable_selector in known_parents:
+            try:
+                more_parent_selectors = substitutions[extendable_selector]
+            except KeyError:
+                more_parent_selectors = []
+                for rule_selector in rule_selectors:
+                    more_parent_selectors.extend(
+                        extendable_selector.substitute(
+                            selector, rule_selector))
+                substitutions[extendable_selector] = more_parent_selectors
+
+            for parent in more_parent_selectors:
+                # Update indices, in case later rules try to extend this one
+                self._index(parent_rule, parent)
+
+            self._add_selectors(rule, parent_rule, more_parent_selectors)
+
+    def _add_selectors(self, rule, parent_rule, selectors):
+        try:
+            current = self._rule_selectors[parent_rule]
+            seen = self._rule_selector_sets[parent_rule]
+        except KeyError:
+            current = self._rule_selectors[parent_rule] = list(
+                parent_rule.selectors)
+            seen = self._rule_selector_sets[parent_rule] = set(current)
+
+        for selector in selectors:
+            if selector in seen:
+                continue
+            seen.add(selector)
+            current.append(selector)
+            self.generated += 1
+
+        if self.max_selectors is not None and self.generated > self.max_selectors:
+            raise ExtendLimitExceeded(
+                "@extend generated more than {0} selectors; check for rules "
+                "that extend each other".format(self.max_selectors),
+                rule)
+
+    def apply(self, on_unmatched=None):
+        """Apply every ``@extend``, update each extended rule's ancestry, and
+        return the rules that should be written out: everything except rules
+        made only of placeholders.
+
+        `on_unmatched`, if given, is called with a rule and selector for every
+        ``@extend`` that doesn't match anything.
+        """
+        for rule in self.rules:
+            for selector in rule.extends_selectors:
+                extendable_selectors = self.find_extendable(selector)
+                if not extendable_selectors:
+                    if on_unmatched is not None:
+                        on_unmatched(rule, selector)
+                    continue
+
+                self.extend(rule, selector, extendable_selectors)
+
+        for rule, selectors in self._rule_selectors.items():
+            added = selectors[len(rule.selectors):]
+            if added:
+                rule.ancestry = rule.ancestry.with_more_selectors(added)
+
+        # Remove placeholder-only rules
+        return [rule for rule in self.rules if not rule.is_pure_placeholder]
+
+
+__all__ = ('ExtendLimitExceeded', 'Extender')
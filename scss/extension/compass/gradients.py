@@ -19,6 +19,17 @@ log = logging.getLogger(__name__)
 ns = CompassExtension.namespace
 
 
+class _PrefixedString(String):
+    """An unquoted string with an alternative for each vendor prefix, as
+    functions named like ``to__moz``, which are what `prefix` looks for.
+    """
+    # No __slots__, so the functions can live in the instance dict
+
+    def __init__(self, value, **prefixed):
+        super(_PrefixedString, self).__init__(value, quotes=None)
+        self.__dict__.update(prefixed)
+
+
 def _is_color(value):
     # currentColor is not a Sass color value, but /is/ a CSS color value
     return isinstance(value, Color) or value == String('currentColor')
@@ -264,27 +275,22 @@ def radial_gradient(*args):
         legacy_args.append(shape_and_size)
     legacy_args.extend(rendered_color_stops)
 
-    ret = String.unquoted(
-        'radial-gradient(' + ', '.join(a.render() for a in args) + ')')
+    to__s = 'radial-gradient(' + ', '.join(a.render() for a in args) + ')'
 
     legacy_ret = 'radial-gradient(' + ', '.join(a.render() for a in legacy_args) + ')'
 
     def to__css2():
         return String.unquoted('')
-    ret.to__css2 = to__css2
 
     def to__moz():
         return String.unquoted('-moz-' + legacy_ret)
-    ret.to__moz = to__moz
 
     def to__pie():
         log.warn("PIE does not support radial-gradient.")
         return String.unquoted('-pie-radial-gradient(unsupported)')
-    ret.to__pie = to__pie
 
     def to__webkit():
         return String.unquoted('-webkit-' + legacy_ret)
-    ret.to__webkit = to__webkit
 
     def to__owg():
         args = [
@@ -297,13 +303,19 @@ def radial_gradient(*args):
         args.extend('color-stop(%s, %s)' % (s.render(), c.render()) for s, c in color_stops)
         ret = '-webkit-gradient(' + ', '.join(to_str(a) for a in args or [] if a is not None) + ')'
         return String.unquoted(ret)
-    ret.to__owg = to__owg
 
     def to__svg():
         return radial_svg_gradient(*(list(color_stops) + list(position_and_angle or [String('center')])))
-    ret.to__svg = to__svg
 
-    return ret
+    return _PrefixedString(
+        to__s,
+        to__css2=to__css2,
+        to__moz=to__moz,
+        to__pie=to__pie,
+        to__webkit=to__webkit,
+        to__owg=to__owg,
+        to__svg=to__svg,
+    )
 
 
 @ns.declare
@@ -322,31 +334,24 @@ def linear_gradient(*args):
     args.extend(_render_standard_color_stops(color_stops))
 
     to__s = 'linear-gradient(' + ', '.join(to_str(a) for a in args or [] if a is not None) + ')'
-    ret = String.unquoted(to__s)
 
     def to__css2():
         return String.unquoted('')
-    ret.to__css2 = to__css2
 
     def to__moz():
         return String.unquoted('-moz-' + to__s)
-    ret.to__moz = to__moz
 
     def to__pie():
         return String.unquoted('-pie-' + to__s)
-    ret.to__pie = to__pie
 
     def to__ms():
         return String.unquoted('-ms-' + to__s)
-    ret.to__ms = to__ms
 
     def to__o():
         return String.unquoted('-o-' + to__s)
-    ret.to__o = to__o
 
     def to__webkit():
         return String.unquoted('-webkit-' + to__s)
-    ret.to__webkit = to__webkit
 
     def to__owg():
         args = [
@@ -357,13 +362,21 @@ def linear_gradient(*args):
         args.extend('color-stop(%s, %s)' % (s.render(), c.render()) for s, c in color_stops)
         ret = '-webkit-gradient(' + ', '.join(to_str(a) for a in args if a is not None) + ')'
         return String.unquoted(ret)
-    ret.to__owg = to__owg
 
     def to__svg():
         return linear_svg_gradient(color_stops, position_and_angle or 'top')
-    ret.to__svg = to__svg
 
-    return ret
+    return _PrefixedString(
+        to__s,
+        to__css2=to__css2,
+        to__moz=to__moz,
+        to__pie=to__pie,
+        to__ms=to__ms,
+        to__o=to__o,
+        to__webkit=to__webkit,
+        to__owg=to__owg,
+        to__svg=to__svg,
+    )
 
 
 @ns.declare
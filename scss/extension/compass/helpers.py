@@ -120,9 +120,7 @@ def dash_compass_space_list(*lst):
     If the argument is a list, it will return a new list that is space delimited
     Otherwise it returns a new, single element, space-delimited list.
     """
-    ret = dash_compass_list(*lst)
-    ret.value.pop('_', None)
-    return ret
+    return List(dash_compass_list(*lst), use_comma=False)
 
 
 @ns.declare_alias('-compass-slice')
@@ -70,13 +70,17 @@ class CoreExtension(Extension):
                     # TODO is this what ruby does?
                     continue
 
+                # Already loaded by this compilation; don't read and
+                # prepare it all over again
+                source = compilation.get_loaded_source((origin, relpath))
+                if source is not None:
+                    return source
+
                 path = origin / relpath
                 if not path.exists():
                     continue
 
                 # All good!
-                # TODO if this file has already been imported, we'll do the
-                # source preparation twice.  make it lazy.
                 return SourceFile.read(origin, relpath)
 
 
@@ -104,7 +108,7 @@ def _interpret_percentage(n, relto=1., clamp=True):
     return ret
 
 
-@ns.declare
+@ns.declare_pure
 def rgba(r, g, b, a):
     r = _interpret_percentage(r, relto=255)
     g = _interpret_percentage(g, relto=255)
@@ -114,12 +118,12 @@ def rgba(r, g, b, a):
     return Color.from_rgb(r, g, b, a)
 
 
-@ns.declare
+@ns.declare_pure
 def rgb(r, g, b, type='rgb'):
     return rgba(r, g, b, Number(1.0))
 
 
-@ns.declare
+@ns.declare_pure
 def rgba_(color, a=None):
     if a is None:
         alpha = 1
@@ -129,12 +133,12 @@ def rgba_(color, a=None):
     return Color.from_rgb(*color.rgba[:3], alpha=alpha)
 
 
-@ns.declare
+@ns.declare_pure
 def rgb_(color):
     return rgba_(color, a=Number(1))
 
 
-@ns.declare
+@ns.declare_pure
 def hsla(h, s, l, a):
     return Color.from_hsl(
         h.value / 360 % 1,
@@ -146,22 +150,22 @@ def hsla(h, s, l, a):
     )
 
 
-@ns.declare
+@ns.declare_pure
 def hsl(h, s, l):
     return hsla(h, s, l, Number(1))
 
 
-@ns.declare
+@ns.declare_pure
 def hsla_(color, a=None):
     return rgba_(color, a)
 
 
-@ns.declare
+@ns.declare_pure
 def hsl_(color):
     return rgba_(color, a=Number(1))
 
 
-@ns.declare
+@ns.declare_pure
 def mix(color1, color2, weight=Number(50, "%")):
     """
     Mixes together two colors. Specifically, takes the average of each of the
@@ -239,49 +243,49 @@ def mix(color1, color2, weight=Number(50, "%")):
 # ------------------------------------------------------------------------------
 # Color inspection
 
-@ns.declare
+@ns.declare_pure
 def red(color):
     r, g, b, a = color.rgba
     return Number(r * 255)
 
 
-@ns.declare
+@ns.declare_pure
 def green(color):
     r, g, b, a = color.rgba
     return Number(g * 255)
 
 
-@ns.declare
+@ns.declare_pure
 def blue(color):
     r, g, b, a = color.rgba
     return Number(b * 255)
 
 
 @ns.declare_alias('opacity')
-@ns.declare
+@ns.declare_pure
 def alpha(color):
     return Number(color.alpha)
 
 
-@ns.declare
+@ns.declare_pure
 def hue(color):
     h, s, l = color.hsl
     return Number(h * 360, "deg")
 
 
-@ns.declare
+@ns.declare_pure
 def saturation(color):
     h, s, l = color.hsl
     return Number(s * 100, "%")
 
 
-@ns.declare
+@ns.declare_pure
 def lightness(color):
     h, s, l = color.hsl
     return Number(l * 100, "%")
 
 
-@ns.declare
+@ns.declare_pure
 def ie_hex_str(color):
     c = Color(color).value
     return String("#{3:02X}{0:02X}{1:02X}{2:02X}".format(
@@ -297,7 +301,7 @@ def ie_hex_str(color):
 
 @ns.declare_alias('fade-in')
 @ns.declare_alias('fadein')
-@ns.declare
+@ns.declare_pure
 def opacify(color, amount):
     r, g, b, a = color.rgba
     if amount.is_simple_unit('%'):
@@ -311,7 +315,7 @@ def opacify(color, amount):
 
 @ns.declare_alias('fade-out')
 @ns.declare_alias('fadeout')
-@ns.declare
+@ns.declare_pure
 def transparentize(color, amount):
     r, g, b, a = color.rgba
     if amount.is_simple_unit('%'):
@@ -323,33 +327,33 @@ def transparentize(color, amount):
         alpha=a - amt)
 
 
-@ns.declare
+@ns.declare_pure
 def lighten(color, amount):
     return adjust_color(color, lightness=amount)
 
 
-@ns.declare
+@ns.declare_pure
 def darken(color, amount):
     return adjust_color(color, lightness=-amount)
 
 
-@ns.declare
+@ns.declare_pure
 def saturate(color, amount):
     return adjust_color(color, saturation=amount)
 
 
-@ns.declare
+@ns.declare_pure
 def desaturate(color, amount):
     return adjust_color(color, saturation=-amount)
 
 
-@ns.declare
+@ns.declare_pure
 def greyscale(color):
     h, s, l = color.hsl
     return Color.from_hsl(h, 0, l, alpha=color.alpha)
 
 
-@ns.declare
+@ns.declare_pure
 def grayscale(color):
     if isinstance(color, Number):
         # grayscale(n) and grayscale(n%) are CSS3 filters and should be left
@@ -360,20 +364,20 @@ def grayscale(color):
 
 
 @ns.declare_alias('spin')
-@ns.declare
+@ns.declare_pure
 def adjust_hue(color, degrees):
     h, s, l = color.hsl
     delta = degrees.value / 360
     return Color.from_hsl((h + delta) % 1, s, l, alpha=color.alpha)
 
 
-@ns.declare
+@ns.declare_pure
 def complement(color):
     h, s, l = color.hsl
     return Color.from_hsl((h + 0.5) % 1, s, l, alpha=color.alpha)
 
 
-@ns.declare
+@ns.declare_pure
 def invert(color):
     """Returns the inverse (negative) of a color.  The red, green, and blue
     values are inverted, while the opacity is left alone.
@@ -388,27 +392,27 @@ def invert(color):
     return Color.from_rgb(1 - r, 1 - g, 1 - b, alpha=a)
 
 
-@ns.declare
+@ns.declare_pure
 def adjust_lightness(color, amount):
     return adjust_color(color, lightness=amount)
 
 
-@ns.declare
+@ns.declare_pure
 def adjust_saturation(color, amount):
     return adjust_color(color, saturation=amount)
 
 
-@ns.declare
+@ns.declare_pure
 def scale_lightness(color, amount):
     return scale_color(color, lightness=amount)
 
 
-@ns.declare
+@ns.declare_pure
 def scale_saturation(color, amount):
     return scale_color(color, saturation=amount)
 
 
-@ns.declare
+@ns.declare_pure
 def adjust_color(
         color, red=None, green=None, blue=None,
         hue=None, saturation=None, lightness=None, alpha=None):
@@ -454,7 +458,7 @@ def _scale_channel(channel, scaleby):
         return channel * (1 + factor)
 
 
-@ns.declare
+@ns.declare_pure
 def scale_color(
         color, red=None, green=None, blue=None,
         saturation=None, lightness=None, alpha=None):
@@ -480,7 +484,7 @@ def scale_color(
         return Color.from_hsl(*channels, alpha=scaled_alpha)
 
 
-@ns.declare
+@ns.declare_pure
 def change_color(
         color, red=None, green=None, blue=None,
         hue=None, saturation=None, lightness=None, alpha=None):
@@ -526,7 +530,7 @@ def change_color(
 
 @ns.declare_alias('e')
 @ns.declare_alias('escape')
-@ns.declare
+@ns.declare_pure
 def unquote(*args):
     arg = List.from_maybe_starargs(args).maybe()
 
@@ -536,7 +540,7 @@ def unquote(*args):
         return String(arg.render(), quotes=None)
 
 
-@ns.declare
+@ns.declare_pure
 def quote(*args):
     arg = List.from_maybe_starargs(args).maybe()
 
@@ -546,7 +550,7 @@ def quote(*args):
         return String(arg.render(), quotes='"')
 
 
-@ns.declare
+@ns.declare_pure
 def str_length(string):
     expect_type(string, String)
 
@@ -557,7 +561,7 @@ def str_length(string):
 
 # TODO this and several others should probably also require integers
 # TODO and assert that the indexes are valid
-@ns.declare
+@ns.declare_pure
 def str_insert(string, insert, index):
     expect_type(string, String)
     expect_type(insert, String)
@@ -569,7 +573,7 @@ def str_insert(string, insert, index):
         quotes=string.quotes)
 
 
-@ns.declare
+@ns.declare_pure
 def str_index(string, substring):
     expect_type(string, String)
     expect_type(substring, String)
@@ -578,7 +582,7 @@ def str_index(string, substring):
     return Number(string.value.find(substring.value) + 1)
 
 
-@ns.declare
+@ns.declare_pure
 def str_slice(string, start_at, end_at=None):
     expect_type(string, String)
     expect_type(start_at, Number, unit=None)
@@ -600,14 +604,14 @@ def str_slice(string, start_at, end_at=None):
         quotes=string.quotes)
 
 
-@ns.declare
+@ns.declare_pure
 def to_upper_case(string):
     expect_type(string, String)
 
     return String(string.value.upper(), quotes=string.quotes)
 
 
-@ns.declare
+@ns.declare_pure
 def to_lower_case(string):
     expect_type(string, String)
 
@@ -617,16 +621,22 @@ def to_lower_case(string):
 # ------------------------------------------------------------------------------
 # Number functions
 
-@ns.declare
+@ns.declare_pure
 def percentage(value):
     expect_type(value, Number, unit=None)
     return value * Number(100, unit='%')
 
 
-ns.set_function('abs', 1, Number.wrap_python_function(abs))
-ns.set_function('round', 1, Number.wrap_python_function(round))
-ns.set_function('ceil', 1, Number.wrap_python_function(math.ceil))
-ns.set_function('floor', 1, Number.wrap_python_function(math.floor))
+def _wrap_pure(fn):
+    wrapped = Number.wrap_python_function(fn)
+    wrapped._pyscss_pure = True
+    return wrapped
+
+
+ns.set_function('abs', 1, _wrap_pure(abs))
+ns.set_function('round', 1, _wrap_pure(round))
+ns.set_function('ceil', 1, _wrap_pure(math.ceil))
+ns.set_function('floor', 1, _wrap_pure(math.floor))
 
 
 # ------------------------------------------------------------------------------
@@ -634,14 +644,14 @@ ns.set_function('floor', 1, Number.wrap_python_function(math.floor))
 
 # TODO get the compass bit outta here
 @ns.declare_alias('-compass-list-size')
-@ns.declare
+@ns.declare_pure
 def length(*lst):
     if len(lst) == 1 and isinstance(lst[0], (list, tuple, List)):
         lst = lst[0]
     return Number(len(lst))
 
 
-@ns.declare
+@ns.declare_pure
 def set_nth(list, n, value):
     expect_type(n, Number, unit=None)
 
@@ -653,7 +663,7 @@ def set_nth(list, n, value):
 
 # TODO get the compass bit outta here
 @ns.declare_alias('-compass-nth')
-@ns.declare
+@ns.declare_pure
 def nth(lst, n):
     """Return the nth item in the list."""
     expect_type(n, (String, Number), unit=None)
@@ -672,7 +682,7 @@ def nth(lst, n):
     return lst[i]
 
 
-@ns.declare
+@ns.declare_pure
 def join(lst1, lst2, separator=String.unquoted('auto')):
     expect_type(separator, String)
 
@@ -700,21 +710,21 @@ def join(lst1, lst2, separator=String.unquoted('auto')):
     return List(ret, use_comma=use_comma)
 
 
-@ns.declare
+@ns.declare_pure
 def min_(*lst):
     if len(lst) == 1 and isinstance(lst[0], (list, tuple, List)):
         lst = lst[0]
     return min(lst)
 
 
-@ns.declare
+@ns.declare_pure
 def max_(*lst):
     if len(lst) == 1 and isinstance(lst[0], (list, tuple, List)):
         lst = lst[0]
     return max(lst)
 
 
-@ns.declare
+@ns.declare_pure
 def append(lst, val, separator=String.unquoted('auto')):
     expect_type(separator, String)
 
@@ -738,7 +748,7 @@ def append(lst, val, separator=String.unquoted('auto')):
     return List(ret, use_comma=use_comma)
 
 
-@ns.declare
+@ns.declare_pure
 def index(lst, val):
     for i in xrange(len(lst)):
         if lst.value[i] == val:
@@ -746,7 +756,7 @@ def index(lst, val):
     return Boolean(False)
 
 
-@ns.declare
+@ns.declare_pure
 def zip_(*lists):
     return List(
         [List(zipped) for zipped in zip(*lists)],
@@ -754,7 +764,7 @@ def zip_(*lists):
 
 
 # TODO need a way to use "list" as the arg name without shadowing the builtin
-@ns.declare
+@ns.declare_pure
 def list_separator(list):
     if list.use_comma:
         return String.unquoted('comma')
@@ -765,63 +775,63 @@ def list_separator(list):
 # ------------------------------------------------------------------------------
 # Map functions
 
-@ns.declare
+@ns.declare_pure
 def map_get(map, key):
-    return map.to_dict().get(key, Null())
+    return map.get(key, Null())
 
 
-@ns.declare
+@ns.declare_pure
 def map_merge(*maps):
-    key_order = []
-    index = {}
-    for map in maps:
-        for key, value in map.to_pairs():
-            if key not in index:
-                key_order.append(key)
-
-            index[key] = value
-
-    pairs = [(key, index[key]) for key in key_order]
-    return Map(pairs, index=index)
+    if not maps:
+        return Map(())
+
+    # Merging into the same map repeatedly, as when building one up a key at
+    # a time, shares storage instead of copying the map every time
+    ret = maps[0]
+    if not isinstance(ret, Map):
+        ret = Map(ret.to_pairs())
+    for map in maps[1:]:
+        ret = ret.merge(map)
+    return ret
 
 
-@ns.declare
+@ns.declare_pure
 def map_keys(map):
     return List(
         [k for (k, v) in map.to_pairs()],
         use_comma=True)
 
 
-@ns.declare
+@ns.declare_pure
 def map_values(map):
     return List(
         [v for (k, v) in map.to_pairs()],
         use_comma=True)
 
 
-@ns.declare
+@ns.declare_pure
 def map_has_key(map, key):
-    return Boolean(key in map.to_dict())
+    return Boolean(map.get(key) is not None)
 
 
 # DEVIATIONS: these do not exist in ruby sass
 
-@ns.declare
+@ns.declare_pure
 def map_get3(map, key, default):
-    return map.to_dict().get(key, default)
+    return map.get(key, default)
 
 
-@ns.declare
+@ns.declare_pure
 def map_get_nested3(map, keys, default=Null()):
     for key in keys:
-        map = map.to_dict().get(key, None)
+        map = map.get(key)
         if map is None:
             return default
 
     return map
 
 
-@ns.declare
+@ns.declare_pure
 def map_merge_deep(*maps):
     pairs = []
     keys = set()
@@ -830,7 +840,7 @@ def map_merge_deep(*maps):
             keys.add(key)
 
     for key in keys:
-        values = [map.to_dict().get(key, None) for map in maps]
+        values = [map.get(key) for map in maps]
         values = [v for v in values if v is not None]
         if all(isinstance(v, Map) for v in values):
             pairs.append((key, map_merge_deep(*values)))
@@ -901,17 +911,17 @@ def mixin_exists(namespace, name):
     return Boolean(False)
 
 
-@ns.declare
+@ns.declare_pure
 def inspect(value):
     return String.unquoted(value.render())
 
 
-@ns.declare
+@ns.declare_pure
 def type_of(obj):  # -> bool, number, string, color, list
     return String(obj.sass_type_name)
 
 
-@ns.declare
+@ns.declare_pure
 def unit(number):  # -> px, em, cm, etc.
     numer = '*'.join(sorted(number.unit_numer))
     denom = '*'.join(sorted(number.unit_denom))
@@ -923,7 +933,7 @@ def unit(number):  # -> px, em, cm, etc.
     return String.unquoted(ret)
 
 
-@ns.declare
+@ns.declare_pure
 def unitless(value):
     if not isinstance(value, Number):
         raise TypeError("Expected number, got %r" % (value,))
@@ -931,7 +941,7 @@ def unitless(value):
     return Boolean(value.is_unitless)
 
 
-@ns.declare
+@ns.declare_pure
 def comparable(number1, number2):
     left = number1.to_base_units()
     right = number2.to_base_units()
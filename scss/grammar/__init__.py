@@ -4,6 +4,8 @@ in some fashion.
 from .scanner import NoMoreTokens
 from .scanner import Parser
 from .scanner import Scanner
+from .scanner import locate_block_tree
 from .scanner import locate_blocks
 
-__all__ = ('NoMoreTokens', 'Parser', 'Scanner', 'locate_blocks')
+__all__ = (
+    'NoMoreTokens', 'Parser', 'Scanner', 'locate_block_tree', 'locate_blocks')
@@ -0,0 +1,101 @@
+"""Hand-written operator-precedence parser for Sass expressions.
+
+The parser generated from ``expression.g`` has a rule, and so a method call,
+for each level of precedence, and every operand passes through all of them on
+the way down to an atom, peeking at the next token again at every level on the
+way back up.  :class:`PrattSassExpression` replaces those rules with a single
+Pratt (precedence-climbing) loop, and inherits everything else -- atoms,
+strings, interpolations, argument lists -- from the generated parser.
+
+It produces the same trees and the same errors.  The scanner decides what a
+token is by what the parser asks for the first time it peeks at it, so this
+asks with exactly the same sets of tokens, in the same places, as the
+generated rules would.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import operator
+
+from scss.ast import AllOp
+from scss.ast import AnyOp
+from scss.ast import BinaryOp
+from scss.ast import NotOp
+from scss.ast import UnaryOp
+from scss.grammar.expression import SassExpression
+
+
+# Precedence levels, loosest first, matching the rules in expression.g
+_OR = 1         # or_expr
+_AND = 2        # and_expr
+_NOT = 3        # not_expr, and comparison
+_ADD = 4        # a_expr
+_MUL = 5        # m_expr
+_UNARY = 6      # u_expr
+
+# Maps each binary operator token to its level and how to build its node
+_binary_operators = {
+    'OR': (_OR, AnyOp),
+    'AND': (_AND, AllOp),
+    'LT': (_NOT, lambda left, right: BinaryOp(operator.lt, left, right)),
+    'GT': (_NOT, lambda left, right: BinaryOp(operator.gt, left, right)),
+    'LE': (_NOT, lambda left, right: BinaryOp(operator.le, left, right)),
+    'GE': (_NOT, lambda left, right: BinaryOp(operator.ge, left, right)),
+    'EQ': (_NOT, lambda left, right: BinaryOp(operator.eq, left, right)),
+    'NE': (_NOT, lambda left, right: BinaryOp(operator.ne, left, right)),
+    'ADD': (_ADD, lambda left, right: BinaryOp(operator.add, left, right)),
+    'SUB': (_ADD, lambda left, right: BinaryOp(operator.sub, left, right)),
+    'MUL': (_MUL, lambda left, right: BinaryOp(operator.mul, left, right)),
+    'DIV': (_MUL, lambda left, right: BinaryOp(operator.truediv, left, right)),
+    'MOD': (_MUL, lambda left, right: BinaryOp(operator.mod, left, right)),
+}
+
+
+class PrattSassExpression(SassExpression):
+    """Drop-in replacement for the generated :class:`SassExpression` parser,
+    with the same goals.
+    """
+    def or_expr(self):
+        return self._operation(_OR)
+
+    def _operation(self, level):
+        """Parse operators at `level` or tighter, and their operands."""
+        if level <= _NOT:
+            # Where the grammar has a not_expr
+            token = self._peek(self.argspec_item_chks)
+            if token == 'NOT':
+                self._scan('NOT')
+                left = NotOp(self._operation(_NOT))
+            else:
+                left = self._unary(token)
+        else:
+            left = self._unary(self._peek(self.u_expr_rsts))
+
+        binary_operators = _binary_operators
+        while True:
+            # Every rule peeks here after an operand; m_expr is the first
+            token = self._peek(self.m_expr_rsts)
+            try:
+                token_level, make_node = binary_operators[token]
+            except KeyError:
+                return left
+            if token_level < level:
+                return left
+
+            self._scan(token)
+            left = make_node(left, self._operation(token_level + 1))
+
+    def _unary(self, token):
+        """Parse a u_expr, given the token at its start."""
+        if token == 'SIGN':
+            self._scan('SIGN')
+            return UnaryOp(operator.neg, self._unary(self._peek(self.u_expr_rsts)))
+        elif token == 'ADD':
+            self._scan('ADD')
+            return UnaryOp(operator.pos, self._unary(self._peek(self.u_expr_rsts)))
+        else:
+            return self.atom()
+
+
+__all__ = ('PrattSassExpression',)
@@ -12,13 +12,14 @@ from scss.errors import SassSyntaxError
 DEBUG = False
 
 
+# Regex for finding a minimum set of characters that might affect where a
+# block starts or ends
+_blocks_re = re.compile(r'[{},;()\'"\n]|\\.', re.DOTALL)
+
+
 try:
     from ._scanner import locate_blocks
 except ImportError:
-    # Regex for finding a minimum set of characters that might affect where a
-    # block starts or ends
-    _blocks_re = re.compile(r'[{},;()\'"\n]|\\.', re.DOTALL)
-
     def locate_blocks(codestr):
         """
         For processing CSS like strings.
@@ -118,6 +119,141 @@ except ImportError:
                 yield lineno, _property, None
 
 
+try:
+    # Only in newer builds of the C module
+    from ._scanner import locate_block_tree
+except ImportError:
+    def locate_block_tree(codestr):
+        """Find every block in `codestr`, including blocks nested within
+        blocks, in a single pass.
+
+        Returns a list of ``(lineno, selectors or property, body)`` tuples, one
+        for each item `locate_blocks` would yield, in the same order.  `body`
+        is None for a property; otherwise it's a 3-tuple of the start and end
+        offsets of the block's (stripped) contents within `codestr`, and a list
+        like this one describing those contents.  Line numbers are relative to
+        the start of the contents they appear in, just as if those contents had
+        been passed to `locate_blocks` on their own.
+        """
+        lineno = 1
+        par = 0
+        instr = None
+        # Position of the last backslash escape, which may eat a newline
+        escape = None
+
+        # State for the body currently being scanned; the same as in
+        # `locate_blocks`, plus `base`, the line just before the body starts.
+        # `depth` only counts braces from interpolations, since real blocks
+        # start a new body.
+        base = 0
+        body_start = 0
+        depth = 0
+        init = lose = 0
+        start = None
+        items = []
+        # Saved state of each body containing the current one, and the line the
+        # current body's block started on
+        stack = []
+
+        for m in _blocks_re.finditer(codestr):
+            i = m.start(0)
+            c = codestr[i]
+            if c == '\n':
+                lineno += 1
+
+            if c == '\\':
+                # Escape, also consumes the next character
+                escape = i
+            elif instr is not None:
+                if c == instr:
+                    instr = None  # A string ends (FIXME: needs to accept escaped characters)
+            elif c in ('"', "'"):
+                instr = c  # A string starts
+            elif c == '(':  # parenthesis begins:
+                par += 1
+            elif c == ')':  # parenthesis ends:
+                par -= 1
+            elif par:
+                # Nothing else counts within parentheses
+                pass
+            elif c == '{':
+                if depth == 0 and not (i > 0 and codestr[i - 1] == '#'):
+                    # A block begins, so the body starts right after the brace
+                    start = i
+                    if lose < init:
+                        _property = codestr[lose:init].strip()
+                        if _property:
+                            items.append((lineno - base, _property, None))
+                        lose = init
+                    stack.append((base, body_start, init, lose, start, items, lineno))
+
+                    body_start = i + 1
+                    while body_start < len(codestr) and codestr[body_start].isspace():
+                        body_start += 1
+                    base = lineno + codestr.count('\n', i + 1, body_start) - 1
+                    init = lose = body_start
+                    items = []
+                else:
+                    # Do not process #{...} as blocks!
+                    depth += 1
+            elif c == '}':
+                if depth > 0:
+                    depth -= 1
+                elif not stack:
+                    raise SyntaxError("Unexpected closing brace on line {0}".format(lineno))
+                else:
+                    # The current body ends
+                    body_end = i
+                    while body_end > body_start and codestr[body_end - 1].isspace():
+                        body_end -= 1
+                    trailing_lines = codestr.count('\n', body_end, i)
+                    if escape == body_end - 1 and codestr[body_end] == '\n':
+                        trailing_lines -= 1
+                    _add_trailing_properties(
+                        items, codestr[lose:body_end],
+                        lineno - trailing_lines - base)
+                    body = body_start, body_end, items
+
+                    (base, body_start, init, lose, start, items,
+                        block_lineno) = stack.pop()
+                    _selectors = codestr[init:start].strip()
+                    if _selectors:
+                        items.append((block_lineno - base, _selectors, body))
+                    init = lose = i + 1
+            elif depth == 0 and c == ';':  # End of property (or block):
+                init = i
+                if lose < init:
+                    _property = codestr[lose:init].strip()
+                    if _property:
+                        items.append((lineno - base, _property, None))
+                    init = lose = i + 1
+
+        if stack:
+            if par:
+                error = "Parentheses never closed"
+            elif instr:
+                error = "String literal never terminated"
+            else:
+                error = "Block never closed"
+            # Name the innermost block left open, which may be nested deep
+            # within the file
+            raise SyntaxError(
+                "Couldn't parse block starting on line {0}: {1}"
+                .format(stack[-1][6], error)
+            )
+
+        _add_trailing_properties(items, codestr[lose:], lineno)
+        return items
+
+
+def _add_trailing_properties(items, losestr, lineno):
+    for _property in losestr.split(';'):
+        _property = _property.strip()
+        lineno += _property.count('\n')
+        if _property:
+            items.append((lineno, _property, None))
+
+
 ################################################################################
 # Parser
 
@@ -166,6 +302,10 @@ except ImportError:
 try:
     from ._scanner import Scanner
 except ImportError:
+    # Flags given at the start of a pattern, which have to apply only to that
+    # pattern once it's combined with others
+    _global_flags_re = re.compile(r'^\(\?([aiLmsux]+)\)')
+
     class Scanner(object):
         def __init__(self, patterns, ignore, input=None):
             """
@@ -183,6 +323,11 @@ except ImportError:
                 self.patterns = []
                 for k, r in patterns:
                     self.patterns.append((k, re.compile(r)))
+                self._matchers = {}
+            elif '_matchers' not in type(self).__dict__:
+                # The class's patterns are shared by all its instances, and
+                # so are the matchers built from them
+                type(self)._matchers = {}
 
         def reset(self, input):
             self.tokens = []
@@ -199,6 +344,34 @@ except ImportError:
                 output = "%s\n  (@%s)  %s  =  %s" % (output, t[0], t[2], repr(t[3]))
             return output
 
+        def _matcher(self, restrict):
+            """Return a single regex that tries every pattern allowed by
+            `restrict` (plus the ignored ones) in order, and a dict mapping
+            the number of the group around each pattern to its terminal.
+            Built once per set of restrictions.
+            """
+            try:
+                return self._matchers[restrict]
+            except KeyError:
+                pass
+
+            alternatives = []
+            for i, (tok, regex) in enumerate(self.patterns):
+                if restrict and tok not in restrict and tok not in self.ignore:
+                    continue
+                pattern = _global_flags_re.sub(r'(?\1:', regex.pattern)
+                if pattern != regex.pattern:
+                    pattern += ')'
+                alternatives.append((i, tok, pattern))
+
+            combined = re.compile('|'.join(
+                '(?P<_%d>%s)' % (i, pattern) for i, _, pattern in alternatives))
+            terminals = dict(
+                (combined.groupindex['_%d' % i], tok)
+                for i, tok, _ in alternatives)
+            self._matchers[restrict] = combined, terminals
+            return combined, terminals
+
         def _scan(self, restrict):
             """
             Should scan another token and add it to the list, self.tokens,
@@ -208,55 +381,42 @@ except ImportError:
             if DEBUG:
                 print()
                 print("Being asked to match with restriction:", repr(restrict))
-            token = None
+            matcher, terminals = self._matcher(restrict)
             while True:
-                best_pat = None
-                # Search the patterns for a match, with earlier
-                # tokens in the list having preference
-                best_pat_len = 0
-                for tok, regex in self.patterns:
-                    if DEBUG:
-                        print("\tTrying %s: %s at pos %d -> %s" % (repr(tok), repr(regex.pattern), self.pos, repr(self.input)))
-                    # First check to see if we're restricting to this token
-                    if restrict and tok not in restrict and tok not in self.ignore:
-                        if DEBUG:
-                            print("\tSkipping %r!" % (tok,))
-                        continue
-                    m = regex.match(self.input, self.pos)
-                    if m:
-                        # We got a match
-                        best_pat = tok
-                        best_pat_len = len(m.group(0))
-                        if DEBUG:
-                            print("Match OK! %s: %s at pos %d" % (repr(tok), repr(regex.pattern), self.pos))
-                        break
+                # Patterns earlier in the list have preference, which the
+                # order of the alternatives takes care of
+                m = matcher.match(self.input, self.pos)
 
                 # If we didn't find anything, raise an error
-                if best_pat is None:
+                if m is None:
                     raise SassSyntaxError(self.input, self.pos, restrict)
 
+                # The group around the whole pattern closes last
+                best_pat = terminals[m.lastindex]
+                if DEBUG:
+                    print("Match OK! %s at pos %d" % (repr(best_pat), self.pos))
+
                 # If we found something that isn't to be ignored, return it
                 if best_pat in self.ignore:
                     # This token should be ignored...
-                    self.pos += best_pat_len
+                    self.pos = m.end()
                 else:
-                    end_pos = self.pos + best_pat_len
                     # Create a token with this data
                     token = (
                         self.pos,
-                        end_pos,
+                        m.end(),
                         best_pat,
-                        self.input[self.pos:end_pos]
+                        m.group(),
                     )
                     break
-            if token is not None:
-                self.pos = token[1]
-                # Only add this token if it's not in the list
-                # (to prevent looping)
-                if not self.tokens or token != self.tokens[-1]:
-                    self.tokens.append(token)
-                    self.restrictions.append(restrict)
-                    return 1
+
+            self.pos = token[1]
+            # Only add this token if it's not in the list
+            # (to prevent looping)
+            if not self.tokens or token != self.tokens[-1]:
+                self.tokens.append(token)
+                self.restrictions.append(restrict)
+                return 1
             return 0
 
         def token(self, i, restrict=None):
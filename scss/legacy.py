@@ -92,6 +92,52 @@ class Scss(object):
 
         This method is DEPRECATED; see :mod:`scss.compiler` instead.
         """
+        compiler = self.make_compiler(
+            super_selector=super_selector,
+            import_static_css=import_static_css,
+        )
+        # Gonna add the source files manually
+        compilation = compiler.make_compilation()
+
+        # Inject the files we know about
+        # TODO how does this work with the expectation of absoluteness
+        if source_files is not None:
+            for source in source_files:
+                compilation.add_source(source)
+        elif scss_string is not None:
+            source = SourceFile.from_string(
+                scss_string,
+                relpath=filename,
+                is_sass=is_sass,
+            )
+            compilation.add_source(source)
+        elif scss_file is not None:
+            # This is now the only way to allow forcibly overriding the
+            # filename a source "thinks" it is
+            with open(scss_file, 'rb') as f:
+                source = SourceFile.from_file(
+                    f,
+                    relpath=filename or scss_file,
+                    is_sass=is_sass,
+                )
+            compilation.add_source(source)
+
+        # Plus the ones from the constructor
+        if self._scss_files:
+            for name, contents in list(self._scss_files.items()):
+                source = SourceFile.from_string(contents, relpath=name)
+                compilation.add_source(source)
+
+        compiled = compiler.call_and_catch_errors(compilation.run)
+        self.source_files = list(SourceFileTuple(*os.path.split(s.path)) for s in compilation.source_index.values())
+        self.source_map = compilation.source_map
+        self.stats = compilation.stats
+        return compiled
+
+    def make_compiler(self, super_selector=None, import_static_css=False):
+        """Build a :class:`scss.compiler.Compiler` configured from this
+        object's options and the global configuration, as `compile` uses.
+        """
         # Derive our root namespace
         self.scss_vars = _default_scss_vars.copy()
         if self._scss_vars is not None:
@@ -153,42 +199,9 @@ class Scss(object):
             loops_have_own_scopes=config.CONTROL_SCOPING,
             undefined_variables_fatal=config.FATAL_UNDEFINED,
             super_selector=super_selector or self.super_selector,
+            collect_stats=self._scss_opts.get('stats', False),
         )
-        # Gonna add the source files manually
-        compilation = compiler.make_compilation()
-
-        # Inject the files we know about
-        # TODO how does this work with the expectation of absoluteness
-        if source_files is not None:
-            for source in source_files:
-                compilation.add_source(source)
-        elif scss_string is not None:
-            source = SourceFile.from_string(
-                scss_string,
-                relpath=filename,
-                is_sass=is_sass,
-            )
-            compilation.add_source(source)
-        elif scss_file is not None:
-            # This is now the only way to allow forcibly overriding the
-            # filename a source "thinks" it is
-            with open(scss_file, 'rb') as f:
-                source = SourceFile.from_file(
-                    f,
-                    relpath=filename or scss_file,
-                    is_sass=is_sass,
-                )
-            compilation.add_source(source)
-
-        # Plus the ones from the constructor
-        if self._scss_files:
-            for name, contents in list(self._scss_files.items()):
-                source = SourceFile.from_string(contents, relpath=name)
-                compilation.add_source(source)
-
-        compiled = compiler.call_and_catch_errors(compilation.run)
-        self.source_files = list(SourceFileTuple(*os.path.split(s.path)) for s in compilation.source_index.values())
-        return compiled
+        return compiler
 
     # Old, old alias
     Compilation = compile
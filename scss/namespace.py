@@ -3,7 +3,9 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import functools
 import inspect
+import itertools
 import logging
 
 import six
@@ -20,34 +22,82 @@ def normalize_var(name):
     return name.replace('_', '-')
 
 
+# Each time a name is bound in a scope where it wasn't before, it's given a new
+# stamp here.  Scopes remember where they last found a name along with its
+# stamp, so a lookup only walks the chain again once that name has been bound
+# somewhere new.
+_binding_stamps = {}
+_next_stamp = functools.partial(next, itertools.count(1))
+
+
 class Scope(object):
     """Implements Sass variable scoping.
 
     Similar to `ChainMap`, except that assigning a new value will replace an
     existing value, not mask it.
+
+    Where each name was found is cached, so dicts passed in must only be
+    changed through a scope.
     """
     def __init__(self, maps=()):
         maps = list(maps)
         self.maps = [dict()] + maps
+        # The scope this one was created from with `new_child`, whose chain is
+        # the same as this one's after the first map
+        self._parent = None
+        # Maps names to their stamp when last looked up, and the dict they
+        # were found in (or None)
+        self._found = {}
 
     def __repr__(self):
         return "<%s(%s) at 0x%x>" % (type(self).__name__, ', '.join(repr(map) for map in self.maps), id(self))
 
-    def __getitem__(self, key):
-        for map in self.maps:
-            if key in map:
-                return map[key]
+    def _find(self, key):
+        """Return the dict that `key` is bound in, or None."""
+        maps = self.maps
+        if key in maps[0]:
+            return maps[0]
+
+        stamp = _binding_stamps.get(key, 0)
+        found = self._found.get(key)
+        if found is not None and found[0] == stamp:
+            return found[1]
+
+        # Siblings (like successive iterations of a loop) share a parent, so
+        # ask it before walking the whole chain
+        parent = self._parent
+        if parent is not None:
+            found = parent._found.get(key)
+            if found is not None and found[0] == stamp:
+                self._found[key] = found
+                return found[1]
+
+        found = None
+        for map in maps[1:]:
+            if isinstance(map, Scope):
+                found = map._find(key)
+                if found is not None:
+                    break
+            elif key in map:
+                found = map
+                break
+
+        self._found[key] = entry = stamp, found
+        if parent is not None:
+            parent._found[key] = entry
+        return found
 
-        raise KeyError(key)
+    def __getitem__(self, key):
+        map = self._find(key)
+        if map is None:
+            raise KeyError(key)
+        return map[key]
 
     def __setitem__(self, key, value):
         self.set(key, value)
 
     def __contains__(self, key):
-        for map in self.maps:
-            if key in map:
-                return True
-        return False
+        return self._find(key) is not None
 
     def keys(self):
         # For mapping interface
@@ -58,17 +108,20 @@ class Scope(object):
 
     def set(self, key, value, force_local=False):
         if not force_local:
-            for map in self.maps:
-                if key in map:
-                    if isinstance(map[key], Undefined):
-                        break
-                    map[key] = value
-                    return
+            map = self._find(key)
+            if map is not None and not isinstance(map[key], Undefined):
+                map[key] = value
+                return
 
-        self.maps[0][key] = value
+        local = self.maps[0]
+        if key not in local:
+            _binding_stamps[key] = _next_stamp()
+        local[key] = value
 
     def new_child(self):
-        return type(self)(self.maps)
+        child = type(self)(self.maps)
+        child._parent = self
+        return child
 
 
 class VariableScope(Scope):
@@ -76,6 +129,21 @@ class VariableScope(Scope):
 
 
 class FunctionScope(Scope):
+    # Changes whenever a function is defined anywhere, so resolved calls (see
+    # `Namespace.resolve_function`) can tell when they might be out of date
+    generation = 0
+
+    def __init__(self, maps=()):
+        super(FunctionScope, self).__init__(maps)
+        # Maps (name, arity) to what `Namespace.resolve_function` returned, as
+        # of `_resolved_generation`
+        self._resolved = {}
+        self._resolved_generation = None
+
+    def set(self, key, value, force_local=False):
+        super(FunctionScope, self).set(key, value, force_local)
+        FunctionScope.generation = _next_stamp()
+
     def __repr__(self):
         return "<%s(%s) at 0x%x>" % (type(self).__name__, ', '.join('[%s]' % ', '.join('%s:%s' % (f, n) for f, n in sorted(map.keys())) for map in self.maps), id(self))
 
@@ -89,9 +157,44 @@ class ImportScope(Scope):
     pass
 
 
+class _SharedScope(object):
+    """One of a namespace's scopes.  A namespace made by `Namespace.derive`
+    has no scopes of its own at first, and reads through to its parent's,
+    until it first writes; most blocks never define anything, so most
+    namespaces never need scopes of their own.
+
+    The scope actually belonging to a namespace, or None, is stored in the
+    instance attribute `attr`.
+    """
+    def __init__(self, attr):
+        self.attr = attr
+
+    def __get__(self, namespace, cls):
+        if namespace is None:
+            return self
+
+        attr = self.attr
+        scope = namespace.__dict__[attr]
+        while scope is None:
+            namespace = namespace._parent
+            scope = namespace.__dict__[attr]
+        return scope
+
+    def __set__(self, namespace, scope):
+        namespace.__dict__[self.attr] = scope
+
+
 class Namespace(object):
     """..."""
     _mutable = True
+    # The namespace this one was derived from, whose scopes are used until
+    # this one writes to its own
+    _parent = None
+
+    _variables = _SharedScope('_own_variables')
+    _functions = _SharedScope('_own_functions')
+    _mixins = _SharedScope('_own_mixins')
+    _imports = _SharedScope('_own_imports')
 
     def __init__(self, variables=None, functions=None, mixins=None, mutable=True):
         self._mutable = mutable
@@ -116,14 +219,29 @@ class Namespace(object):
         if not self._mutable:
             raise AttributeError("This Namespace instance is immutable")
 
+    def _own_scope(self, attr):
+        """Return the scope stored in `attr` that belongs to this namespace,
+        creating it first if this namespace has been sharing its parent's.
+        """
+        scope = self.__dict__[attr]
+        if scope is None:
+            # The parent needs its own scope too, or anything it defined
+            # later would be invisible from here
+            scope = self._parent._own_scope(attr).new_child()
+            self.__dict__[attr] = scope
+        return scope
+
     @classmethod
     def derive_from(cls, *others):
-        self = cls()
+        # Every scope is replaced below, so skip creating the defaults
+        self = cls.__new__(cls)
         if len(others) == 1:
-            self._variables = others[0]._variables.new_child()
-            self._functions = others[0]._functions.new_child()
-            self._mixins = others[0]._mixins.new_child()
-            self._imports = others[0]._imports.new_child()
+            # Child scopes are only created when first written to
+            self._parent = others[0]
+            self._variables = None
+            self._functions = None
+            self._mixins = None
+            self._imports = None
         else:
             # Note that this will create a 2-dimensional scope where each of
             # these scopes is checked first in order.  TODO is this right?
@@ -157,6 +275,16 @@ class Namespace(object):
 
         return decorator
 
+    def declare_pure(self, function):
+        """Like declare(), but also marks the function as pure: it always
+        returns the same value for the same arguments, and does nothing else.
+        A call to a pure function with constant arguments, like
+        ``lighten(#333, 10%)``, is only evaluated once.
+        """
+        function._pyscss_pure = True
+        self._auto_register_function(function, function.__name__)
+        return function
+
     def declare_internal(self, function):
         """Like declare(), but the registered function will also receive the
         current namespace as its first argument.  Useful for functions that
@@ -206,14 +334,15 @@ class Namespace(object):
         name = normalize_var(name)
         if not isinstance(value, Value):
             raise TypeError("Expected a Sass type, while setting %s got %r" % (name, value,))
-        self._variables.set(name, value, force_local=local_only)
+        self._own_scope('_own_variables').set(
+            name, value, force_local=local_only)
 
     def has_import(self, source):
         return source.path in self._imports
 
     def add_import(self, source, parent_rule):
         self._assert_mutable()
-        self._imports[source.path] = [
+        self._own_scope('_own_imports')[source.path] = [
             0,
             parent_rule.source_file.path,
             parent_rule.file_and_line,
@@ -255,11 +384,44 @@ class Namespace(object):
 
     def set_mixin(self, name, arity, cb):
         self._assert_mutable()
-        self._set_callable(self._mixins, name, arity, cb)
+        self._set_callable(self._own_scope('_own_mixins'), name, arity, cb)
 
     def function(self, name, arity):
         return self._get_callable(self._functions, name, arity)
 
+    def resolve_function(self, name, arity):
+        """Find the function to call for `name` with `arity` arguments.
+
+        Returns a 2-tuple: the function, or None if there isn't one; and
+        whether the arguments must be passed as a single list instead.
+        DEVIATION: a function taking one argument can be called with any
+        number of them that way.
+
+        Results are cached until any function is defined again.
+        """
+        scope = self._functions
+        generation = FunctionScope.generation
+        if scope._resolved_generation != generation:
+            scope._resolved = {}
+            scope._resolved_generation = generation
+
+        key = name, arity
+        try:
+            return scope._resolved[key]
+        except KeyError:
+            pass
+
+        try:
+            resolved = self.function(name, arity), False
+        except KeyError:
+            try:
+                resolved = self.function(name, 1), True
+            except KeyError:
+                resolved = None, False
+
+        scope._resolved[key] = resolved
+        return resolved
+
     def set_function(self, name, arity, cb):
         self._assert_mutable()
-        self._set_callable(self._functions, name, arity, cb)
+        self._set_callable(self._own_scope('_own_functions'), name, arity, cb)
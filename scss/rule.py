@@ -36,7 +36,7 @@ class SassRule(object):
 
     def __init__(
             self, source_file, import_key=None, unparsed_contents=None,
-            num_header_lines=0,
+            contents=None, num_header_lines=0,
             options=None, legacy_compiler_options=None, properties=None,
             namespace=None,
             lineno=0, extends_selectors=frozenset(),
@@ -53,6 +53,10 @@ class SassRule(object):
 
         self.num_header_lines = num_header_lines
         self.unparsed_contents = unparsed_contents
+        if contents is None and unparsed_contents is not None:
+            from scss.blockast import parse_blocks
+            contents = parse_blocks(unparsed_contents)
+        self.contents = contents
         self.legacy_compiler_options = legacy_compiler_options or {}
         self.options = options or {}
         self.extends_selectors = extends_selectors
@@ -142,6 +146,7 @@ class SassRule(object):
             from_lineno=self.from_lineno,
 
             unparsed_contents=self.unparsed_contents,
+            contents=self.contents,
 
             legacy_compiler_options=self.legacy_compiler_options,
             options=self.options,
@@ -318,7 +323,7 @@ class BlockScopeHeader(BlockHeader):
 
 
 class UnparsedBlock(object):
-    """A Sass block whose contents have not yet been parsed.
+    """A Sass block, as seen from the rule that is evaluating it.
 
     At the top level, CSS (and Sass) documents consist of a sequence of blocks.
     A block may be a ruleset:
@@ -333,19 +338,37 @@ class UnparsedBlock(object):
 
         property: value
 
-    pyScss's first parsing pass breaks the document into these blocks, and each
-    block becomes an instance of this class.
+    pyScss's first parsing pass breaks the document into these blocks, each of
+    which is kept as a :class:`scss.blockast.Block`.  An instance of this class
+    is a view of one of those nodes as it's being evaluated within a
+    particular rule; the node itself may be shared by many rules, e.g. when
+    it's part of a mixin body.  When a node is given, its text and contents
+    are used, and `unparsed_contents` is ignored.
     """
 
-    def __init__(self, parent_rule, lineno, prop, unparsed_contents):
+    def __init__(self, parent_rule, lineno, prop, unparsed_contents, node=None):
+        if node is None:
+            from scss.blockast import Block
+            node = Block(lineno, prop, unparsed_contents)
+
         self.parent_rule = parent_rule
-        self.header = BlockHeader.parse(prop, has_contents=bool(unparsed_contents))
+        self.node = node
+        self.header = node.header
 
         # Basic properties
         self.lineno = (
             parent_rule.lineno - parent_rule.num_header_lines + lineno - 1)
         self.prop = prop
-        self.unparsed_contents = unparsed_contents
+
+    @property
+    def unparsed_contents(self):
+        """Text of this block, or None if it has no block."""
+        return self.node.unparsed_contents
+
+    @property
+    def contents(self):
+        """Parsed child nodes of this block, or None if it has no block."""
+        return self.node.contents
 
     @property
     def directive(self):
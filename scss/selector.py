@@ -2,8 +2,10 @@ from __future__ import print_function
 
 import re
 from warnings import warn
+import weakref
 
 from scss.cssdefs import CSS2_PSEUDO_ELEMENTS
+from scss.util import LRUCache
 
 # Super dumb little selector parser.
 
@@ -59,6 +61,47 @@ SELECTOR_TOKENIZER = re.compile(r'''
 BODY_TOKEN_SIGILS = frozenset('#.[:%')
 
 
+# Every distinct selector object ever created, so equal selectors can share a
+# single object.  See `_Interned`.
+_intern_table = weakref.WeakValueDictionary()
+
+# Parsed selector strings; see `Selector.parse_many`
+_parse_cache = LRUCache(10000)
+
+
+class _Interned(object):
+    """Base for selector objects, which are immutable and interned: building a
+    selector with the same contents as an existing one returns the existing
+    object.  Subclasses compute everything they need in `_setup`, once, rather
+    than on every comparison during ``@extend``.
+    """
+    __slots__ = ('_hash', '__weakref__')
+
+    def __new__(cls, *args):
+        key = cls._intern_key(*args)
+        self = _intern_table.get(key)
+        if self is None:
+            self = object.__new__(cls)
+            self._setup(*key[1:])
+            object.__setattr__(self, '_hash', hash(key))
+            # Another thread may have gotten here first
+            self = _intern_table.setdefault(key, self)
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "{0} objects are immutable".format(type(self).__name__))
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return type(self), self._intern_key(*self._intern_args())[1:]
+
+
 def _is_combinator_subset_of(specific, general, is_first=True):
     """Return whether `specific` matches a non-strict subset of what `general`
     matches.
@@ -80,7 +123,7 @@ def _is_combinator_subset_of(specific, general, is_first=True):
     return False
 
 
-class SimpleSelector(object):
+class SimpleSelector(_Interned):
     """A simple selector, by CSS 2.1 terminology: a combination of element
     name, class selectors, id selectors, and other criteria that all apply to a
     single element.
@@ -100,21 +143,42 @@ class SimpleSelector(object):
                 ...
             }
         }
+
+    Simple selectors are immutable and interned; ``token_set`` is a frozenset
+    of the tokens, for fast subset tests.
     """
-    def __init__(self, combinator, tokens):
-        self.combinator = combinator
+    __slots__ = (
+        'combinator', 'tokens', 'token_set',
+        'has_parent_reference', 'has_placeholder',
+    )
+
+    @classmethod
+    def _intern_key(cls, combinator, tokens):
         # TODO enforce that only one element name (including *) appears in a
         # selector.  only one pseudo, too.
         # TODO remove duplicates?
-        self.tokens = tuple(tokens)
+        return cls, combinator, tuple(tokens)
+
+    def _intern_args(self):
+        return self.combinator, self.tokens
+
+    def _setup(self, combinator, tokens):
+        self._set('combinator', combinator)
+        self._set('tokens', tokens)
+        self._set('token_set', frozenset(tokens))
+        self._set(
+            'has_parent_reference',
+            '&' in self.token_set or 'self' in self.token_set)
+        self._set(
+            'has_placeholder',
+            any(token.startswith('%') for token in tokens))
 
     def __repr__(self):
         return "<%s: %r>" % (type(self).__name__, self.render())
 
-    def __hash__(self):
-        return hash((self.combinator, self.tokens))
-
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, SimpleSelector):
             return NotImplemented
 
@@ -122,16 +186,14 @@ class SimpleSelector(object):
             self.combinator == other.combinator and
             self.tokens == other.tokens)
 
-    @property
-    def has_parent_reference(self):
-        return '&' in self.tokens or 'self' in self.tokens
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
 
-    @property
-    def has_placeholder(self):
-        for token in self.tokens:
-            if token.startswith('%'):
-                return True
-        return False
+    # Defining __eq__ would otherwise hide the inherited __hash__
+    __hash__ = _Interned.__hash__
 
     def is_superset_of(self, other, soft_combinator=False):
         """Return True iff this selector matches the same elements as `other`,
@@ -155,9 +217,7 @@ class SimpleSelector(object):
                 (self.combinator == ' ' and other.combinator == '>') or
                 (self.combinator == '~' and other.combinator == '+'))
 
-        return (
-            combinator_superset and
-            set(self.tokens) <= set(other.tokens))
+        return combinator_superset and self.token_set <= other.token_set
 
     def replace_parent(self, parent_simples):
         """If ``&`` (or the legacy xCSS equivalent ``self``) appears in this
@@ -253,7 +313,8 @@ class SimpleSelector(object):
         return type(self)(combinator, new_tokens)
 
     def difference(self, other):
-        new_tokens = tuple(token for token in self.tokens if token not in set(other.tokens))
+        other_tokens = other.token_set
+        new_tokens = tuple(token for token in self.tokens if token not in other_tokens)
         return type(self)(self.combinator, new_tokens)
 
     def render(self):
@@ -267,19 +328,50 @@ class SimpleSelector(object):
             return self.combinator
 
 
-class Selector(object):
-    """A single CSS selector."""
+class Selector(_Interned):
+    """A single CSS selector: a sequence of `SimpleSelector`s.
 
-    def __init__(self, simples):
-        """Return a selector containing a sequence of `SimpleSelector`s.
+    You probably want to use `parse_many` or `parse_one` instead of building
+    one directly.  Selectors are immutable and interned, like
+    `SimpleSelector`.
+    """
+    __slots__ = (
+        'simple_selectors', 'has_parent_reference', 'has_placeholder',
+        '_lookup_key',
+    )
 
-        You probably want to use `parse_many` or `parse_one` instead.
-        """
+    @classmethod
+    def _intern_key(cls, simples):
         # TODO enforce uniqueness
-        self.simple_selectors = tuple(simples)
+        return cls, tuple(simples)
+
+    def _intern_args(self):
+        return (self.simple_selectors,)
+
+    def _setup(self, simples):
+        self._set('simple_selectors', simples)
+        self._set(
+            'has_parent_reference',
+            any(simple.has_parent_reference for simple in simples))
+        self._set(
+            'has_placeholder',
+            any(simple.has_placeholder for simple in simples))
+        self._set('_lookup_key', None)
 
     @classmethod
     def parse_many(cls, selector):
+        """Parse a comma-separated string of selectors into a list of
+        `Selector`s.
+        """
+        key = cls, selector
+        parsed = _parse_cache.get(key)
+        if parsed is None:
+            parsed = tuple(cls._parse_many(selector))
+            _parse_cache.set(key, parsed)
+        return list(parsed)
+
+    @classmethod
+    def _parse_many(cls, selector):
         selector = selector.strip()
         ret = []
 
@@ -351,28 +443,22 @@ class Selector(object):
     def __repr__(self):
         return "<%s: %r>" % (type(self).__name__, self.render())
 
-    def __hash__(self):
-        return hash(self.simple_selectors)
-
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, Selector):
             return NotImplemented
 
         return self.simple_selectors == other.simple_selectors
 
-    @property
-    def has_parent_reference(self):
-        for simple in self.simple_selectors:
-            if simple.has_parent_reference:
-                return True
-        return False
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
 
-    @property
-    def has_placeholder(self):
-        for simple in self.simple_selectors:
-            if simple.has_placeholder:
-                return True
-        return False
+    # Defining __eq__ would otherwise hide the inherited __hash__
+    __hash__ = _Interned.__hash__
 
     def with_parent(self, parent):
         saw_parent_ref = False
@@ -394,6 +480,11 @@ class Selector(object):
         """Build a key from the "important" parts of a selector: elements,
         classes, ids.
         """
+        if self._lookup_key is None:
+            self._set('_lookup_key', self._build_lookup_key())
+        return self._lookup_key
+
+    def _build_lookup_key(self):
         parts = set()
         for node in self.simple_selectors:
             for token in node.tokens:
@@ -0,0 +1,279 @@
+"""A resident compile server, so that repeated compiles don't each pay for
+starting Python, importing every extension, and parsing the same partials.
+
+The server listens on a Unix socket and speaks line-delimited JSON: each
+request is a single JSON object on its own line, and gets a single JSON object
+on its own line back.  A connection may send any number of requests.
+Requests are handled one at a time, in the order they arrive.
+
+Every request has a ``command``, and may have an ``id``, which is copied into
+the response.  Every response has ``ok``, which is false if the request
+failed, in which case ``error`` says why.
+
+``compile``
+    Compile ``files`` (a list of paths) or ``string`` (Sass source).  Relative
+    paths are resolved against ``cwd``, which should be the client's working
+    directory.  Optional settings: ``style``, ``debug_info``, ``load_paths``,
+    ``stats``, ``is_sass`` (for strings only), and ``output``, the path the
+    CSS will be written to (used to make the source map's paths relative).
+
+    The response has ``css``, its ``encoding``, a list of log and warning
+    ``messages``, and ``source_map`` and ``stats`` if they were requested.
+    When the same files are compiled again, only files that have changed since
+    are read and parsed again, and if nothing changed, the previous result is
+    returned immediately.
+``ping``
+    Responds with the server's ``version``.
+``stats``
+    Responds with the expression cache's ``hits``, ``misses``, and
+    ``evictions``, and how many ``compilers`` and ``compilations`` are being
+    kept warm.
+``shutdown``
+    Stops the server once the response has been sent.
+
+Global settings like ``STATIC_ROOT`` come from the server's own command line,
+not the client's.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from contextlib import contextmanager
+import json
+import logging
+import os
+import socket
+
+import six
+from six.moves import socketserver
+
+from scss.calculator import Calculator
+from scss.errors import SassError
+from scss.legacy import Scss
+from scss.scss_meta import VERSION
+from scss.source import SourceFile
+from scss.util import LRUCache
+from scss.util import captured_messages
+
+
+log = logging.getLogger(__name__)
+
+# How many differently-configured compilers, and how many sets of entry
+# points, to keep warm
+MAX_COMPILERS = 16
+MAX_COMPILATIONS = 256
+
+
+@contextmanager
+def _working_directory(path):
+    old_path = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old_path)
+
+
+class CompileServer(object):
+    """Handles requests, independent of how they arrive.  Keeps compilers and
+    finished compilations around between requests.
+    """
+    def __init__(self):
+        self.compilers = LRUCache(MAX_COMPILERS)
+        self.compilations = LRUCache(MAX_COMPILATIONS)
+        self.shutdown_requested = False
+
+    def handle(self, request):
+        """Handle a single decoded request, and return the response."""
+        if not isinstance(request, dict):
+            response = dict(ok=False, error="Request must be a JSON object")
+        else:
+            command = request.get('command')
+            method = getattr(self, 'do_' + six.text_type(command), None)
+            if method is None:
+                response = dict(
+                    ok=False, error="Unknown command: {0!r}".format(command))
+            else:
+                try:
+                    response = method(request)
+                except Exception as e:
+                    log.exception("Error handling %r", command)
+                    response = dict(ok=False, error=six.text_type(e))
+
+            if 'id' in request:
+                response['id'] = request['id']
+        return response
+
+    def do_ping(self, request):
+        return dict(ok=True, version=VERSION)
+
+    def do_stats(self, request):
+        cache = Calculator.ast_cache
+        return dict(
+            ok=True,
+            hits=cache.hits,
+            misses=cache.misses,
+            evictions=cache.evictions,
+            compilers=len(self.compilers),
+            compilations=len(self.compilations),
+        )
+
+    def do_shutdown(self, request):
+        self.shutdown_requested = True
+        return dict(ok=True)
+
+    def do_compile(self, request):
+        cwd = request.get('cwd') or os.getcwd()
+        scss_opts = {
+            'style': request.get('style', 'nested'),
+            'debug_info': request.get('debug_info', False),
+            'stats': bool(request.get('stats')),
+        }
+        load_paths = tuple(request.get('load_paths') or ())
+        compiler_key = (
+            cwd, load_paths,
+            tuple(sorted(scss_opts.items())),
+        )
+
+        # Paths in the request and in the configuration are relative to the
+        # client, and this is the only thread, so pretending to be there is
+        # the simplest way to get everything right
+        with _working_directory(cwd):
+            compiler = self.compilers.get(compiler_key)
+            if compiler is None:
+                css = Scss(scss_opts=scss_opts, search_paths=list(load_paths))
+                compiler = css.make_compiler()
+                self.compilers.set(compiler_key, compiler)
+
+            with captured_messages() as messages:
+                try:
+                    compilation, messages = self._compile(
+                        compiler, compiler_key, request, messages)
+                except SassError as e:
+                    return dict(
+                        ok=False, error=six.text_type(e), messages=messages)
+
+        response = dict(
+            ok=True,
+            css=compilation.output,
+            encoding=compilation.entry_sources[0].encoding or 'utf8',
+            messages=messages,
+            source_map=None,
+            stats=None,
+        )
+        if compilation.source_map is not None:
+            output = request.get('output')
+            if output is not None:
+                output = os.path.join(cwd, output)
+                response['source_map'] = compilation.source_map.to_dict(
+                    filename=os.path.basename(output),
+                    relative_to=os.path.dirname(output))
+            else:
+                response['source_map'] = compilation.source_map.to_dict()
+        if compilation.stats is not None:
+            response['stats'] = compilation.stats.format()
+        return response
+
+    def _compile(self, compiler, compiler_key, request, messages):
+        """Run or rerun a compilation.  Returns the compilation, and the
+        messages that go with it.
+        """
+        if 'string' in request:
+            # Unsaved editor buffers and the like; not worth remembering
+            compilation = compiler.make_compilation()
+            compilation.add_source(SourceFile.from_string(
+                request['string'], is_sass=request.get('is_sass')))
+            compilation.output = compiler.call_and_catch_errors(
+                compilation.run)
+            return compilation, messages
+
+        files = tuple(os.path.abspath(path) for path in request['files'])
+        if not files:
+            raise ValueError("Nothing to compile")
+        key = (compiler_key, files)
+
+        previous = self.compilations.get(key)
+        if previous is None:
+            compilation = compiler.run_compilation(*files)
+        else:
+            previous_compilation, previous_messages = previous
+            compilation = compiler.recompile(previous_compilation)
+            if compilation is previous_compilation:
+                return compilation, previous_messages
+
+        self.compilations.set(key, (compilation, messages))
+        return compilation, messages
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        compile_server = self.server.compile_server
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line.decode('utf8'))
+            except ValueError as e:
+                response = dict(ok=False, error="Invalid JSON: {0}".format(e))
+            else:
+                response = compile_server.handle(request)
+
+            self.wfile.write(json.dumps(response).encode('utf8') + b'\n')
+            self.wfile.flush()
+
+            if compile_server.shutdown_requested:
+                break
+
+
+def serve(socket_path):
+    """Listen for requests on a Unix socket at the given path, until a
+    ``shutdown`` request arrives.
+    """
+    if os.path.exists(socket_path):
+        # Left over from a server that didn't exit cleanly, hopefully
+        if is_server_running(socket_path):
+            raise IOError(
+                "A server is already running at {0}".format(socket_path))
+        os.unlink(socket_path)
+
+    server = socketserver.UnixStreamServer(socket_path, _RequestHandler)
+    server.compile_server = CompileServer()
+    log.info("Listening on %s", socket_path)
+    try:
+        while not server.compile_server.shutdown_requested:
+            server.handle_request()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+def send_request(socket_path, request):
+    """Send a single request to the server at the given path, and return its
+    response.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        stream = sock.makefile('rwb')
+        stream.write(json.dumps(request).encode('utf8') + b'\n')
+        stream.flush()
+        line = stream.readline()
+        stream.close()
+    finally:
+        sock.close()
+
+    if not line:
+        raise IOError("Server closed the connection without responding")
+    return json.loads(line.decode('utf8'))
+
+
+def is_server_running(socket_path):
+    try:
+        return send_request(socket_path, dict(command='ping'))['ok']
+    except (IOError, OSError, ValueError):
+        return False
+
+
+__all__ = ('CompileServer', 'is_server_running', 'send_request', 'serve')
@@ -4,44 +4,113 @@ from __future__ import unicode_literals
 from __future__ import division
 
 import hashlib
+import io
 import logging
+import os
 from pathlib import Path
 import re
+import sys
+import tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
 import six
 
-from scss.cssdefs import (
-    _ml_comment_re, _sl_comment_re,
-    _collapse_properties_space_re,
-    _strings_re, _urls_re,
-)
+from scss import config
+from scss.cssdefs import _collapse_properties_space_re
+from scss.cssdefs import _comments_re
 from scss.cssdefs import determine_encoding
+from scss.scss_meta import VERSION
 
 
 log = logging.getLogger(__name__)
 
 
-_safe_strings = {
-    '^doubleslash^': '//',
-    '^bigcopen^': '/*',
-    '^bigcclose^': '*/',
-    '^doubledot^': ':',
-    '^semicolon^': ';',
-    '^curlybracketopen^': '{',
-    '^curlybracketclosed^': '}',
-}
-_reverse_safe_strings = dict((v, k) for k, v in _safe_strings.items())
-_safe_strings_re = re.compile('|'.join(map(re.escape, _safe_strings)))
-_reverse_safe_strings_re = re.compile('|'.join(
-    map(re.escape, _reverse_safe_strings)))
-
-
 class MISSING(object):
     def __repr__(self):
         return "<MISSING>"
 MISSING = MISSING()
 
 
+def _hash_contents(contents):
+    return hashlib.sha256(contents.encode('utf8')).hexdigest()
+
+
+# Version of what `SourceCache` stores.  Bump it whenever that changes: the
+# output of `SourceFile.prepare_source`, or the attributes of the pickled
+# `scss.blockast.Block`s.
+CACHE_FORMAT = 4
+
+
+class SourceCache(object):
+    """Persistent on-disk cache of prepared source code and its parsed block
+    structure, so unchanged files (e.g. vendored frameworks) don't have to be
+    preprocessed and scanned again on every run.
+
+    Entries are keyed by a hash of the raw file contents, the syntax, the
+    pyScss version and `CACHE_FORMAT`, so they never need invalidating; a
+    changed file simply gets a new entry.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    @classmethod
+    def from_config(cls):
+        """Return the cache for the configured ``CACHE_ROOT``, or None if
+        caching is disabled.
+        """
+        if config.CACHE_ROOT:
+            return cls(config.CACHE_ROOT)
+        return None
+
+    def make_key(self, contents, is_sass):
+        m = hashlib.sha256()
+        m.update(VERSION.encode('ascii'))
+        m.update(str(CACHE_FORMAT).encode('ascii'))
+        m.update(b'sass' if is_sass else b'scss')
+        m.update(contents.encode('utf8'))
+        return m.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, 'source-' + key + '.cache')
+
+    def get(self, key):
+        """Return a 2-tuple of ``(prepared contents, blocks)``, or None if
+        there's no usable entry for this key.
+        """
+        try:
+            with open(self._path(key), 'rb') as f:
+                cache_format, contents, blocks = pickle.load(f)
+        except Exception:
+            # Missing, unreadable, from an incompatible Python, or from before
+            # the format was stored; all the same as a miss
+            return None
+
+        if cache_format != CACHE_FORMAT:
+            return None
+        return contents, blocks
+
+    def set(self, key, contents, blocks):
+        try:
+            cache_tmp = tempfile.NamedTemporaryFile(delete=False, dir=self.root)
+            with cache_tmp:
+                pickle.dump(
+                    (CACHE_FORMAT, contents, blocks),
+                    cache_tmp, pickle.HIGHEST_PROTOCOL)
+            cache_path = self._path(key)
+            if sys.platform == 'win32' and os.path.isfile(cache_path):
+                # on windows, cannot rename a file to a path that matches
+                # an existing file, we have to remove it first
+                os.remove(cache_path)
+            os.rename(cache_tmp.name, cache_path)
+        except (IOError, OSError) as e:
+            log.warning("Couldn't write source cache %s: %s", self.root, e)
+
+
 # TODO i'm still not entirely happy with this, nor with the concept of an
 # "origin".  it should really be a "loader", with a defined API.  also, even
 # with all these helpful classmethods, i'm still having to do a lot of manual
@@ -89,6 +158,12 @@ class SourceFile(object):
     file came from and how to find its siblings.
     """
 
+    mtime = None
+    """Modification time of the file this source was read from, if known."""
+
+    _blocks = None
+    _cache_key = None
+
     def __init__(
             self, origin, relpath, contents, encoding=None,
             is_sass=None):
@@ -110,6 +185,7 @@ class SourceFile(object):
         self.key = origin, relpath
 
         self.encoding = encoding
+        self.content_hash = _hash_contents(contents)
         if is_sass is None:
             # TODO autodetect from the contents if the extension is bogus
             # or missing?
@@ -119,8 +195,33 @@ class SourceFile(object):
                 self.is_sass = False
         else:
             self.is_sass = is_sass
+
+        cache = SourceCache.from_config()
+        if cache is not None:
+            self._cache_key = cache.make_key(contents, self.is_sass)
+            cached = cache.get(self._cache_key)
+            if cached is not None:
+                self.contents, self._blocks = cached
+                return
+
         self.contents = self.prepare_source(contents)
 
+    @property
+    def blocks(self):
+        """The top-level contents of this file, parsed into a tuple of
+        :class:`scss.blockast.Block` nodes.  Only parsed once, even if the file
+        is imported many times.
+        """
+        if self._blocks is None:
+            from scss.blockast import parse_blocks, parse_nested
+            self._blocks = parse_blocks(self.contents)
+
+            cache = SourceCache.from_config()
+            if cache is not None and self._cache_key is not None:
+                parse_nested(self._blocks)
+                cache.set(self._cache_key, self.contents, self._blocks)
+        return self._blocks
+
     @property
     def path(self):
         """Concatenation of ``origin`` and ``relpath``, as a string.  Used in
@@ -131,6 +232,29 @@ class SourceFile(object):
         else:
             return six.text_type(self.relpath)
 
+    def is_stale(self):
+        """Return True if the file this source was read from has changed since
+        then.  Files whose modification time has changed are re-read and
+        compared by content, so merely touching a file doesn't count.
+
+        Sources that didn't come from a file are never stale.
+        """
+        if not self.origin:
+            return False
+
+        path = self.origin / self.relpath
+        try:
+            if self.mtime is not None and path.stat().st_mtime == self.mtime:
+                return False
+            with path.open('rb') as f:
+                contents = f.read()
+        except (IOError, OSError):
+            # Deleted or unreadable
+            return True
+
+        contents = contents.decode(determine_encoding(contents))
+        return _hash_contents(contents) != self.content_hash
+
     def __repr__(self):
         return "<{0} {1!r} from {2!r}>".format(
             type(self).__name__, self.relpath, self.origin)
@@ -205,6 +329,11 @@ class SourceFile(object):
         ``.name`` attribute as with `from_path`.  If it doesn't have one, the
         origin becomes None and the relpath becomes the file's repr.
         """
+        try:
+            mtime = os.fstat(f.fileno()).st_mtime
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            mtime = None
+
         contents = f.read()
         encoding = determine_encoding(contents)
         if isinstance(contents, six.binary_type):
@@ -218,7 +347,9 @@ class SourceFile(object):
             else:
                 origin, relpath = cls._key_from_path(Path(filename), origin)
 
-        return cls(origin, relpath, contents, encoding=encoding, **kwargs)
+        source = cls(origin, relpath, contents, encoding=encoding, **kwargs)
+        source.mtime = mtime
+        return source
 
     @classmethod
     def from_string(cls, string, relpath=None, encoding=None, is_sass=None):
@@ -255,120 +386,89 @@ class SourceFile(object):
             is_sass=is_sass,
         )
 
-    def parse_scss_line(self, line, state):
-        ret = ''
-
-        if line is None:
-            line = ''
-
-        line = state['line_buffer'] + line
-
-        if line and line[-1] == '\\':
-            state['line_buffer'] = line[:-1]
-            return ''
-        else:
-            state['line_buffer'] = ''
-
-        output = state['prev_line']
-        output = output.strip()
-
-        state['prev_line'] = line
-
-        ret += output
-        ret += '\n'
-        return ret
-
-    def parse_sass_line(self, line, state):
-        ret = ''
-
-        if line is None:
-            line = ''
-
-        line = state['line_buffer'] + line
-
-        if line and line[-1] == '\\':
-            state['line_buffer'] = line[:-1]
-            return ret
-        else:
-            state['line_buffer'] = ''
-
-        indent = len(line) - len(line.lstrip())
-
-        # make sure we support multi-space indent as long as indent is
-        # consistent
-        if indent and not state['indent_marker']:
-            state['indent_marker'] = indent
-
-        if state['indent_marker']:
-            indent //= state['indent_marker']
-
-        if indent == state['prev_indent']:
-            # same indentation as previous line
-            if state['prev_line']:
-                state['prev_line'] += ';'
-        elif indent > state['prev_indent']:
-            # new indentation is greater than previous, we just entered a new
-            # block
-            state['prev_line'] += ' {'
-            state['nested_blocks'] += 1
-        else:
-            # indentation is reset, we exited a block
-            block_diff = state['prev_indent'] - indent
-            if state['prev_line']:
-                state['prev_line'] += ';'
-            state['prev_line'] += ' }' * block_diff
-            state['nested_blocks'] -= block_diff
-
-        output = state['prev_line']
-        output = output.strip()
+    @staticmethod
+    def _join_continued_lines(codestr):
+        """Yield the lines of `codestr`, joining any line that ends with a
+        backslash to the line after it, then a final None.
+        """
+        line_buffer = ''
+        for line in codestr.splitlines():
+            line = line_buffer + line
+            if line and line[-1] == '\\':
+                line_buffer = line[:-1]
+            else:
+                line_buffer = ''
+                yield line
+
+        # Whatever's left over is the last line, unless it's still waiting
+        # for another one
+        if not (line_buffer and line_buffer[-1] == '\\'):
+            yield line_buffer
+        yield None
+
+    def _scss_lines(self, codestr):
+        """Yield each line of `codestr`, stripped, after the line before it
+        (starting with an empty one) has been seen.
+        """
+        prev_line = ''
+        for line in self._join_continued_lines(codestr):
+            if line is None:
+                return
+            yield prev_line.strip()
+            prev_line = line
+
+    def _sass_lines(self, codestr):
+        """Like `_scss_lines`, but converts the indented syntax, adding braces
+        and semicolons as the indentation changes.
+        """
+        prev_line = ''
+        prev_indent = 0
+        indent_marker = 0
+        for line in self._join_continued_lines(codestr):
+            if line is None:
+                return
+
+            indent = len(line) - len(line.lstrip())
+
+            # make sure we support multi-space indent as long as indent is
+            # consistent
+            if indent and not indent_marker:
+                indent_marker = indent
+
+            if indent_marker:
+                indent //= indent_marker
+
+            if indent == prev_indent:
+                # same indentation as previous line
+                if prev_line:
+                    prev_line += ';'
+            elif indent > prev_indent:
+                # new indentation is greater than previous, we just entered a
+                # new block
+                prev_line += ' {'
+            else:
+                # indentation is reset, we exited a block
+                if prev_line:
+                    prev_line += ';'
+                prev_line += ' }' * (prev_indent - indent)
 
-        state['prev_indent'] = indent
-        state['prev_line'] = line
+            yield prev_line.strip()
 
-        ret += output
-        ret += '\n'
-        return ret
+            prev_indent = indent
+            prev_line = line
 
     def prepare_source(self, codestr, sass=False):
-        state = {
-            'line_buffer': '',
-            'prev_line': '',
-            'prev_indent': 0,
-            'nested_blocks': 0,
-            'indent_marker': 0,
-        }
         if self.is_sass:
-            parse_line = self.parse_sass_line
+            lines = list(self._sass_lines(codestr))
         else:
-            parse_line = self.parse_scss_line
-        _codestr = codestr
-        codestr = ''
-        for line in _codestr.splitlines():
-            codestr += parse_line(line, state)
-        # parse the last line stored in prev_line buffer
-        codestr += parse_line(None, state)
-
-        # pop off the extra \n parse_line puts at the beginning
-        codestr = codestr[1:]
-
-        # protects codestr: "..." strings
-        codestr = _strings_re.sub(
-            lambda m: _reverse_safe_strings_re.sub(
-                lambda n: _reverse_safe_strings[n.group(0)], m.group(0)),
-            codestr)
-        codestr = _urls_re.sub(
-            lambda m: _reverse_safe_strings_re.sub(
-                lambda n: _reverse_safe_strings[n.group(0)], m.group(0)),
-            codestr)
-
-        # removes multiple line comments
-        codestr = _ml_comment_re.sub('', codestr)
-
-        # removes inline comments, but not :// (protocol)
-        codestr = _sl_comment_re.sub('', codestr)
-
-        codestr = _safe_strings_re.sub(
-            lambda m: _safe_strings[m.group(0)], codestr)
+            lines = list(self._scss_lines(codestr))
+        if lines:
+            lines.append('')
+        # pop off the extra character the first line puts at the beginning
+        codestr = '\n'.join(lines)[1:]
+
+        # removes comments, leaving strings and urls alone
+        codestr = _comments_re.sub(r'\g<keep>', codestr)
 
         # collapse the space in properties blocks
         codestr = _collapse_properties_space_re.sub(r'\1{', codestr)
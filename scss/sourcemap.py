@@ -0,0 +1,147 @@
+"""Generation of Source Map v3 files, which let browser developer tools show
+where a rule in the compiled CSS came from.
+
+The format is described at:
+https://docs.google.com/document/d/1U1RGAehQwRypUTovF1KRlpiOFze0b-_2gc6fAH0KY0k/
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import os.path
+
+import six
+
+
+_BASE64_DIGITS = (
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/')
+
+
+def encode_vlq(value):
+    """Encode a single integer as a base64 VLQ, as used in the ``mappings``
+    field of a source map.
+    """
+    # The sign goes in the least significant bit
+    if value < 0:
+        value = (-value << 1) | 1
+    else:
+        value <<= 1
+
+    digits = []
+    while True:
+        digit = value & 0x1f
+        value >>= 5
+        if value:
+            # Continuation bit
+            digit |= 0x20
+        digits.append(_BASE64_DIGITS[digit])
+        if not value:
+            return ''.join(digits)
+
+
+class SourceMap(object):
+    """Collects mappings from positions in generated CSS back to positions in
+    the original source files.
+
+    Call :meth:`advance` with each chunk of output as it's written, and
+    :meth:`add_mapping` just before writing something that came from a known
+    place.  Lines and columns passed in and stored are zero-based.
+    """
+    def __init__(self):
+        self.line = 0
+        self.column = 0
+        self.sources = []
+        self._source_indices = {}
+        # One list per generated line, of (column, source index, source line,
+        # source column)
+        self._lines = [[]]
+
+    def advance(self, chunk):
+        """Move the current generated position past the given text."""
+        newlines = chunk.count('\n')
+        if newlines:
+            self.line += newlines
+            self.column = len(chunk) - chunk.rindex('\n') - 1
+            self._lines.extend([] for _ in range(newlines))
+        else:
+            self.column += len(chunk)
+
+    def add_mapping(self, source_path, source_line, source_column=0):
+        """Map the current generated position to the given position in the
+        given source file.
+        """
+        try:
+            source_index = self._source_indices[source_path]
+        except KeyError:
+            source_index = self._source_indices[source_path] = len(self.sources)
+            self.sources.append(source_path)
+
+        self._lines[self.line].append(
+            (self.column, source_index, source_line, source_column))
+
+    def encode_mappings(self):
+        """Return the ``mappings`` field: one group of segments per generated
+        line, each segment a series of VLQs relative to the one before it.
+        """
+        prev_source = prev_line = prev_column = 0
+        encoded_lines = []
+        for segments in self._lines:
+            # The generated column is the only field that restarts per line
+            prev_generated_column = 0
+            encoded_segments = []
+            for column, source, line, source_column in segments:
+                encoded_segments.append(''.join((
+                    encode_vlq(column - prev_generated_column),
+                    encode_vlq(source - prev_source),
+                    encode_vlq(line - prev_line),
+                    encode_vlq(source_column - prev_column),
+                )))
+                prev_generated_column = column
+                prev_source = source
+                prev_line = line
+                prev_column = source_column
+            encoded_lines.append(','.join(encoded_segments))
+        return ';'.join(encoded_lines)
+
+    def to_dict(self, filename=None, relative_to=None):
+        """Return the source map as a dict, ready to be serialized as JSON.
+
+        :param filename: Name of the generated CSS file.
+        :param relative_to: If given, a directory that source paths are made
+            relative to, usually the one the map file will be written to.
+        """
+        sources = self.sources
+        if relative_to is not None:
+            sources = [
+                os.path.relpath(path, relative_to)
+                if os.path.isabs(path) else path
+                for path in sources
+            ]
+
+        source_map = {
+            'version': 3,
+            'sources': sources,
+            'names': [],
+            'mappings': self.encode_mappings(),
+        }
+        if filename is not None:
+            source_map['file'] = filename
+        return source_map
+
+    def to_json(self, filename=None, relative_to=None):
+        """Return the source map serialized as a JSON string.  Arguments are as
+        for :meth:`to_dict`.
+        """
+        return six.text_type(json.dumps(
+            self.to_dict(filename, relative_to), sort_keys=True))
+
+
+def source_mapping_url_comment(url):
+    """Return the comment that points a browser from a CSS file to its source
+    map.
+    """
+    return "/*# sourceMappingURL={0} */\n".format(url)
+
+
+__all__ = ('SourceMap', 'encode_vlq', 'source_mapping_url_comment')
@@ -507,11 +507,24 @@ scss_locate_blocks(PyObject *self, PyObject *args)
 	return (PyObject *)result;
 }
 
+static PyObject *
+scss_locate_block_tree(PyObject *self, PyObject *args)
+{
+	PyObject *codestr;
+
+	if (!PyArg_ParseTuple(args, "U", &codestr)) {
+		return NULL;
+	}
+
+	return BlockLocator_tree(codestr);
+}
+
 
 /* Module functions */
 
 static PyMethodDef scss_methods[] = {
 	{"locate_blocks", (PyCFunction)scss_locate_blocks, METH_VARARGS, "Locate Scss blocks."},
+	{"locate_block_tree", (PyCFunction)scss_locate_block_tree, METH_VARARGS, "Locate Scss blocks, and the blocks nested within them."},
 	{NULL, NULL, 0, NULL}        /* Sentinel */
 };
 
@@ -468,3 +468,289 @@ BlockLocator_iternext(BlockLocator *self)
 
 	return &self->block;
 }
+
+
+/* Block tree */
+
+/* Finds every block in a string, including blocks nested within blocks, in a
+ * single pass.  This is `locate_block_tree` in scanner.py, which documents
+ * what it returns, and behaves exactly like it. */
+
+#if PY_MAJOR_VERSION >= 3
+	#define TREE_CHAR(src, i) PyUnicode_READ((src)->kind, (src)->data, (i))
+#else
+	#define TREE_CHAR(src, i) ((Py_UCS4)((Py_UNICODE *)(src)->data)[i])
+#endif
+
+typedef struct {
+	PyObject *codestr;
+	int kind;
+	void *data;
+	Py_ssize_t length;
+} _BlockTreeSource;
+
+/* State of a body that contains the one being scanned */
+typedef struct {
+	Py_ssize_t base;
+	Py_ssize_t body_start;
+	Py_ssize_t init;
+	Py_ssize_t lose;
+	Py_ssize_t start;
+	PyObject *items;
+	Py_ssize_t lineno;
+} _BlockTreeFrame;
+
+static Py_ssize_t
+_BlockTree_count_lines(_BlockTreeSource *src, Py_ssize_t begin, Py_ssize_t end) {
+	Py_ssize_t count = 0;
+
+	for (; begin < end; begin++) {
+		if (TREE_CHAR(src, begin) == '\n') {
+			count++;
+		}
+	}
+	return count;
+}
+
+/* Append (lineno, the stripped text from begin to end, body) to items, unless
+ * the text is blank.  Steals the reference to body, which may be NULL for
+ * None. */
+static int
+_BlockTree_append(_BlockTreeSource *src, PyObject *items, Py_ssize_t lineno, Py_ssize_t begin, Py_ssize_t end, PyObject *body) {
+	PyObject *prop, *item;
+	int result;
+
+	while (begin < end && Py_UNICODE_ISSPACE(TREE_CHAR(src, begin))) begin++;
+	while (end > begin && Py_UNICODE_ISSPACE(TREE_CHAR(src, end - 1))) end--;
+	if (begin >= end) {
+		Py_XDECREF(body);
+		return 0;
+	}
+
+	prop = PySequence_GetSlice(src->codestr, begin, end);
+	if (prop == NULL) {
+		Py_XDECREF(body);
+		return -1;
+	}
+	if (body == NULL) {
+		Py_INCREF(Py_None);
+		body = Py_None;
+	}
+	item = Py_BuildValue("(nNN)", lineno, prop, body);
+	if (item == NULL) {
+		return -1;
+	}
+	result = PyList_Append(items, item);
+	Py_DECREF(item);
+	return result;
+}
+
+/* Append the properties left between begin and end, the way locate_blocks
+ * does after the last block of a body */
+static int
+_BlockTree_append_trailing(_BlockTreeSource *src, PyObject *items, Py_ssize_t lineno, Py_ssize_t begin, Py_ssize_t end) {
+	Py_ssize_t i, prop_begin, prop_end;
+
+	prop_begin = begin;
+	for (i = begin; i <= end; i++) {
+		if (i < end && TREE_CHAR(src, i) != ';') {
+			continue;
+		}
+		prop_end = i;
+		while (prop_begin < prop_end && Py_UNICODE_ISSPACE(TREE_CHAR(src, prop_begin))) prop_begin++;
+		while (prop_end > prop_begin && Py_UNICODE_ISSPACE(TREE_CHAR(src, prop_end - 1))) prop_end--;
+		lineno += _BlockTree_count_lines(src, prop_begin, prop_end);
+		if (_BlockTree_append(src, items, lineno, prop_begin, prop_end, NULL) < 0) {
+			return -1;
+		}
+		prop_begin = i + 1;
+	}
+	return 0;
+}
+
+PyObject *
+BlockLocator_tree(PyObject *codestr)
+{
+	_BlockTreeSource src;
+	_BlockTreeFrame *stack = NULL, *frame;
+	Py_ssize_t stack_sz = 0, stack_len = 0;
+	Py_ssize_t i, lineno = 1, escape = -1;
+	Py_ssize_t base = 0, body_start = 0, body_end, init = 0, lose = 0, start = -1;
+	Py_ssize_t trailing_lines;
+	int par = 0, depth = 0;
+	Py_UCS4 c, instr = 0;
+	PyObject *items, *body;
+	const char *error;
+
+	#ifdef DEBUG
+		fprintf(stderr, "%s\n", __PRETTY_FUNCTION__);
+	#endif
+
+	src.codestr = codestr;
+#if PY_MAJOR_VERSION >= 3
+	if (PyUnicode_READY(codestr) < 0) {
+		return NULL;
+	}
+	src.kind = PyUnicode_KIND(codestr);
+	src.data = PyUnicode_DATA(codestr);
+	src.length = PyUnicode_GET_LENGTH(codestr);
+#else
+	src.kind = 0;
+	src.data = PyUnicode_AS_UNICODE(codestr);
+	src.length = PyUnicode_GET_SIZE(codestr);
+#endif
+
+	items = PyList_New(0);
+	if (items == NULL) {
+		return NULL;
+	}
+
+	for (i = 0; i < src.length; i++) {
+		c = TREE_CHAR(&src, i);
+		switch (c) {
+			case '{': case '}': case ';': case '(': case ')':
+			case '\'': case '"': case '\n': case '\\':
+				break;
+			default:
+				continue;
+		}
+
+		if (c == '\n') {
+			lineno++;
+		} else if (c == '\\') {
+			/* Escape, also consumes the next character */
+			if (i + 1 < src.length) {
+				escape = i;
+				i++;
+			}
+		} else if (instr != 0) {
+			if (c == instr) {
+				/* A string ends (FIXME: needs to accept escaped characters) */
+				instr = 0;
+			}
+		} else if (c == '"' || c == '\'') {
+			/* A string starts */
+			instr = c;
+		} else if (c == '(') {
+			par++;
+		} else if (c == ')') {
+			par--;
+		} else if (par) {
+			/* Nothing else counts within parentheses */
+		} else if (c == '{') {
+			if (depth == 0 && !(i > 0 && TREE_CHAR(&src, i - 1) == '#')) {
+				/* A block begins, so the body starts right after the brace */
+				start = i;
+				if (lose < init) {
+					if (_BlockTree_append(&src, items, lineno - base, lose, init, NULL) < 0) {
+						goto error;
+					}
+					lose = init;
+				}
+
+				if (stack_len == stack_sz) {
+					stack_sz = stack_sz ? stack_sz * 2 : 16;
+					frame = PyMem_Realloc(stack, stack_sz * sizeof(_BlockTreeFrame));
+					if (frame == NULL) {
+						PyErr_NoMemory();
+						goto error;
+					}
+					stack = frame;
+				}
+				frame = &stack[stack_len++];
+				frame->base = base;
+				frame->body_start = body_start;
+				frame->init = init;
+				frame->lose = lose;
+				frame->start = start;
+				frame->items = items;
+				frame->lineno = lineno;
+
+				body_start = i + 1;
+				while (body_start < src.length && Py_UNICODE_ISSPACE(TREE_CHAR(&src, body_start))) body_start++;
+				base = lineno + _BlockTree_count_lines(&src, i + 1, body_start) - 1;
+				init = lose = body_start;
+				items = PyList_New(0);
+				if (items == NULL) {
+					/* The list is in the stack already */
+					items = stack[--stack_len].items;
+					goto error;
+				}
+			} else {
+				/* Do not process #{...} as blocks! */
+				depth++;
+			}
+		} else if (c == '}') {
+			if (depth > 0) {
+				depth--;
+			} else if (stack_len == 0) {
+				PyErr_Format(PyExc_SyntaxError, "Unexpected closing brace on line %zd", lineno);
+				goto error;
+			} else {
+				/* The current body ends */
+				body_end = i;
+				while (body_end > body_start && Py_UNICODE_ISSPACE(TREE_CHAR(&src, body_end - 1))) body_end--;
+				trailing_lines = _BlockTree_count_lines(&src, body_end, i);
+				if (escape == body_end - 1 && TREE_CHAR(&src, body_end) == '\n') {
+					trailing_lines--;
+				}
+				if (_BlockTree_append_trailing(&src, items, lineno - trailing_lines - base, lose, body_end) < 0) {
+					goto error;
+				}
+				body = Py_BuildValue("(nnN)", body_start, body_end, items);
+				frame = &stack[--stack_len];
+				items = frame->items;
+				if (body == NULL) {
+					goto error;
+				}
+
+				base = frame->base;
+				body_start = frame->body_start;
+				init = frame->init;
+				lose = frame->lose;
+				start = frame->start;
+				if (_BlockTree_append(&src, items, frame->lineno - base, init, start, body) < 0) {
+					goto error;
+				}
+				init = lose = i + 1;
+			}
+		} else if (c == ';' && depth == 0) {
+			/* End of property (or block) */
+			init = i;
+			if (lose < init) {
+				if (_BlockTree_append(&src, items, lineno - base, lose, init, NULL) < 0) {
+					goto error;
+				}
+				init = lose = i + 1;
+			}
+		}
+	}
+
+	if (stack_len) {
+		if (par) {
+			error = "Parentheses never closed";
+		} else if (instr) {
+			error = "String literal never terminated";
+		} else {
+			error = "Block never closed";
+		}
+		/* Name the innermost block left open, which may be nested deep
+		 * within the file */
+		PyErr_Format(PyExc_SyntaxError, "Couldn't parse block starting on line %zd: %s", stack[stack_len - 1].lineno, error);
+		goto error;
+	}
+
+	if (_BlockTree_append_trailing(&src, items, lineno, lose, src.length) < 0) {
+		goto error;
+	}
+	PyMem_Free(stack);
+	return items;
+
+error:
+	Py_DECREF(items);
+	while (stack_len) {
+		Py_DECREF(stack[--stack_len].items);
+	}
+	PyMem_Free(stack);
+	return NULL;
+}
@@ -55,4 +55,6 @@ Block* BlockLocator_iternext(BlockLocator *self);
 BlockLocator *BlockLocator_new(PyUnicodeObject *codestr);
 void BlockLocator_del(BlockLocator *self);
 
+PyObject *BlockLocator_tree(PyObject *codestr);
+
 #endif
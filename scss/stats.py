@@ -0,0 +1,87 @@
+"""Timing and counters for a single compilation, to find out where the time
+goes in a slow build.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import defaultdict
+import time
+
+
+# perf_counter is only on Python 3.3+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+class CompilationStats(object):
+    """Collects how often each part of a compilation ran and how long it
+    took, plus assorted counters.
+
+    ``timings`` maps a name (a phase like ``evaluate``, a directive like
+    ``@include``, or a specific mixin like ``mixin foo``) to the total time
+    spent in it, in seconds.  Times are inclusive, so an ``@include`` includes
+    every ``@include`` nested inside it; nested entries for the same name are
+    only counted once, so a recursive mixin isn't counted twice.
+
+    ``calls`` maps the same names to how many times each was entered.
+
+    ``counters`` maps names to arbitrary counts, e.g. the number of selectors
+    in the output.
+    """
+    def __init__(self):
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._depth = defaultdict(int)
+
+    def __repr__(self):
+        return "<{0} {1} timed, {2} counters>".format(
+            type(self).__name__, len(self.timings), len(self.counters))
+
+    def timed(self, name, func, *args, **kwargs):
+        """Call the given function with the given arguments, and record how
+        long it took under `name`.
+        """
+        self.calls[name] += 1
+        depth = self._depth[name]
+        if depth:
+            # Already being timed further up the stack
+            self._depth[name] = depth + 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._depth[name] -= 1
+
+        self._depth[name] = 1
+        start = _timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.timings[name] += _timer() - start
+            self._depth[name] = 0
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def format(self):
+        """Return a human-readable report, slowest first."""
+        lines = []
+        if self.timings:
+            width = max(len(name) for name in self.timings)
+            lines.append("{0:<{1}}  {2:>10}  {3:>8}".format(
+                "", width, "time (ms)", "calls"))
+            for name, seconds in sorted(
+                    self.timings.items(), key=lambda item: (-item[1], item[0])):
+                lines.append("{0:<{1}}  {2:>10.2f}  {3:>8}".format(
+                    name, width, seconds * 1000, self.calls[name]))
+        if self.counters:
+            if lines:
+                lines.append("")
+            width = max(len(name) for name in self.counters)
+            for name, value in sorted(self.counters.items()):
+                lines.append("{0:<{1}}  {2:>10}".format(name, width, value))
+        return "\n".join(lines) + "\n"
+
+
+__all__ = ('CompilationStats',)
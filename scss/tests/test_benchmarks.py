@@ -0,0 +1,82 @@
+"""Tests for the benchmark harness (not the benchmarks themselves)."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+from scss.benchmarks import PHASES
+from scss.benchmarks import collect_expressions
+from scss.benchmarks import compare_results
+from scss.benchmarks import run_benchmarks
+from scss.benchmarks import run_expression_benchmarks
+from scss.benchmarks.inputs import BenchmarkInput
+from scss.benchmarks.inputs import corpus_inputs
+from scss.benchmarks.inputs import generated_inputs
+from scss.benchmarks.inputs import ruby_extend_inputs
+
+
+def test_run_benchmarks():
+    inputs = list(generated_inputs(scale=5))
+    inputs.append(BenchmarkInput('broken', "a { b: $undefined; }"))
+    inputs.append(BenchmarkInput('unbalanced', "a { b: c;"))
+
+    results = run_benchmarks(inputs, repeat=2)
+
+    assert results['repeat'] == 2
+    assert set(results['results']) == set(i.name for i in inputs)
+    for name, result in results['results'].items():
+        if name == 'broken':
+            assert 'Undefined variable' in result['error']
+            continue
+        if name == 'unbalanced':
+            assert 'Block never closed' in result['error']
+            continue
+        for phase in PHASES + ('total',):
+            assert result[phase] >= 0
+
+
+def test_run_expression_benchmarks():
+    inputs = [
+        BenchmarkInput('a', "$x: 1px; a { b: $x * 2; c: $x * 2; d: e }"),
+        BenchmarkInput('broken', "a { b: $x + 1; c: $y + 1; }"),
+    ]
+    # Each distinct expression once, in the order they were parsed; plain
+    # CSS values never get parsed at all, and nothing after an error is
+    assert collect_expressions(inputs) == [
+        ('goal', '1px'), ('goal', '$x * 2'), ('goal', '$x + 1')]
+
+    results = run_expression_benchmarks(inputs, repeat=2)
+    assert set(results['results']) == set([
+        'expressions/pratt', 'expressions/yapps'])
+    for result in results['results'].values():
+        assert result['count'] == 3
+        assert result['total'] == result['parse'] >= 0
+
+
+def test_corpus_inputs():
+    names = [i.name for i in corpus_inputs()]
+    assert names == sorted(names)
+    assert 'general/000-smoketest.scss' in names
+    assert not [name for name in names if name.startswith('from_ruby/')]
+
+
+def test_ruby_extend_inputs():
+    inputs = dict((i.name, i) for i in ruby_extend_inputs())
+    assert inputs['from_ruby/test_extend/test_basic-1'].contents == (
+        ".foo {a: b}\n.bar {@extend .foo}\n")
+    # Built by the assert_extends helper
+    assert '.baz {@extend .foo; @extend .bar}' in (
+        inputs['from_ruby/test_extend/test_multiple_extends_with_single_extender_and_single_target-1'].contents)
+
+
+def test_compare_results():
+    baseline = {'results': {
+        'a': {'total': 1.0},
+        'b': {'total': 1.0},
+        'c': {'error': 'oops'},
+    }}
+    current = {'results': {
+        'a': {'total': 1.05},
+        'b': {'total': 2.0},
+        'c': {'total': 5.0},
+        'd': {'total': 5.0},
+    }}
+    assert compare_results(baseline, current) == [('b', 1.0, 2.0)]
@@ -0,0 +1,146 @@
+"""Tests for the block-level syntax tree."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pytest
+
+import scss.blockast
+from scss.blockast import EXPRESSION
+from scss.blockast import INTERPOLATED
+from scss.blockast import LITERAL
+from scss.blockast import classify_declaration
+from scss.blockast import parse_blocks
+from scss.calculator import Calculator
+from scss.compiler import compile_string
+from scss.errors import SassEvaluationError
+
+
+def test_parse_blocks():
+    blocks = parse_blocks("a: b; foo { c: d; bar { e: f } }")
+
+    assert [block.prop for block in blocks] == ['a: b', 'foo']
+    assert blocks[0].contents is None
+
+    foo, = blocks[1:]
+    assert foo.header.is_selector
+    assert [block.prop for block in foo.contents] == ['c: d', 'bar']
+    # Children are parsed once and then kept
+    assert foo.contents is foo.contents
+
+
+def test_nested_blocks_found_in_one_pass(monkeypatch):
+    calls = []
+    locate_block_tree = scss.blockast.locate_block_tree
+
+    def counting_locate_block_tree(codestr):
+        calls.append(codestr)
+        return locate_block_tree(codestr)
+
+    monkeypatch.setattr(
+        scss.blockast, 'locate_block_tree', counting_locate_block_tree)
+
+    source = "@mixin m { color: red; }\n" + "a { b { @include m; } }\n" * 50
+    compile_string(source)
+
+    assert calls == [source]
+
+
+def test_nested_line_numbers():
+    source = "a {\n  b: c;\n\n  d {\n    e: f;\n    g: h\n  }\n}\ni: j"
+    a, i = parse_blocks(source)
+    assert (a.lineno, i.lineno) == (1, 9)
+
+    b, d = a.contents
+    # Relative to the start of the block's own contents
+    assert (b.lineno, d.lineno) == (1, 3)
+    assert [block.lineno for block in d.contents] == [1, 2]
+    assert d.unparsed_contents == "e: f;\n    g: h"
+
+
+def test_unclosed_nested_block_line_number():
+    # The innermost block left open is named, not the end of the file
+    source = "a {\n  b: c;\n}\nd {\n  e {\n    f: g;\n\n  h { i: j; }\n"
+    with pytest.raises(SyntaxError) as excinfo:
+        parse_blocks(source)
+    assert "block starting on line 5: Block never closed" in str(excinfo.value)
+
+
+def test_shared_at_rule_header_is_not_mutated():
+    source = """\
+@mixin respond($width) {
+    @media (min-width: $width) {
+        a { b: c; }
+    }
+}
+@include respond(10px);
+@include respond(20px);
+"""
+    expected = """\
+@media (min-width: 10px) {
+  a {
+    b: c;
+  }
+}
+
+@media (min-width: 20px) {
+  a {
+    b: c;
+  }
+}
+"""
+
+    assert compile_string(source, output_style='expanded') == expected
+
+
+def test_classify_declaration():
+    assert classify_declaration('display:  block ') == (
+        LITERAL, 'display', 'block')
+    assert classify_declaration('border: 1px solid #ccc !important') == (
+        LITERAL, 'border', '1px solid #ccc !important')
+    assert classify_declaration('width: #{$width}px') == (
+        INTERPOLATED, 'width', '#{$width}px')
+
+    # Anything Sass would change on the way out needs evaluating
+    for prop in (
+            'color: white', 'color: #cccccc', 'margin: 0px', 'margin: 0.5em',
+            'a: b  c', 'a: b, c', 'a: null', 'a: b and c', 'a: 1e3',
+            'width: $width', 'width: #{$a} #{$b}', 'a: #{$b}-c',
+            '$width: 10px', 'width = 10px', '#{$a}: b'):
+        assert classify_declaration(prop) == (EXPRESSION, None, None), prop
+
+
+def test_literal_declarations_skip_evaluation(monkeypatch):
+    calls = []
+    calculate = Calculator.calculate
+
+    def recording_calculate(self, expression, divide=False):
+        calls.append(expression)
+        return calculate(self, expression, divide=divide)
+
+    monkeypatch.setattr(Calculator, 'calculate', recording_calculate)
+
+    source = """\
+$width: 10;
+a {
+    display: block;
+    border: 1px solid #ccc;
+    font: { weight: bold; }
+    height: #{$width}px;
+    color: white;
+}
+"""
+    expected = """\
+a{display:block;border:1px solid #ccc;font-weight:bold;height:10px;color:#fff}
+"""
+
+    assert compile_string(source, output_style='compressed') == expected
+    assert calls == ['10', 'white']
+
+
+def test_interpolated_declaration_errors():
+    # Evaluating an interpolated declaration directly still reports what
+    # went wrong in the expression
+    with pytest.raises(SassEvaluationError) as excinfo:
+        compile_string("a { width: #{$nope}px; }")
+    assert "Error evaluating expression:\n    #{$nope}px" in str(excinfo.value)
+    assert "Undefined variable" in str(excinfo.value)
@@ -27,3 +27,58 @@ table td {
   color: red;
 }
 """
+
+
+def test_parallel_build(tmpdir):
+    src = tmpdir.mkdir('src')
+    out = tmpdir.mkdir('out')
+    src.join('_shared.scss').write("$color: red;\n")
+    paths = []
+    for name in ('one', 'two', 'three'):
+        path = src.join(name + '.scss')
+        path.write(
+            '@import "shared";\n'
+            '@warn "' + name + '";\n'
+            '.' + name + ' { color: $color; }\n'
+        )
+        paths.append(str(path))
+    bad = src.join('bad.scss')
+    bad.write("a { color: $undefined; }\n")
+    paths.insert(1, str(bad))
+
+    proc = Popen(
+        ['python', '-m', 'scss.tool', '-C', '-j', '2', '-o', str(out)]
+        + paths,
+        stdout=PIPE,
+        stderr=PIPE,
+        universal_newlines=True,
+    )
+    _, err = proc.communicate()
+
+    assert proc.returncode == 1
+    for name in ('one', 'two', 'three'):
+        assert out.join(name + '.css').read() == (
+            '.' + name + ' {\n  color: red;\n}\n')
+    assert not out.join('bad.css').check()
+
+    # Messages come out in the order the files were given
+    reported = []
+    for line in err.splitlines():
+        path = line.split(':', 1)[0]
+        if line.startswith(str(src)) and path not in reported[-1:]:
+            reported.append(path)
+    assert reported == paths
+
+
+def test_build_one_unbalanced(tmpdir):
+    from scss.tool import _build_one
+
+    src = tmpdir.join('bad.scss')
+    src.write("a { b: c;\n")
+    dest = tmpdir.join('bad.css')
+
+    path, messages, error, stats = _build_one(
+        (str(src), str(dest), {}, [], False))
+    assert path == str(src)
+    assert "Block never closed" in error
+    assert not dest.check()
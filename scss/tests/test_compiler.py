@@ -0,0 +1,220 @@
+"""Tests for the compiler's programmatic interface."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from scss import config
+from scss.compiler import Compiler
+from scss.errors import SassError
+from scss.source import SourceFile
+
+
+def _write(path, contents):
+    path.write_text(contents)
+    return path
+
+
+def test_dependency_map(tmpdir):
+    root = Path(str(tmpdir))
+    _write(root / '_colors.scss', '$fg: red;')
+    _write(root / '_base.scss', '@import "colors";\na { color: $fg; }')
+    _write(root / 'main.scss', '@import "base";')
+
+    compiler = Compiler(root=root, search_path=['.'])
+    compilation = compiler.run_compilation('main.scss')
+    main, = compilation.entry_sources
+
+    keys = set(source.key for source in compilation.sources)
+    assert compilation.dependencies_of(main) == keys - set([main.key])
+    for source in compilation.sources:
+        assert source.content_hash
+        assert source.mtime is not None
+
+
+def test_recompile(tmpdir):
+    root = Path(str(tmpdir))
+    _write(root / '_colors.scss', '$fg: red;')
+    _write(root / '_unrelated.scss', '$bg: blue;')
+    _write(root / 'main.scss', '@import "colors";\na { color: $fg; }')
+
+    compiler = Compiler(root=root, search_path=['.'], output_style='compact')
+    first = compiler.run_compilation('main.scss')
+    assert first.output == 'a { color: red; }\n'
+
+    # Nothing this compilation depends on has changed
+    assert compiler.recompile(first) is first
+    assert compiler.recompile(first, ['_unrelated.scss']) is first
+
+    _write(root / '_colors.scss', '$fg: green;')
+    second = compiler.recompile(first, ['_colors.scss'])
+    assert second is not first
+    assert second.output == 'a { color: green; }\n'
+    # The unchanged entry point was carried over, not read again
+    assert second.entry_sources[0] is first.entry_sources[0]
+
+    # Without explicit paths, changes are found from mtimes and hashes
+    _write(root / 'main.scss', '@import "colors";\nb { color: $fg; }')
+    # Don't depend on the filesystem's timestamp resolution
+    os.utime(str(root / 'main.scss'), (0, 0))
+    third = compiler.recompile(second)
+    assert third.output == 'b { color: green; }\n'
+
+
+def test_recompile_each(tmpdir):
+    root = Path(str(tmpdir))
+    _write(root / '_colors.scss', '$fg: red;')
+    _write(root / '_sizes.scss', '$size: 1px;')
+    _write(root / 'a.scss', '@import "colors";\na { color: $fg; }')
+    _write(root / 'b.scss', '@import "sizes";\nb { width: $size; }')
+    _write(root / 'c.scss', '@import "colors";\nc { color: $fg; }')
+
+    compiler = Compiler(root=root, search_path=['.'], output_style='compact')
+    first = [
+        compiler.run_compilation(name)
+        for name in ('a.scss', 'b.scss', 'c.scss')]
+    assert compiler.recompile_each(first, ['_unrelated.scss']) == first
+
+    _write(root / '_colors.scss', '$fg: green;')
+    a, b, c = compiler.recompile_each(first, ['_colors.scss'])
+    assert [a.output, c.output] == [
+        'a { color: green; }\n', 'c { color: green; }\n']
+    # Only the entry points importing the changed file were rerun
+    assert a is not first[0] and c is not first[2]
+    assert b is first[1]
+    # The changed file was read once and shared
+    colors_a, = [s for s in a.sources if s.path.endswith('_colors.scss')]
+    colors_c, = [s for s in c.sources if s.path.endswith('_colors.scss')]
+    assert colors_a is colors_c
+
+
+def test_compile_to(tmpdir):
+    root = Path(str(tmpdir))
+    _write(root / 'main.scss', """\
+a, b { color: red; }
+@media screen { c { d: e } }
+""")
+
+    for style in ('nested', 'expanded', 'compact', 'compressed'):
+        compiler = Compiler(root=root, search_path=['.'], output_style=style)
+        chunks = []
+
+        class Stream(object):
+            def write(self, chunk):
+                chunks.append(chunk)
+
+        compiler.compile_to(Stream(), 'main.scss')
+        assert len(chunks) > 1
+        assert ''.join(chunks) == compiler.compile('main.scss')
+
+
+def test_compile_to_live_errors(tmpdir):
+    root = Path(str(tmpdir))
+    _write(root / 'main.scss', 'a { b: $undefined; }')
+
+    compiler = Compiler(root=root, search_path=['.'], live_errors=True)
+    stream = io.StringIO()
+    compiler.compile_to(stream, 'main.scss')
+    assert stream.getvalue() == compiler.compile('main.scss')
+    assert 'Undefined variable' in stream.getvalue()
+
+
+def test_stats():
+    compiler = Compiler(collect_stats=True)
+    compilation = compiler.make_compilation()
+    compilation.add_source(SourceFile.from_string("""\
+@mixin inner($x) { b: $x; }
+@mixin outer($x) { @include inner($x); c { d: $x } }
+@for $i from 1 through 3 {
+    .a-#{$i} { @include outer($i); }
+}
+"""))
+    compilation.run()
+    stats = compilation.stats
+
+    assert stats.calls['@include'] == 6
+    assert stats.calls['mixin outer'] == 3
+    assert stats.calls['mixin inner'] == 3
+    assert stats.calls['@for'] == 1
+    for name in ('evaluate', 'extend', 'css', '@include', 'mixin inner'):
+        assert stats.timings[name] >= 0
+    # Nested @includes aren't counted again
+    assert stats.timings['@include'] <= stats.timings['@for']
+    assert stats.counters['selectors'] == 6
+    assert 'mixin outer' in stats.format()
+
+    assert Compiler().make_compilation().stats is None
+
+
+def test_extend_batches_selectors():
+    compiler = Compiler(output_style='expanded', collect_stats=True)
+    compilation = compiler.make_compilation()
+    compilation.add_source(SourceFile.from_string("""\
+%base { a: b; }
+.one { @extend %base; }
+.two { @extend %base; }
+.two-b { @extend .two; }
+.one { @extend %base; }
+"""))
+    css = compilation.run()
+
+    assert css == ".one, .two, .two-b {\n  a: b;\n}\n"
+    # .two-b is also added to the (empty) .two rule
+    assert compilation.stats.counters['selectors added by @extend'] == 4
+
+
+def test_extend_limit(monkeypatch):
+    monkeypatch.setattr(config, 'MAX_EXTEND_SELECTORS', 2)
+    compiler = Compiler()
+    source = """\
+%base { a: b; }
+.one { @extend %base; }
+.two { @extend %base; }
+.three { @extend %base; }
+"""
+    with pytest.raises(SassError) as excinfo:
+        compiler.compile_string(source)
+    assert '@extend generated more than 2 selectors' in str(excinfo.value)
+
+    monkeypatch.setattr(config, 'MAX_EXTEND_SELECTORS', None)
+    assert '.three' in compiler.compile_string(source)
+
+
+def test_unbalanced_source(tmpdir):
+    with pytest.raises(SassError) as excinfo:
+        Compiler().compile_string("a { b: c;")
+    assert "Block never closed" in str(excinfo.value)
+    assert excinfo.value.rule_stack
+
+    # The error names the imported file, and the import it came through
+    root = Path(str(tmpdir))
+    _write(root / '_broken.scss', 'a { b: c; }\n}\n')
+    _write(root / 'main.scss', 'x { y: z; }\n@import "broken";')
+    with pytest.raises(SassError) as excinfo:
+        Compiler(root=root, search_path=['.']).compile('main.scss')
+    assert "Unexpected closing brace on line 2" in str(excinfo.value)
+    assert [rule.source_file.relpath.name for rule in excinfo.value.rule_stack] == [
+        '_broken.scss', 'main.scss']
+
+
+def test_nested_ancestry_is_shared():
+    compiler = Compiler(output_style='expanded')
+    compilation = compiler.make_compilation()
+    compilation.add_source(SourceFile.from_string("""\
+@mixin m { .child { a: b; } }
+.parent { @include m; @include m; }
+.parent { @include m; }
+"""))
+    css = compilation.run()
+
+    assert css.count(".parent .child {") == 3
+    children = [rule for rule in compilation.rules if rule.nested == 2]
+    assert len(children) == 3
+    # Both parents are parsed under the same (root) ancestry, so every child
+    # ends up with the same ancestry too
+    assert children[0].ancestry is children[1].ancestry is children[2].ancestry
+    assert children[0].extends_selectors is not children[1].extends_selectors
@@ -11,6 +11,7 @@ from scss.calculator import Calculator
 from scss.errors import SassEvaluationError
 from scss.errors import SassSyntaxError
 from scss.extension.core import CoreExtension
+from scss.namespace import Namespace
 from scss.types import Color, List, Null, Number, String
 from scss.types import Function
 
@@ -167,3 +168,184 @@ def test_parse_special_functions():
 # TODO assert things about particular kinds of parse /errors/, too
 # TODO errors really need to be more understandable  :(  i think this requires
 # some additions to yapps
+
+
+def test_parse_cache():
+    from scss.util import LRUCache
+
+    cache = LRUCache(1)
+    calc = Calculator(ast_cache=cache)
+    first = calc.parse_expression('1 + 2')
+    assert calc.parse_expression('1 + 2') is first
+    calc.parse_expression('17 + 42')
+    assert calc.parse_expression('1 + 2') is not first
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 3, 2)
+    # The shared cache was left alone
+    assert ('goal', '17 + 42') not in Calculator.ast_cache
+
+
+def test_shared_parse_cache_size(monkeypatch):
+    from scss import config
+
+    # The shared cache is sized from the config when it's first used, not
+    # when pyScss is imported
+    shared = Calculator.__dict__['ast_cache']
+    monkeypatch.setattr(shared, 'cache', None)
+    monkeypatch.setattr(config, 'EXPRESSION_CACHE_SIZE', 2)
+
+    calc = Calculator()
+    for expr in ('1 + 2', '3 + 4', '5 + 6'):
+        calc.parse_expression(expr)
+    assert Calculator.ast_cache is calc.ast_cache
+    assert Calculator.ast_cache.maxsize == 2
+    assert len(Calculator.ast_cache) == 2
+
+
+def test_scanner_prefers_earlier_patterns():
+    from scss.grammar.scanner import Scanner
+
+    patterns = [('AB', 'ab'), ('AS', '(?i)a+'), ('A', 'a'), ('SPACE', ' +')]
+    scanner = Scanner(patterns, ['SPACE'], 'ab  AAa a')
+    assert [scanner.token(i)[2:] for i in range(3)] == [
+        ('AB', 'ab'), ('AS', 'AAa'), ('AS', 'a')]
+
+    # Restrictions leave out the other patterns, but not the ignored ones
+    scanner = Scanner(patterns, ['SPACE'], 'aa ab')
+    assert scanner.token(0, frozenset(['A'])) == (0, 1, 'A', 'a')
+    assert scanner.token(1, frozenset(['A'])) == (1, 2, 'A', 'a')
+    assert scanner.token(2, frozenset(['A', 'AB'])) == (3, 5, 'AB', 'ab')
+
+
+def test_compiler_expression_cache():
+    from scss.compiler import Compiler
+
+    compiler = Compiler(expression_cache=100)
+    compiler.compile_string("a { b: 1 + 2 }")
+    assert len(compiler.expression_cache) > 0
+    assert compiler.expression_cache.maxsize == 100
+
+
+def test_function_call_cache():
+    ns = CoreExtension.namespace.derive()
+    calc = Calculator(ns)
+    node = calc.parse_expression('double(2)')
+
+    # Plain CSS, until a function by that name exists
+    assert node.evaluate(calc) == String('double(2)', quotes=None)
+    ns.set_function('double', 1, lambda n: n * Number(2))
+    assert node.evaluate(calc) == Number(4)
+
+    # Redefining it counts, too
+    ns.set_function('double', 1, lambda n: n * Number(3))
+    assert node.evaluate(calc) == Number(6)
+
+    # The same node evaluated in an unrelated namespace doesn't see it
+    other = Calculator(CoreExtension.namespace.derive())
+    assert node.evaluate(other) == String('double(2)', quotes=None)
+
+    # Extra arguments are passed as a single list
+    node = calc.parse_expression('double(1, 2)')
+    assert node.evaluate(calc) == List([Number(3), Number(6)], use_comma=True)
+
+
+def test_constant_folding():
+    calc = Calculator(CoreExtension.namespace.derive())
+
+    node = calc.parse_expression('10px * 3 + 2px')
+    assert node._constant == Number(32, 'px')
+    assert calc.parse_expression('$x * 3')._constant is None
+
+    # Whether a lone slash divides depends on where the expression is used,
+    # so it can't be folded ahead of time
+    node = calc.parse_expression('10px/2')
+    assert node._constant is None
+    assert node.evaluate(calc, divide=False) == String('10px / 2', quotes=None)
+    assert node.evaluate(calc, divide=True) == Number(5, 'px')
+
+    # Errors still happen when evaluating, not when parsing
+    node = calc.parse_expression('1px + 1em')
+    with pytest.raises(ValueError):
+        node.evaluate(calc)
+
+
+def test_pure_function_call_folding():
+    calc = Calculator(CoreExtension.namespace.derive())
+    node = calc.parse_expression('lighten(#333, 10%)')
+    ret = node.evaluate(calc)
+    assert node.evaluate(calc) is ret
+
+    ns = Namespace()
+
+    @ns.declare_pure
+    def twice(n):
+        return n * Number(2)
+
+    calc = Calculator(ns)
+    node = calc.parse_expression('twice(2)')
+    assert node.evaluate(calc) == Number(4)
+    assert node.evaluate(calc) is node.evaluate(calc)
+
+    # A function defined in Sass, or anywhere else, isn't assumed to be pure
+    ns.set_function('twice', 1, lambda n: String('nope'))
+    assert node.evaluate(calc) == String('nope')
+    assert node.evaluate(calc) is not node.evaluate(calc)
+
+
+def test_compiled_expressions():
+    ns = CoreExtension.namespace.derive()
+    ns.set_variable('$x', Number(3, 'px'))
+    ns.set_variable('$list', List([Number(1), Number(2)]))
+    calc = Calculator(ns)
+    compiled_calc = Calculator(ns, compile_expressions=True)
+
+    for expr in (
+            '$x * 2 + 1px', '10px/2', '$x/2', '(10px/2)', '-$x',
+            'not $x', '$x and null', 'null or $x', 'if($x > 1px, a, b)',
+            'percentage(0.5) $x, 1px solid', 'rgba(#fff, 0.5)',
+            'max($list...)', 'foo#{$x}bar', '#{$x}/2', 'url(foo#{$x}.png)',
+            'alpha(opacity=20)', '(a: $x, b: 2)', 'unknown($x, 2)'):
+        for divide in (False, True):
+            expected = calc.evaluate_expression(expr, divide=divide)
+            assert compiled_calc.evaluate_expression(expr, divide=divide) == expected
+
+    # Variables are still looked up each time
+    node = calc.parse_expression('$x * 2')
+    ns.set_variable('$x', Number(5, 'px'))
+    assert node.compiled()(compiled_calc) == Number(10, 'px')
+
+    with pytest.raises(SassEvaluationError):
+        compiled_calc.evaluate_expression('$undefined + 1')
+
+
+def test_pratt_parser():
+    import pickle
+    from scss.errors import SassBaseError
+    from scss.util import LRUCache
+
+    yapps = Calculator(ast_cache=LRUCache())
+    pratt = Calculator(ast_cache=LRUCache(), expression_parser='pratt')
+
+    for expr in (
+            '1 + 2 * 3 - 4 / 5 % 6', '-1 - -2', '+$x * -$y', '1-2', '1 -2',
+            'a == b and c != d or not e < f', 'not not $x', 'not $x == $y',
+            '$a or $b and $c or $d', '1 < 2 <= 3 > 4 >= 5',
+            '(1 + 2) * 3', '1px solid red, 2px dashed blue',
+            'foo(1 + 2, $b: 3 * 4)', '#{1 + 2} * 3', 'a + b c - d',
+            '(a: 1 + 2, b: not $c)'):
+        expected = yapps.parse_expression(expr)
+        actual = pratt.parse_expression(expr)
+        assert pickle.dumps(actual, 2) == pickle.dumps(expected, 2)
+
+    for expr in ('1 +', '* 2', 'not', '1 == == 2', '(1 + 2'):
+        with pytest.raises(SassBaseError) as expected:
+            yapps.parse_expression(expr)
+        with pytest.raises(SassBaseError) as actual:
+            pratt.parse_expression(expr)
+        # Parse errors carry a Python traceback, which is bound to differ
+        for error in (actual.value, expected.value):
+            error.original_traceback = None
+        assert type(actual.value) is type(expected.value)
+        assert str(actual.value) == str(expected.value)
+
+    with pytest.raises(ValueError):
+        Calculator(expression_parser='recursive')
@@ -124,3 +124,20 @@ def test_missing_import():
         compile_string("""
             @import "bogus-file";
         """)
+
+
+def test_lru_cache():
+    from scss.util import LRUCache
+
+    cache = LRUCache(2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    # 'b' was the least recently used
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+    assert len(cache) == 2
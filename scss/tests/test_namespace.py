@@ -0,0 +1,92 @@
+"""Tests for variable scoping."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pytest
+
+from scss.namespace import Namespace
+from scss.types import Number
+from scss.types import Undefined
+
+
+def test_assignment_replaces_existing_binding():
+    root = Namespace()
+    root.set_variable('$x', Number(1))
+    child = root.derive()
+    grandchild = child.derive()
+
+    assert grandchild.variable('$x') == Number(1)
+    grandchild.set_variable('$x', Number(2))
+    assert root.variable('$x') == Number(2)
+
+    grandchild.set_variable('$x', Number(3), local_only=True)
+    assert grandchild.variable('$x') == Number(3)
+    assert child.variable('$x') == Number(2)
+
+
+def test_lookups_see_later_bindings():
+    root = Namespace()
+    root.set_variable('$x', Number(1))
+    child = root.derive()
+    grandchild = child.derive()
+    sibling = child.derive()
+
+    # Warm up the cached locations
+    assert grandchild.variable('$x') == Number(1)
+    assert sibling.variable('$x') == Number(1)
+    with pytest.raises(KeyError):
+        grandchild.variable('$y')
+
+    # A new binding in between masks the old one
+    child.set_variable('$x', Number(2), local_only=True)
+    assert grandchild.variable('$x') == Number(2)
+    assert sibling.variable('$x') == Number(2)
+    assert root.variable('$x') == Number(1)
+
+    # And a name that was missing can appear later
+    root.set_variable('$y', Number(3))
+    assert grandchild.variable('$y') == Number(3)
+
+
+def test_undefined_binding_is_masked():
+    root = Namespace()
+    root.set_variable('$x', Undefined())
+    child = root.derive()
+    child.set_variable('$x', Number(1))
+
+    assert child.variable('$x') == Number(1)
+    assert isinstance(root.variable('$x'), Undefined)
+
+
+def test_deep_chain():
+    namespace = Namespace()
+    namespace.set_variable('$x', Number(1))
+    for i in range(50):
+        namespace = namespace.derive()
+        namespace.set_variable('$local-{0}'.format(i), Number(i), local_only=True)
+
+    for _ in range(3):
+        assert namespace.variable('$x') == Number(1)
+        assert namespace.variable('$local-10') == Number(10)
+
+
+def test_derive_shares_scopes_until_written():
+    root = Namespace()
+    root.set_variable('$x', Number(1))
+    child = root.derive()
+    grandchild = child.derive()
+    assert grandchild._variables is root._variables
+    assert grandchild._mixins is root._mixins
+
+    grandchild.set_variable('$y', Number(2), local_only=True)
+    # The parent defines something after its child already has a scope
+    child.set_variable('$z', Number(3), local_only=True)
+    assert grandchild._variables is not child._variables
+    assert grandchild._mixins is root._mixins
+    assert grandchild.variable('$z') == Number(3)
+    assert grandchild.variable('$x') == Number(1)
+
+    with pytest.raises(KeyError):
+        child.variable('$y')
+    with pytest.raises(KeyError):
+        root.variable('$z')
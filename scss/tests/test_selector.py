@@ -0,0 +1,53 @@
+"""Tests for the selector objects."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pickle
+
+import pytest
+
+from scss.selector import Selector
+from scss.selector import SimpleSelector
+
+
+def test_selectors_are_interned():
+    a, = Selector.parse_many('.foo > a:hover')
+    b, = Selector.parse_many(' .foo > a:hover ')
+    assert a is b
+    assert a.simple_selectors[1] is SimpleSelector('>', ['a', ':hover'])
+    assert Selector(a.simple_selectors) is a
+
+    c, = Selector.parse_many('.foo a:hover')
+    assert c is not a
+    assert c != a
+
+
+def test_selectors_are_immutable():
+    selector = Selector.parse_one('.foo')
+    with pytest.raises(AttributeError):
+        selector.simple_selectors = ()
+    with pytest.raises(AttributeError):
+        selector.simple_selectors[0].tokens = ('.bar',)
+
+
+def test_selector_flags():
+    selector = Selector.parse_one('%placeholder & .foo')
+    assert selector.has_placeholder
+    assert selector.has_parent_reference
+    assert selector.simple_selectors[0].token_set == frozenset(['%placeholder'])
+
+    selector = Selector.parse_one('.foo')
+    assert not selector.has_placeholder
+    assert not selector.has_parent_reference
+
+
+def test_lookup_key_is_cached():
+    selector = Selector.parse_one('div.foo#bar:hover')
+    key = selector.lookup_key()
+    assert key == frozenset(['div', '.foo', '#bar'])
+    assert selector.lookup_key() is key
+
+
+def test_pickle_round_trip():
+    selector = Selector.parse_one('.foo > a:hover')
+    assert pickle.loads(pickle.dumps(selector)) is selector
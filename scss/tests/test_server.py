@@ -0,0 +1,87 @@
+"""Tests for the resident compile server."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import logging
+import os
+import socket
+import threading
+
+import pytest
+
+from scss.server import CompileServer
+from scss.server import send_request
+from scss.server import serve
+
+
+def test_compile_and_recompile(tmpdir, caplog):
+    # conftest only lets errors through, which would hide the @warn below
+    caplog.set_level(logging.WARNING, logger='scss')
+
+    tmpdir.join('_colors.scss').write('$fg: red;')
+    main = tmpdir.join('main.scss')
+    main.write('@import "colors";\n@warn "hi";\na { color: $fg; }')
+
+    server = CompileServer()
+    request = dict(
+        command='compile', id=1, cwd=str(tmpdir), files=['main.scss'],
+        style='compact')
+
+    response = server.handle(request)
+    assert response['ok'], response
+    assert response['id'] == 1
+    assert response['css'] == 'a { color: red; }\n'
+    assert len(response['messages']) == 1
+
+    # Nothing changed, so the same result comes back, warnings and all
+    assert server.handle(request) == response
+
+    tmpdir.join('_colors.scss').write('$fg: blue;')
+    os.utime(str(tmpdir.join('_colors.scss')), (0, 0))
+    response = server.handle(request)
+    assert response['css'] == 'a { color: blue; }\n'
+
+    assert server.handle(dict(command='stats'))['compilations'] == 1
+
+
+def test_compile_string_and_errors():
+    server = CompileServer()
+
+    response = server.handle(dict(
+        command='compile', string='a { b: 1 + 2 }', style='compact'))
+    assert response['css'] == 'a { b: 3; }\n'
+
+    response = server.handle(dict(
+        command='compile', string='a { b: $undefined }'))
+    assert not response['ok']
+    assert 'Undefined variable' in response['error']
+
+    assert not server.handle(dict(command='bogus'))['ok']
+    assert not server.handle(['not', 'a', 'dict'])['ok']
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX'), reason='requires Unix sockets')
+def test_serve(tmpdir):
+    socket_path = str(tmpdir.join('pyscss.sock'))
+    thread = threading.Thread(target=serve, args=(socket_path,))
+    thread.start()
+    try:
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            thread.join(0.05)
+
+        response = send_request(socket_path, dict(command='ping', id='x'))
+        assert response['ok']
+        assert response['id'] == 'x'
+
+        response = send_request(socket_path, dict(
+            command='compile', string='a { b: c }', style='compressed'))
+        assert response['css'] == 'a{b:c}\n'
+    finally:
+        send_request(socket_path, dict(command='shutdown'))
+        thread.join(5)
+
+    assert not thread.is_alive()
+    assert not os.path.exists(socket_path)
@@ -0,0 +1,118 @@
+"""Tests for source file loading and preparation."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+
+import scss.config
+from scss.compiler import compile_string
+from scss.source import SourceFile
+
+
+SOURCE = """\
+// comment
+a {
+    b: "c;d";
+    e { f: g }
+}
+"""
+
+
+def test_source_cache(tmpdir, monkeypatch):
+    monkeypatch.setattr(scss.config, 'CACHE_ROOT', str(tmpdir))
+
+    first = SourceFile.from_string(SOURCE)
+    assert not tmpdir.listdir()
+    expected_blocks = first.blocks
+    assert len(tmpdir.listdir()) == 1
+
+    # A second file with the same contents comes straight from the cache
+    def fail_prepare(self, codestr, sass=False):
+        raise AssertionError("source should have been cached")
+    monkeypatch.setattr(SourceFile, 'prepare_source', fail_prepare)
+
+    second = SourceFile.from_string(SOURCE)
+    assert second.contents == first.contents
+    assert [b.prop for b in second.blocks] == [b.prop for b in expected_blocks]
+    nested, = second.blocks
+    # The nested structure was stored too
+    assert nested._contents is not None
+
+
+def test_source_cache_key_includes_syntax(tmpdir, monkeypatch):
+    monkeypatch.setattr(scss.config, 'CACHE_ROOT', str(tmpdir))
+
+    SourceFile.from_string("a\n  b: c\n", is_sass=True).blocks
+    SourceFile.from_string("a\n  b: c\n", is_sass=False).blocks
+    assert len(tmpdir.listdir()) == 2
+
+
+def test_source_cache_ignores_other_formats(tmpdir, monkeypatch):
+    import pickle
+    import scss.source
+
+    monkeypatch.setattr(scss.config, 'CACHE_ROOT', str(tmpdir))
+    SourceFile.from_string(SOURCE).blocks
+    cache_file, = tmpdir.listdir()
+
+    # An entry written in another format, or in the older format without a
+    # version at all, is a miss rather than a source of stale blocks
+    for entry in ((0, "stale", ()), ("stale", ())):
+        with open(str(cache_file), 'wb') as f:
+            pickle.dump(entry, f)
+        source = SourceFile.from_string(SOURCE)
+        assert source.contents != "stale"
+        assert source.blocks
+
+    # And a new format gets entries of its own
+    monkeypatch.setattr(scss.source, 'CACHE_FORMAT', scss.source.CACHE_FORMAT + 1)
+    SourceFile.from_string(SOURCE).blocks
+    assert len(tmpdir.listdir()) == 2
+
+
+def test_source_cache_output(tmpdir, monkeypatch):
+    monkeypatch.setattr(scss.config, 'CACHE_ROOT', str(tmpdir))
+
+    uncached = compile_string(SOURCE)
+    cached = compile_string(SOURCE)
+    assert uncached == cached
+    assert os.listdir(str(tmpdir))
+
+
+def test_prepare_source():
+    source = SourceFile.from_string("""\
+a { /* one
+two */ b: "c // d /* e";
+    f: url(//g.h/i.png); // j
+    k: l \\
+m;
+    n: o; // p /* q
+    r: http://s; }
+t: { u: v } /* w */
+""")
+    # Comments are found in order, so the /* after // doesn't start one
+    assert source.contents.splitlines() == [
+        'a {  b: "c // d /* e";',
+        'f: url(//g.h/i.png); ',
+        'k: l m;',
+        'n: o; ',
+        'r: http://s; }',
+        't:{ u: v } ',
+    ]
+
+
+def test_prepare_indented_source():
+    source = SourceFile.from_string("""\
+a
+  b: c
+  d
+    e: f
+g: h
+""", is_sass=True)
+    assert source.contents == """\
+a {
+b: c;
+d {
+e: f; } }
+g: h;
+"""
@@ -0,0 +1,66 @@
+"""Tests for source map generation."""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import json
+
+from scss.compiler import Compiler
+from scss.source import SourceFile
+from scss.sourcemap import SourceMap
+from scss.sourcemap import encode_vlq
+
+
+def test_encode_vlq():
+    assert encode_vlq(0) == 'A'
+    assert encode_vlq(1) == 'C'
+    assert encode_vlq(-1) == 'D'
+    assert encode_vlq(15) == 'e'
+    assert encode_vlq(16) == 'gB'
+    assert encode_vlq(-17) == 'jB'
+    assert encode_vlq(1000) == 'w+B'
+
+
+def test_source_map_mappings():
+    source_map = SourceMap()
+    source_map.add_mapping('a.scss', 0)
+    source_map.advance('a {\n  b: c;\n}\n\n  ')
+    source_map.add_mapping('b.scss', 4, 2)
+    source_map.advance('d {}\n')
+
+    assert source_map.sources == ['a.scss', 'b.scss']
+    assert source_map.encode_mappings() == 'AAAA;;;;ECIE;'
+
+
+def test_compile_with_source_map():
+    source = SourceFile.from_string("""\
+a {
+    b: c;
+    d {
+        e: f;
+    }
+}
+""", relpath='main.scss')
+    compiler = Compiler(output_style='expanded', generate_source_map='map')
+    compilation = compiler.make_compilation()
+    compilation.add_source(source)
+    css = compilation.run()
+
+    # The map doesn't leave anything in the CSS itself
+    assert css == """\
+a {
+  b: c;
+}
+a d {
+  e: f;
+}
+"""
+
+    source_map = json.loads(compilation.source_map.to_json(filename='out.css'))
+    assert source_map['version'] == 3
+    assert source_map['file'] == 'out.css'
+    assert source_map['sources'] == [source.path]
+    # Each selector is mapped, at column 0, to its rule's line
+    first, second = [
+        rule.lineno for rule in compilation.rules if not rule.is_empty]
+    assert source_map['mappings'] == 'AAA{0};;;AA{1}A;;;'.format(
+        encode_vlq(first - 1), encode_vlq(second - first))
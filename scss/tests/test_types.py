@@ -3,7 +3,9 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from scss.types import Color, List, Null, Number, String
+import pickle
+
+from scss.types import Color, List, Map, Null, Number, String
 
 import pytest
 
@@ -62,6 +64,25 @@ def test_division():
     assert Number(1, "in") / Number(6, "pt") == Number(12)
 
 
+def test_arithmetic_stays_exact():
+    # Quick paths for unitless and same-unit values shouldn't lose precision
+    third = Number(1, "px") / Number(3)
+    assert (third + third + third).render() == '1px'
+    assert (third * Number(3)).value == 1
+    assert (Number(0.1) + Number(0.2)).value == Number(0.1).value + Number(0.2).value
+
+    # Units on top and bottom still cancel out
+    ret = Number(2, "px") * Number(3, "px") / Number(1, "px")
+    assert ret.unit_numer == ('px',)
+    assert ret.unit_denom == ()
+    assert ret.render() == '6px'
+
+    # Zero takes the units of whichever side isn't zero, or the right side
+    ret = Number(0, "px") + Number(0, "em")
+    assert ret.unit_numer == ('em',)
+    assert (-Number(5, "px")).render() == '-5px'
+
+
 def test_comparison_numeric():
     lo = Number(123)
     hi = Number(456)
@@ -155,4 +176,67 @@ def test_unrenderable():
         List([]).render()
 
 
+def test_values_are_immutable():
+    for value in (Number(1, "px"), String('abc'), Color.from_name('red'),
+            List([Number(1)]), Map([(String('a'), Number(1))]), Null()):
+        with pytest.raises(AttributeError):
+            value.value = Number(2)
+
+        assert pickle.loads(pickle.dumps(value)) == value
+
+
+def test_map_merge_shares_storage():
+    a, b, c = String('a'), String('b'), String('c')
+    base = Map([(a, Number(1)), (b, Number(2))])
+    added = base.merge(Map([(c, Number(3))]))
+    changed = added.merge(Map([(a, Number(4))]))
+
+    # Earlier maps can't see keys or values added after them
+    assert base.to_pairs() == ((a, Number(1)), (b, Number(2)))
+    assert base.get(c) is None
+    assert added.get(a) == Number(1)
+    assert changed.to_pairs() == (
+        (a, Number(4)), (b, Number(2)), (c, Number(3)))
+    assert len(changed) == 3
+
+    # Merging into an older map again can't reuse the storage, since
+    # `added` already appended to it
+    other = base.merge(Map([(c, Number(5)), (c, Number(6))]))
+    assert other.to_pairs() == ((a, Number(1)), (b, Number(2)), (c, Number(6)))
+    assert added.get(c) == Number(3)
+
+
+def test_map_merge_from_threads():
+    import sys
+    import threading
+
+    bases = [Map([(String('a'), Number(1))]) for _ in range(5000)]
+    results = {}
+
+    def merge_all(name):
+        key = String(name)
+        results[name] = [base.merge(Map([(key, Number(2))])) for base in bases]
+
+    threads = [
+        threading.Thread(target=merge_all, args=(name,))
+        for name in ('b', 'c', 'd', 'e')]
+    # Switch threads as often as possible, to give them a chance to race
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    # Each merge sees only its own new key, whichever thread got there first
+    for name, merged in results.items():
+        for result in merged:
+            assert result.to_pairs() == (
+                (String('a'), Number(1)), (String(name), Number(2)))
+    assert all(len(base) == 1 for base in bases)
+
+
 # TODO write more!  i'm lazy.
@@ -4,6 +4,7 @@ from __future__ import print_function
 
 from collections import deque
 from contextlib import contextmanager
+import json
 import logging
 import os
 import re
@@ -13,6 +14,7 @@ from scss import config
 from scss.calculator import Calculator
 from scss.compiler import _prop_split_re
 from scss.compiler import Compiler
+from scss.errors import SassError
 from scss.errors import SassEvaluationError
 from scss.legacy import Scss
 from scss.legacy import _default_scss_vars
@@ -21,7 +23,8 @@ from scss.rule import SassRule
 from scss.rule import UnparsedBlock
 from scss.scss_meta import BUILD_INFO
 from scss.source import SourceFile
-from scss.util import profiling
+from scss.sourcemap import source_mapping_url_comment
+from scss.util import captured_messages
 
 try:
     raw_input
@@ -62,14 +65,23 @@ def main():
     parser.add_option("-o", "--output", metavar="PATH",
                       help="Write output to PATH (a directory if using watch, a file otherwise)")
     parser.add_option("-s", "--suffix", metavar="STRING",
-                      help="If using watch, a suffix added to the output filename (i.e. filename.STRING.css)")
+                      help="If using watch or jobs, a suffix added to the output filename (i.e. filename.STRING.css)")
+    parser.add_option("-j", "--jobs", metavar="N", type="int",
+                      help="Compile each file separately using N worker processes, writing each to its own .css file (in the output directory, if given)")
+    parser.add_option("--serve", metavar="SOCKET",
+                      help="Run a compile server listening on the Unix socket SOCKET, keeping caches warm between compiles")
+    parser.add_option("--client", metavar="SOCKET",
+                      help="Compile by sending the files to the compile server listening on SOCKET")
     parser.add_option("--time", action="store_true",
-                      help="Ignored, will be removed in 2.0")
+                      help="Print how long each phase, directive, and mixin took")
     parser.add_option("--debug-info", action="store_true",
                       help="Turns on scss's debugging information")
     parser.add_option("--no-debug-info", action="store_false",
                       dest="debug_info", default=False,
                       help="Turns off scss's debugging information")
+    parser.add_option("--source-map", action="store_const", const='map',
+                      dest="debug_info",
+                      help="Write a source map alongside each output file, as OUTPUT.map")
     parser.add_option("-T", "--test", action="store_true", help=SUPPRESS_HELP)
     parser.add_option("-t", "--style", metavar="NAME",
                       dest="style", default='nested',
@@ -139,8 +151,15 @@ def main():
         print_version()
     elif options.interactive:
         run_repl(options)
+    elif options.serve:
+        from scss.server import serve
+        serve(options.serve)
+    elif options.client:
+        do_client(options, args)
     elif options.watch:
         watch_sources(options)
+    elif options.jobs:
+        do_parallel_build(options, args)
     else:
         do_build(options, args)
 
@@ -157,7 +176,23 @@ def run_tests():
     pytest.main("")  # don't let py.test re-consume our arguments
 
 
+def _write_source_map(css, dest_path):
+    """Write the source map from the last compile of `css` next to
+    `dest_path`, and return the comment pointing to it.
+    """
+    map_path = dest_path + '.map'
+    with open(map_path, 'w') as f:
+        f.write(css.source_map.to_json(
+            filename=os.path.basename(dest_path),
+            relative_to=os.path.dirname(os.path.abspath(map_path))))
+    return source_mapping_url_comment(os.path.basename(map_path))
+
+
 def do_build(options, args):
+    if options.debug_info == 'map' and options.output is None:
+        sys.stderr.write("--source-map requires an output file\n")
+        sys.exit(2)
+
     if options.output is not None:
         out = open(options.output, 'wb')
     else:
@@ -168,6 +203,7 @@ def do_build(options, args):
     css = Scss(scss_opts={
         'style': options.style,
         'debug_info': options.debug_info,
+        'stats': options.time,
     },
         search_paths=options.load_paths,
     )
@@ -191,10 +227,179 @@ def do_build(options, args):
         sys.exit(3)
 
     output = css.compile(source_files=source_files)
+    if css.source_map is not None:
+        output += _write_source_map(css, options.output)
     out.write(output.encode(source_files[0].encoding))
 
-    for f, t in profiling.items():
-        sys.stderr.write("%s took %03fs" % (f, t))
+    if css.stats is not None:
+        sys.stderr.write(css.stats.format())
+
+
+def do_client(options, args):
+    from scss.server import send_request
+
+    if options.debug_info == 'map' and options.output is None:
+        sys.stderr.write("--source-map requires an output file\n")
+        sys.exit(2)
+
+    request = {
+        'command': 'compile',
+        'cwd': os.getcwd(),
+        'style': options.style,
+        'debug_info': options.debug_info,
+        'stats': bool(options.time),
+        'load_paths': options.load_paths,
+        'output': options.output,
+    }
+    if not args or args == ['-']:
+        stdin = getattr(sys.stdin, 'buffer', sys.stdin)
+        request['string'] = stdin.read().decode('utf8')
+        request['is_sass'] = options.is_sass
+    else:
+        request['files'] = args
+
+    try:
+        response = send_request(options.client, request)
+    except (IOError, OSError) as e:
+        sys.stderr.write("Can't reach the compile server: {0}\n".format(e))
+        sys.exit(2)
+
+    for message in response.get('messages', ()):
+        sys.stderr.write(message + "\n")
+    if not response['ok']:
+        sys.stderr.write(response['error'] + "\n")
+        sys.exit(1)
+
+    output = response['css']
+    if response['source_map'] is not None:
+        map_path = options.output + '.map'
+        with open(map_path, 'w') as f:
+            f.write(json.dumps(response['source_map'], sort_keys=True))
+        output += source_mapping_url_comment(os.path.basename(map_path))
+
+    if options.output is not None:
+        out = open(options.output, 'wb')
+    else:
+        out = getattr(sys.stdout, 'buffer', sys.stdout)
+    out.write(output.encode(response['encoding']))
+    if options.output is not None:
+        out.close()
+
+    if response['stats'] is not None:
+        sys.stderr.write(response['stats'])
+
+
+def _output_filename(src_path, output_dir=None, suffix=None):
+    """Return the path of the .css file to write for the given source."""
+    fname = os.path.basename(src_path)
+    if fname.endswith('.scss') or fname.endswith('.sass'):
+        fname = fname[:-5]
+    if suffix:
+        fname += '.' + suffix
+    fname += '.css'
+
+    if output_dir:
+        return os.path.join(output_dir, fname)
+    else:
+        return os.path.join(os.path.dirname(src_path), fname)
+
+
+def _init_build_worker(config_values):
+    # Workers don't necessarily inherit the parent's state (e.g. on Windows),
+    # so reapply the configuration from the command line
+    for key, value in config_values.items():
+        setattr(config, key, value)
+
+
+def _build_one(job):
+    """Compile a single file into its own .css file.  Runs in a worker process.
+
+    Returns a 4-tuple of ``(path, messages, error, stats)``, where `messages`
+    is a list of logged messages and warnings, `error` is an error message or
+    None, and `stats` is a formatted timing report or None.
+    """
+    path, dest_path, scss_opts, load_paths, is_sass = job
+
+    error = None
+    stats = None
+    with captured_messages() as messages:
+        try:
+            source = SourceFile.from_filename(path, is_sass=is_sass)
+            css = Scss(scss_opts=scss_opts, search_paths=load_paths)
+            output = css.compile(source_files=[source])
+            if css.source_map is not None:
+                output += _write_source_map(css, dest_path)
+            with open(dest_path, 'wb') as out:
+                out.write(output.encode(source.encoding))
+            if css.stats is not None:
+                stats = css.stats.format()
+        except (SassError, IOError, OSError) as e:
+            error = "{0}".format(e)
+
+    # A warning or log message repeated within one file (e.g. from inside a
+    # loop) is only reported once
+    unique_messages = []
+    for message in messages:
+        if message not in unique_messages:
+            unique_messages.append(message)
+
+    return path, unique_messages, error, stats
+
+
+def do_parallel_build(options, args):
+    if not args or '-' in args:
+        sys.stderr.write("Building with --jobs requires input files\n")
+        sys.exit(2)
+    if options.output and not os.path.isdir(options.output):
+        sys.stderr.write("jobs output directory is invalid: '%s'\n" % (options.output))
+        sys.exit(2)
+
+    scss_opts = {
+        'style': options.style,
+        'debug_info': options.debug_info,
+        'stats': options.time,
+    }
+    jobs = [
+        (
+            path,
+            _output_filename(path, options.output, options.suffix),
+            scss_opts,
+            options.load_paths,
+            options.is_sass,
+        )
+        for path in args
+    ]
+
+    if options.jobs > 1:
+        import multiprocessing
+        config_values = dict(
+            (key, getattr(config, key)) for key in dir(config)
+            if key.isupper())
+        pool = multiprocessing.Pool(
+            min(options.jobs, len(jobs)),
+            initializer=_init_build_worker, initargs=(config_values,))
+        try:
+            # Pool.map preserves the input order, so output is the same
+            # regardless of which worker finishes first
+            results = pool.map(_build_one, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_build_one(job) for job in jobs]
+
+    failed = False
+    for path, messages, error, stats in results:
+        for message in messages:
+            sys.stderr.write("%s: %s\n" % (path, message))
+        if error is not None:
+            failed = True
+            sys.stderr.write("%s: ERROR: %s\n" % (path, error))
+        if stats is not None:
+            sys.stderr.write("%s:\n%s" % (path, stats))
+
+    if failed:
+        sys.exit(1)
 
 
 def watch_sources(options):
@@ -234,24 +439,18 @@ def watch_sources(options):
                 self.compile(path)
 
         def compile(self, src_path):
-            fname = os.path.basename(src_path)
-            if fname.endswith('.scss') or fname.endswith('.sass'):
-                fname = fname[:-5]
-                if self.suffix:
-                    fname += '.' + self.suffix
-                fname += '.css'
-            else:
+            if not (src_path.endswith('.scss') or src_path.endswith('.sass')):
                 # you didn't give me a file of the correct type!
                 return False
 
-            if self.output:
-                dest_path = os.path.join(self.output, fname)
-            else:
-                dest_path = os.path.join(os.path.dirname(src_path), fname)
+            dest_path = _output_filename(src_path, self.output, self.suffix)
 
             print("Compiling %s => %s" % (src_path, dest_path))
+            output = self.css.compile(scss_file=src_path)
+            if self.css.source_map is not None:
+                output += _write_source_map(self.css, dest_path)
             dest_file = open(dest_path, 'wb')
-            dest_file.write(self.css.compile(scss_file=src_path).encode('utf-8'))
+            dest_file.write(output.encode('utf-8'))
 
         def on_moved(self, event):
             super(ScssEventHandler, self).on_moved(event)
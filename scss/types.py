@@ -12,6 +12,7 @@ from fractions import Fraction
 import operator
 import re
 import string
+import threading
 from warnings import warn
 
 import six
@@ -20,18 +21,44 @@ from scss.cssdefs import COLOR_LOOKUP, COLOR_NAMES, ZEROABLE_UNITS, convert_unit
 
 PRECISION = 5
 
+# Values are immutable, so their own constructors have to go around
+# `Value.__setattr__`
+_set = object.__setattr__
+
 
 ###############################################################################
 # pyScss data types:
 
 # TODO make Value work as a string in every way?  i.e. have a .quotes...
 class Value(object):
+    """Base class for all Sass values.  Values are immutable: operations
+    return new values, and values can be shared freely between expressions,
+    variables and maps.
+    """
+    __slots__ = ()
+
     is_null = False
     sass_type_name = 'unknown'
 
     def __repr__(self):
         return "<{0}: {1!r}>".format(type(self).__name__, self.value)
 
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "{0} objects are immutable".format(type(self).__name__))
+
+    def __setstate__(self, state):
+        # Unpickling restores slots with setattr, which is disallowed above
+        if isinstance(state, tuple):
+            dict_state, slot_state = state
+        else:
+            dict_state, slot_state = state, None
+        if dict_state:
+            self.__dict__.update(dict_state)
+        if slot_state:
+            for name, value in slot_state.items():
+                _set(self, name, value)
+
     # Sass values are all true, except for booleans and nulls
     def __bool__(self):
         return True
@@ -128,6 +155,14 @@ class Value(object):
         """
         raise ValueError("Not a map: {0!r}".format(self))
 
+    def get(self, key, default=None):
+        """Return the value for `key`, treating this value as a map, or
+        `default` if there's no such key.
+
+        If this type can't be expressed as a map, raise.
+        """
+        return self.to_dict().get(key, default)
+
     def render(self, compress=False):
         """Return this value's CSS representation as a string (text, i.e.
         unicode!).
@@ -145,6 +180,8 @@ class Value(object):
 
 
 class Null(Value):
+    __slots__ = ()
+
     is_null = True
     sass_type_name = 'null'
 
@@ -178,6 +215,8 @@ class Null(Value):
 
 
 class Undefined(Null):
+    __slots__ = ()
+
     sass_type_name = 'undefined'
 
     def __init__(self, value=None):
@@ -227,10 +266,12 @@ class Undefined(Null):
 
 
 class Boolean(Value):
+    __slots__ = ('value',)
+
     sass_type_name = 'bool'
 
     def __init__(self, value):
-        self.value = bool(value)
+        _set(self, 'value', bool(value))
 
     def __str__(self):
         return 'true' if self.value else 'false'
@@ -251,12 +292,14 @@ class Boolean(Value):
 class Number(Value):
     sass_type_name = 'number'
 
+    __slots__ = ('value', 'unit_numer', 'unit_denom')
+
     def __init__(self, amount, unit=None, unit_numer=(), unit_denom=()):
         if isinstance(amount, Number):
             assert not unit and not unit_numer and not unit_denom
-            self.value = amount.value
-            self.unit_numer = amount.unit_numer
-            self.unit_denom = amount.unit_denom
+            _set(self, 'value', amount.value)
+            _set(self, 'unit_numer', amount.unit_numer)
+            _set(self, 'unit_denom', amount.unit_denom)
             return
 
         # Numbers with units are stored internally as a "base" unit, which can
@@ -268,17 +311,25 @@ class Number(Value):
         # board preserves as much precision as possible.
         # TODO in fact, i wouldn't mind parsing Sass values as fractions of a
         # power of ten!
-        # TODO this slowed the test suite down by about 10%, ha
-        if isinstance(amount, (int, float)):
-            amount = Fraction.from_float(amount)
-        elif isinstance(amount, Fraction):
+        if isinstance(amount, Fraction):
             pass
+        elif isinstance(amount, int):
+            amount = Fraction(amount)
+        elif isinstance(amount, float):
+            amount = Fraction.from_float(amount)
         else:
             raise TypeError("Expected number, got %r" % (amount,))
 
         if unit is not None:
             unit_numer = unit_numer + (unit.lower(),)
 
+        if not unit_numer or not unit_denom:
+            # Nothing to cancel out, which is by far the most common case
+            _set(self, 'unit_numer', tuple(unit_numer))
+            _set(self, 'unit_denom', tuple(unit_denom))
+            _set(self, 'value', amount)
+            return
+
         # Cancel out any convertable units on the top and bottom
         numerator_base_units = count_base_units(unit_numer)
         denominator_base_units = count_base_units(unit_denom)
@@ -294,9 +345,25 @@ class Number(Value):
         denom_factor, unit_denom = cancel_base_units(unit_denom, cancelable_base_units)
 
         # And we're done
-        self.unit_numer = tuple(unit_numer)
-        self.unit_denom = tuple(unit_denom)
-        self.value = amount * (numer_factor / denom_factor)
+        _set(self, 'unit_numer', tuple(unit_numer))
+        _set(self, 'unit_denom', tuple(unit_denom))
+        _set(self, 'value', amount * (numer_factor / denom_factor))
+
+    @classmethod
+    def _from_parts(cls, value, unit_numer, unit_denom):
+        """Build a number from a `Fraction` and tuples of lowercase units, as
+        produced by arithmetic on other numbers.  Skips straight past
+        `__init__` unless there are units on both top and bottom that might
+        cancel.
+        """
+        if unit_numer and unit_denom:
+            return cls(value, unit_numer=unit_numer, unit_denom=unit_denom)
+
+        self = cls.__new__(cls)
+        _set(self, 'value', value)
+        _set(self, 'unit_numer', unit_numer)
+        _set(self, 'unit_denom', unit_denom)
+        return self
 
     def __repr__(self):
         value = self.value
@@ -327,7 +394,7 @@ class Number(Value):
         return self
 
     def __neg__(self):
-        return self * Number(-1)
+        return self._from_parts(-self.value, self.unit_numer, self.unit_denom)
 
     def __str__(self):
         return self.render()
@@ -402,7 +469,7 @@ class Number(Value):
         numer = self.unit_numer + other.unit_numer
         denom = self.unit_denom + other.unit_denom
 
-        return Number(amount, unit_numer=numer, unit_denom=denom)
+        return Number._from_parts(amount, numer, denom)
 
     def __div__(self, other):
         if not isinstance(other, Number):
@@ -412,7 +479,7 @@ class Number(Value):
         numer = self.unit_numer + other.unit_denom
         denom = self.unit_denom + other.unit_numer
 
-        return Number(amount, unit_numer=numer, unit_denom=denom)
+        return Number._from_parts(amount, numer, denom)
 
     def __mod__(self, other):
         if not isinstance(other, Number):
@@ -421,7 +488,7 @@ class Number(Value):
         amount = self.value % other.value
 
         if self.is_unitless:
-            return Number(amount)
+            return Number._from_parts(amount, (), ())
 
         if not other.is_unitless:
             left = self.to_base_units()
@@ -430,7 +497,7 @@ class Number(Value):
             if left.unit_numer != right.unit_numer or left.unit_denom != right.unit_denom:
                 raise ValueError("Can't reconcile units: %r and %r" % (self, other))
 
-        return Number(amount, unit_numer=self.unit_numer, unit_denom=self.unit_denom)
+        return Number._from_parts(amount, self.unit_numer, self.unit_denom)
 
     def __add__(self, other):
         # Numbers auto-cast to strings when added to other strings
@@ -450,24 +517,28 @@ class Number(Value):
         # If either side is unitless, inherit the other side's units.  Skip all
         # the rest of the conversion math, too.
         if self.is_unitless or other.is_unitless:
-            return Number(
+            return Number._from_parts(
                 op(self.value, other.value),
-                unit_numer=self.unit_numer or other.unit_numer,
-                unit_denom=self.unit_denom or other.unit_denom,
+                self.unit_numer or other.unit_numer,
+                self.unit_denom or other.unit_denom,
             )
 
-        # Likewise, if either side is zero, it can auto-cast to any units
+        # Likewise, if either side is zero, it can auto-cast to any units.
+        # And with exactly the same units, converting to base units and back
+        # is exact, so it can be skipped
         if self.value == 0:
-            return Number(
+            return Number._from_parts(
                 op(self.value, other.value),
-                unit_numer=other.unit_numer,
-                unit_denom=other.unit_denom,
+                other.unit_numer,
+                other.unit_denom,
             )
-        elif other.value == 0:
-            return Number(
+        elif other.value == 0 or (
+                self.unit_numer == other.unit_numer and
+                self.unit_denom == other.unit_denom):
+            return Number._from_parts(
                 op(self.value, other.value),
-                unit_numer=self.unit_numer,
-                unit_denom=self.unit_denom,
+                self.unit_numer,
+                self.unit_denom,
             )
 
         # Reduce both operands to the same units
@@ -483,7 +554,7 @@ class Number(Value):
         if left.value != 0:
             new_amount = new_amount * self.value / left.value
 
-        return Number(new_amount, unit_numer=self.unit_numer, unit_denom=self.unit_denom)
+        return Number._from_parts(new_amount, self.unit_numer, self.unit_denom)
 
     ### Helper methods, mostly used internally
 
@@ -499,10 +570,10 @@ class Number(Value):
         numer_factor, numer_units = convert_units_to_base_units(self.unit_numer)
         denom_factor, denom_units = convert_units_to_base_units(self.unit_denom)
 
-        return Number(
+        return Number._from_parts(
             amount * numer_factor / denom_factor,
-            unit_numer=numer_units,
-            unit_denom=denom_units,
+            numer_units,
+            denom_units,
         )
 
     ### Utilities for public consumption
@@ -611,29 +682,34 @@ class List(Value):
     in CSS output.
     """
 
+    __slots__ = ('value', 'use_comma', 'literal')
+
     sass_type_name = 'list'
 
     def __init__(self, iterable, separator=None, use_comma=None, literal=False):
         if isinstance(iterable, List):
-            iterable = iterable.value
+            # Already checked, and immutable, so the items can be shared
+            value = iterable.value
+        else:
+            if (not isinstance(iterable, Iterable) or
+                    isinstance(iterable, six.string_types)):
+                raise TypeError("Expected list, got %r" % (iterable,))
 
-        if (not isinstance(iterable, Iterable) or
-                isinstance(iterable, six.string_types)):
-            raise TypeError("Expected list, got %r" % (iterable,))
+            value = tuple(iterable)
 
-        self.value = list(iterable)
+            for item in value:
+                if not isinstance(item, Value):
+                    raise TypeError("Expected a Sass type, got %r" % (item,))
 
-        for item in self.value:
-            if not isinstance(item, Value):
-                raise TypeError("Expected a Sass type, got %r" % (item,))
+        _set(self, 'value', value)
 
         # TODO remove separator argument entirely
         if use_comma is None:
-            self.use_comma = separator == ","
+            _set(self, 'use_comma', separator == ",")
         else:
-            self.use_comma = use_comma
+            _set(self, 'use_comma', use_comma)
 
-        self.literal = literal
+        _set(self, 'literal', literal)
 
     @classmethod
     def maybe_new(cls, values, use_comma=True):
@@ -687,7 +763,7 @@ class List(Value):
         )
 
     def __hash__(self):
-        return hash((tuple(self.value), self.use_comma))
+        return hash((self.value, self.use_comma))
 
     def delimiter(self, compress=False):
         if self.use_comma:
@@ -796,15 +872,18 @@ class Arglist(List):
     of tacked on separately, and only accessible via Python (or the Sass
     `keywords` function).
     """
+    __slots__ = ('_kwargs', 'keywords_retrieved')
+
     sass_type_name = 'arglist'
-    keywords_retrieved = False
 
     def __init__(self, args, kwargs):
-        self._kwargs = Map(kwargs)
+        _set(self, '_kwargs', Map(kwargs))
+        # The one piece of mutable state on any value; see `extract_keywords`
+        _set(self, 'keywords_retrieved', False)
         super(Arglist, self).__init__(args, use_comma=True)
 
     def extract_keywords(self):
-        self.keywords_retrieved = True
+        _set(self, 'keywords_retrieved', True)
         return self._kwargs
 
 
@@ -819,19 +898,22 @@ def _constrain(value, lb=0, ub=1):
 
 
 class Color(Value):
+    __slots__ = ('tokens', 'value', 'original_literal')
+
     sass_type_name = 'color'
-    original_literal = None
 
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.value = (0, 0, 0, 1)
         if tokens is None:
-            self.value = (0, 0, 0, 1)
+            value = (0, 0, 0, 1)
         elif isinstance(tokens, Color):
-            self.value = tokens.value
+            value = tokens.value
         else:
             raise TypeError("Can't make Color from %r" % (tokens,))
 
+        _set(self, 'tokens', tokens)
+        _set(self, 'value', value)
+        _set(self, 'original_literal', None)
+
     ### Alternate constructors
 
     @classmethod
@@ -842,13 +924,11 @@ class Color(Value):
         alpha = _constrain(alpha)
 
         self = cls.__new__(cls)  # TODO
-        self.tokens = None
+        _set(self, 'tokens', None)
         # TODO really should store these things internally as 0-1, but can't
         # until stuff stops examining .value directly
-        self.value = (red * 255.0, green * 255.0, blue * 255.0, alpha)
-
-        if original_literal is not None:
-            self.original_literal = original_literal
+        _set(self, 'value', (red * 255.0, green * 255.0, blue * 255.0, alpha))
+        _set(self, 'original_literal', original_literal)
 
         return self
 
@@ -896,11 +976,12 @@ class Color(Value):
     def from_name(cls, name):
         """Build a Color from a CSS color name."""
         self = cls.__new__(cls)  # TODO
-        self.original_literal = name
+        _set(self, 'tokens', None)
+        _set(self, 'original_literal', name)
 
         r, g, b, a = COLOR_NAMES[name]
 
-        self.value = r, g, b, a
+        _set(self, 'value', (r, g, b, a))
         return self
 
     ### Accessors
@@ -1062,6 +1143,8 @@ class String(Value):
     Otherwise, double quotes are used.
     """
 
+    __slots__ = ('value', 'quotes', 'original_literal')
+
     sass_type_name = 'string'
 
     bad_identifier_rx = re.compile('[^-_a-zA-Z\x80-\U0010FFFF]')
@@ -1087,13 +1170,13 @@ class String(Value):
         if not isinstance(value, six.text_type):
             raise TypeError("Expected string, got {0!r}".format(value))
 
-        self.value = value
-        self.quotes = quotes
+        _set(self, 'value', value)
+        _set(self, 'quotes', quotes)
         # TODO this isn't quite used yet
         if literal:
-            self.original_literal = value
+            _set(self, 'original_literal', value)
         else:
-            self.original_literal = None
+            _set(self, 'original_literal', None)
 
     @classmethod
     def unquoted(cls, value, literal=False):
@@ -1229,9 +1312,11 @@ class Function(String):
     marker.  Acts mostly like a string, but has a function name and parentheses
     around it.
     """
+    __slots__ = ('function_name',)
+
     def __init__(self, string, function_name, quotes='"', literal=False):
         super(Function, self).__init__(string, quotes=quotes, literal=literal)
-        self.function_name = function_name
+        _set(self, 'function_name', function_name)
 
     def render(self, compress=False):
         return "{0}({1})".format(
@@ -1247,6 +1332,8 @@ class Function(String):
 
 
 class Url(Function):
+    __slots__ = ()
+
     # Bare URLs may not contain quotes, parentheses, or unprintables.  Quoted
     # URLs may, of course, contain whatever they like.
     # Ref: http://dev.w3.org/csswg/css-syntax-3/#consume-a-url-token0
@@ -1272,45 +1359,158 @@ class Url(Function):
         return "url(" + inside + ")"
 
 
+# Held while appending to any `_MapStore`; one lock for all of them keeps the
+# stores picklable, and appends are brief
+_map_store_lock = threading.Lock()
+
+
+class _MapStore(object):
+    """The keys and values behind one or more `Map`\s.
+
+    Keys are only ever appended, and a key's value is never changed once any
+    map can see it.  So a map is just a store and how many of its keys it
+    includes, plus any values it overrides, and merging new keys into the most
+    recent map can append them to the same store rather than copying it.
+
+    Maps are shared between threads (a constant map literal is cached with
+    its expression), so deciding whether to append and appending happen
+    under `_map_store_lock`.
+    """
+    __slots__ = ('keys', 'entries')
+
+    def __init__(self):
+        self.keys = []
+        # Maps keys to their (position, value)
+        self.entries = {}
+
+    def add(self, key, value):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = len(self.keys), value
+            self.keys.append(key)
+        else:
+            self.entries[key] = entry[0], value
+
+
 class Map(Value):
+    """A map of keys to values, which remembers the order keys were added.
+
+    Maps made with `merge` share storage with the map they were merged into,
+    so building up a large map one `map-merge` at a time doesn't copy it every
+    time.
+    """
+    __slots__ = ('_store', '_length', '_overrides', '_pairs', '_dict')
+
     sass_type_name = 'map'
 
     def __init__(self, pairs, index=None):
-        self.pairs = tuple(pairs)
+        # `index` is no longer needed, but still accepted for compatibility
+        pairs = tuple(pairs)
+        store = _MapStore()
+        for key, value in pairs:
+            store.add(key, value)
+
+        _set(self, '_store', store)
+        _set(self, '_length', len(store.keys))
+        _set(self, '_overrides', None)
+        # Keep the pairs as given, which may repeat a key
+        _set(self, '_pairs', pairs)
+        _set(self, '_dict', None)
 
-        if index is None:
-            self.index = {}
-            for key, value in pairs:
-                self.index[key] = value
-        else:
-            self.index = index
+    @classmethod
+    def _from_store(cls, store, length, overrides):
+        self = cls.__new__(cls)
+        _set(self, '_store', store)
+        _set(self, '_length', length)
+        _set(self, '_overrides', overrides)
+        _set(self, '_pairs', None)
+        _set(self, '_dict', None)
+        return self
 
     def __repr__(self):
-        return "<Map: (%s)>" % (", ".join("%s: %s" % pair for pair in self.pairs),)
+        return "<Map: (%s)>" % (", ".join("%s: %s" % pair for pair in self.to_pairs()),)
 
     def __hash__(self):
-        return hash(self.pairs)
+        return hash(self.to_pairs())
 
     def __len__(self):
-        return len(self.pairs)
+        if self._pairs is not None:
+            return len(self._pairs)
+        return self._length
 
     def __iter__(self):
-        return iter(self.pairs)
+        return iter(self.to_pairs())
 
     def __getitem__(self, index):
-        return List(self.pairs[index], use_comma=True)
+        return List(self.to_pairs()[index], use_comma=True)
 
     def __eq__(self, other):
         try:
-            return self.pairs == other.to_pairs()
+            return self.to_pairs() == other.to_pairs()
         except ValueError:
             return NotImplemented
 
+    def get(self, key, default=None):
+        overrides = self._overrides
+        if overrides is not None and key in overrides:
+            return overrides[key]
+
+        entry = self._store.entries.get(key)
+        if entry is None or entry[0] >= self._length:
+            return default
+        return entry[1]
+
+    def merge(self, other):
+        """Return a new map with the pairs of `other` added to this one's.
+        Keys already in this map keep their position.
+        """
+        other_pairs = other.to_pairs()
+        length = self._length
+        overrides = self._overrides
+        with _map_store_lock:
+            store = self._store
+            if len(store.keys) != length or (
+                    overrides is not None and len(overrides) * 4 > length):
+                # Either another map has already appended to this store, or
+                # so many values are overridden that it's worth starting
+                # afresh
+                store = _MapStore()
+                for key, value in self.to_pairs():
+                    store.add(key, value)
+                length = len(store.keys)
+                overrides = None
+
+            entries = store.entries
+            new_overrides = None
+            for key, value in other_pairs:
+                entry = entries.get(key)
+                if entry is None or entry[0] >= length:
+                    # New keys, including ones this very merge added, aren't
+                    # visible to any other map yet
+                    store.add(key, value)
+                else:
+                    if new_overrides is None:
+                        new_overrides = dict(overrides or ())
+                    new_overrides[key] = value
+            new_length = len(store.keys)
+
+        if new_overrides is not None:
+            overrides = new_overrides
+        return Map._from_store(store, new_length, overrides)
+
     def to_dict(self):
-        return self.index
+        if self._dict is None:
+            _set(self, '_dict', dict(self.to_pairs()))
+        return self._dict
 
     def to_pairs(self):
-        return self.pairs
+        if self._pairs is None:
+            entries = self._store.entries
+            overrides = self._overrides or {}
+            _set(self, '_pairs', tuple(
+                (key, overrides[key] if key in overrides else entries[key][1])
+                for key in self._store.keys[:self._length]))
+        return self._pairs
 
     def render(self, compress=False):
         raise TypeError("Cannot render map %r as CSS" % (self,))
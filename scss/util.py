@@ -3,12 +3,21 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import base64
+from contextlib import contextmanager
 import hashlib
+import logging
 import os
 import re
 import sys
+import threading
 import time
 from functools import wraps
+import warnings
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
 
 import six
 
@@ -130,13 +139,14 @@ profiling = {}
 def print_timing(level=0):
     def _print_timing(func):
         if config.VERBOSITY:
+            @wraps(func)
             def wrapper(*args, **kwargs):
                 if config.VERBOSITY >= level:
                     t1 = time.time()
                     res = func(*args, **kwargs)
                     t2 = time.time()
-                    profiling.setdefault(func.func_name, 0)
-                    profiling[func.func_name] += (t2 - t1)
+                    profiling.setdefault(func.__name__, 0)
+                    profiling[func.__name__] += (t2 - t1)
                     return res
                 else:
                     return func(*args, **kwargs)
@@ -146,6 +156,42 @@ def print_timing(level=0):
     return _print_timing
 
 
+################################################################################
+# Collecting messages
+
+@contextmanager
+def captured_messages():
+    """Collect everything logged by pyScss and every warning raised while
+    compiling, instead of printing it immediately, so the messages from
+    separate compilations don't interleave.  Yields a list, which is filled in
+    as messages arrive.
+    """
+    messages = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            messages.append(self.format(record))
+
+    handler = ListHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    logger = logging.getLogger('scss')
+    old_propagate = logger.propagate
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', UserWarning)
+            yield messages
+        for warning in caught:
+            # Anything else is about Python code, not the Sass being compiled
+            if issubclass(warning.category, UserWarning):
+                messages.append("{0}: {1}".format(
+                    warning.category.__name__, warning.message))
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = old_propagate
+
+
 ################################################################################
 # Profiler decorator
 def profile(fn):
@@ -163,17 +209,17 @@ def profile(fn):
             profiler.disable()
             stats = pstats.Stats(profiler, stream=stream)
             stats.sort_stats('time')
-            print >>stream, ""
-            print >>stream, "=" * 100
-            print >>stream, "Stats:"
+            print("", file=stream)
+            print("=" * 100, file=stream)
+            print("Stats:", file=stream)
             stats.print_stats()
-            print >>stream, "=" * 100
-            print >>stream, "Callers:"
+            print("=" * 100, file=stream)
+            print("Callers:", file=stream)
             stats.print_callers()
-            print >>stream, "=" * 100
-            print >>stream, "Callees:"
+            print("=" * 100, file=stream)
+            print("Callees:", file=stream)
             stats.print_callees()
-            print >>sys.stderr, stream.getvalue()
+            print(stream.getvalue(), file=sys.stderr)
             stream.close()
         return res
     return wrapper
@@ -234,6 +280,63 @@ class tmemoize(object):
         return wrapper
 
 
+################################################################################
+# Bounded cache
+
+class LRUCache(object):
+    """A dict-like cache holding at most `maxsize` entries, discarding the
+    least recently used entry when full.  If `maxsize` is None, the cache
+    grows without bound.
+
+    Safe to share between threads.  Keeps count of ``hits``, ``misses``, and
+    ``evictions``.
+    """
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return "<{0} {1}/{2} hits={3} misses={4} evictions={5}>".format(
+            type(self).__name__, len(self._data), self.maxsize,
+            self.hits, self.misses, self.evictions)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                # Move the entry to the end, as the most recently used
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
 ################################################################################
 # Memoized getmtime (can accept storage)
 @tmemoize()
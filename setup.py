@@ -111,6 +111,7 @@ def run_setup(with_binary):
         install_requires=install_requires,
         packages=[
             'scss',
+            'scss.benchmarks',
             'scss.extension',
             'scss.extension.compass',
             'scss.grammar',